@@ -0,0 +1,409 @@
+"""
+Alerts - Detects indicator transitions as new observations land and dispatches them to sinks
+
+Each detector remembers the last date it evaluated and resumes from there, so
+an evaluation costs time proportional to the new data, not the history. The
+first evaluation of a detector backfills the event log without dispatching.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import threading
+
+from lazy_import import lazy_import
+from analyzer import classify_inflation
+from fred_client import rate_changes
+from results import AlertEvent
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+
+class Detector(ABC):
+    """Produces alert events from the data that arrived since its last evaluation"""
+
+    name = 'detector'
+    series = ()  # Registry names whose new data can produce events
+
+    def __init__(self):
+        self.last_date: Optional[str] = None
+        self.last_label: Optional[str] = None
+
+    @abstractmethod
+    def evaluate(self) -> List[AlertEvent]:
+        """
+        Find events since the last evaluated date and advance past them
+
+        Returns:
+            New events in date order
+        """
+
+    def state(self) -> Dict:
+        """Progress to persist between runs: the last evaluated date and its label"""
+        return {'last_date': self.last_date, 'last_label': self.last_label}
+
+    def restore(self, state: Dict):
+        """Resume from progress saved by state()"""
+        self.last_date = state.get('last_date')
+        self.last_label = state.get('last_label')
+
+
+class TransitionDetector(Detector):
+    """Reports changes in a label derived from one or more series"""
+
+    name = 'transition'
+
+    @abstractmethod
+    def labels(self, start: Optional[str]) -> pd.DataFrame:
+        """
+        Labels from a date onward
+
+        Returns:
+            DataFrame indexed by date with 'label' and 'value' columns
+        """
+
+    @abstractmethod
+    def event(self, date: str, previous: str, current: str, value: float) -> AlertEvent:
+        """Describe one transition"""
+
+    def evaluate(self) -> List[AlertEvent]:
+        """
+        Find transitions since the last evaluated date
+
+        The last evaluated date is included again so revisions to it are caught.
+
+        Returns:
+            New events in date order
+        """
+        frame = self.labels(self.last_date)
+        if frame.empty:
+            return []
+        labels = frame['label'].values.astype(object)
+        previous = np.concatenate([[self.last_label], labels[:-1]])
+        changed = np.flatnonzero((labels != previous) & pd.notna(previous))
+
+        events = [
+            self.event(frame.index[i].strftime('%Y-%m-%d'), previous[i], labels[i],
+                       float(frame['value'].values[i]))
+            for i in changed
+        ]
+        self.last_date = frame.index[-1].strftime('%Y-%m-%d')
+        self.last_label = str(labels[-1])
+        return events
+
+
+class StanceDetector(TransitionDetector):
+    """Monthly policy stance flips (the stance_history classification)"""
+
+    name = 'stance'
+    series = ('fed_funds_rate', 'cpi', 'core_pce', 'unemployment', 'yield_curve')
+
+    def __init__(self, analyzer):
+        super().__init__()
+        self.analyzer = analyzer
+
+    def labels(self, start: Optional[str]) -> pd.DataFrame:
+        stances = self.analyzer.stance_labels(start)
+        return pd.DataFrame({'label': stances, 'value': np.nan})
+
+    def event(self, date, previous, current, value) -> AlertEvent:
+        return AlertEvent('stance_change', date, current,
+                          f"Policy stance changed from {previous} to {current}", previous)
+
+
+class YieldCurveDetector(TransitionDetector):
+    """Start and end of 10Y-2Y curve inversions"""
+
+    name = 'yield_curve'
+    series = ('yield_curve',)
+
+    def __init__(self, fred_client):
+        super().__init__()
+        self.fred_client = fred_client
+
+    def labels(self, start: Optional[str]) -> pd.DataFrame:
+        spread = self.fred_client.get_series(self.fred_client.registry.series_id('yield_curve'))
+        spread = spread.loc[start:].dropna()
+        inverted = spread.values < config.YIELD_CURVE_INVERSION_THRESHOLD
+        return pd.DataFrame({'label': np.where(inverted, 'Inverted', 'Normal'),
+                             'value': spread.values}, index=spread.index)
+
+    def event(self, date, previous, current, value) -> AlertEvent:
+        if current == 'Inverted':
+            return AlertEvent('inversion_start', date, current,
+                              f"Yield curve inverted (10Y-2Y spread {value:.2f})", previous, value)
+        return AlertEvent('inversion_end', date, current,
+                          f"Yield curve inversion ended (10Y-2Y spread {value:.2f})",
+                          previous, value)
+
+
+class InflationDetector(TransitionDetector):
+    """Changes in inflation pressure status (High Pressure, Elevated, ...)"""
+
+    name = 'inflation'
+    series = ('cpi',)
+
+    def __init__(self, analytics):
+        super().__init__()
+        self.analytics = analytics
+
+    def labels(self, start: Optional[str]) -> pd.DataFrame:
+        inflation = self.analytics.get('cpi').to_frame(start)['yoy'].dropna()
+        return pd.DataFrame({'label': classify_inflation(inflation.values),
+                             'value': inflation.values}, index=inflation.index)
+
+    def event(self, date, previous, current, value) -> AlertEvent:
+        return AlertEvent('inflation_status', date, current,
+                          f"Inflation pressure moved from {previous} to {current} "
+                          f"({value:.1f}% YoY)", previous, value)
+
+
+class RateChangeDetector(Detector):
+    """Fed funds moves of at least config.RATE_CHANGE_THRESHOLD (as in get_rate_changes)"""
+
+    name = 'rate_change'
+    series = ('fed_funds_rate',)
+
+    def __init__(self, fred_client):
+        super().__init__()
+        self.fred_client = fred_client
+
+    def evaluate(self) -> List[AlertEvent]:
+        data = self.fred_client.get_series(self.fred_client.registry.series_id('fed_funds_rate'))
+        data = data.loc[self.last_date:].dropna()
+        if data.empty:
+            return []
+        changes = rate_changes(data)
+        if self.last_date is not None:
+            changes = changes.loc[changes.index > pd.Timestamp(self.last_date)]
+
+        events = [
+            AlertEvent('rate_change', row.Index.strftime('%Y-%m-%d'), f"{row.value:.2f}",
+                       f"Fed funds rate {'rose' if row.change > 0 else 'fell'} "
+                       f"{abs(row.change):.2f}pp to {row.value:.2f}%",
+                       f"{row.previous:.2f}", float(row.change))
+            for row in changes.itertuples()
+        ]
+        self.last_date = data.index[-1].strftime('%Y-%m-%d')
+        self.last_label = f"{data.values[-1]:.2f}"
+        return events
+
+
+class AlertSink(ABC):
+    """Destination for dispatched alerts"""
+
+    @abstractmethod
+    def send(self, events: List[AlertEvent]):
+        """Deliver events; raising marks the delivery as failed (it is logged, not retried)"""
+
+
+class FileSink(AlertSink):
+    """Appends alerts to a file as JSON lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, events: List[AlertEvent]):
+        with open(self.path, 'a') as f:
+            for event in events:
+                f.write(json.dumps(event.to_dict()) + '\n')
+
+
+class WebhookSink(AlertSink):
+    """POSTs alerts to a URL as {"events": [...]}"""
+
+    def __init__(self, url: str, timeout: float = None):
+        self.url = url
+        self.timeout = timeout or config.ALERT_WEBHOOK_TIMEOUT
+
+    def send(self, events: List[AlertEvent]):
+        response = requests.post(self.url, json={'events': [e.to_dict() for e in events]},
+                                 timeout=self.timeout)
+        response.raise_for_status()
+
+
+def sinks_from_config() -> List[AlertSink]:
+    """Sinks enabled by ALERT_FILE and ALERT_WEBHOOK_URL"""
+    sinks = []
+    if config.ALERT_FILE:
+        sinks.append(FileSink(config.ALERT_FILE))
+    if config.ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(config.ALERT_WEBHOOK_URL))
+    return sinks
+
+
+class AlertPipeline:
+    """Runs detectors when watched series receive new data, logging and dispatching events"""
+
+    def __init__(self, fred_client, analyzer, sinks: List[AlertSink] = None,
+                 log_path: str = None, debounce: float = None):
+        """
+        Initialize the pipeline
+
+        Args:
+            fred_client: FREDClient whose new data triggers evaluation
+            analyzer: PolicyAnalyzer providing stance classification and analytics
+            sinks: Alert destinations (default: from config)
+            log_path: JSON lines event log; detector progress is kept beside it in
+                '<log_path>.state' (default config.ALERT_LOG_FILE, '' for none)
+            debounce: Seconds to wait for more data before evaluating (default
+                config.ALERT_DEBOUNCE)
+        """
+        self.fred_client = fred_client
+        self.detectors: List[Detector] = [
+            StanceDetector(analyzer),
+            YieldCurveDetector(fred_client),
+            InflationDetector(analyzer.analytics),
+            RateChangeDetector(fred_client),
+        ]
+        self.sinks = sinks if sinks is not None else sinks_from_config()
+        self.log_path = config.ALERT_LOG_FILE if log_path is None else log_path
+        self.debounce = config.ALERT_DEBOUNCE if debounce is None else debounce
+        self.events = deque(maxlen=config.ALERT_HISTORY_SIZE)
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._load()
+
+    def add_detector(self, detector: Detector):
+        """Evaluate another detector (it backfills on its first evaluation)"""
+        self.detectors.append(detector)
+
+    def add_sink(self, sink: AlertSink):
+        """Dispatch future alerts to another sink"""
+        self.sinks.append(sink)
+
+    @property
+    def _state_path(self) -> str:
+        return f"{self.log_path}.state"
+
+    def _load(self):
+        """Restore recent events and detector progress from disk"""
+        if not self.log_path:
+            return
+        try:
+            if os.path.exists(self.log_path):
+                with open(self.log_path) as f:
+                    self.events.extend(AlertEvent.from_dict(json.loads(line))
+                                       for line in f if line.strip())
+            if os.path.exists(self._state_path):
+                with open(self._state_path) as f:
+                    state = json.load(f)
+                for detector in self.detectors:
+                    if detector.name in state:
+                        detector.restore(state[detector.name])
+        except Exception as e:
+            logger.error(f"Failed to load alert history: {str(e)}")
+
+    def _persist(self, events: List[AlertEvent]):
+        """Append events to the log, then record detector progress"""
+        if not self.log_path:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        with open(self.log_path, 'a') as f:
+            for event in events:
+                f.write(json.dumps(event.to_dict()) + '\n')
+        temp_path = f"{self._state_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({d.name: d.state() for d in self.detectors}, f)
+        os.replace(temp_path, self._state_path)
+
+    def evaluate(self) -> List[AlertEvent]:
+        """
+        Run every detector over the data that arrived since its last evaluation
+
+        Returns:
+            New events (including backfilled ones, which are logged but not dispatched)
+        """
+        with self._lock:
+            detected_at = datetime.now().isoformat()
+            new_events, dispatch = [], []
+            for detector in self.detectors:
+                backfill = detector.last_date is None
+                try:
+                    events = [replace(e, detected_at=detected_at) for e in detector.evaluate()]
+                except Exception as e:
+                    logger.error(f"Alert detector {detector.name} failed: {str(e)}")
+                    continue
+                new_events.extend(events)
+                if not backfill:
+                    dispatch.extend(events)
+
+            try:
+                self._persist(new_events)
+            except Exception as e:
+                logger.error(f"Failed to write alert log: {str(e)}")
+            self.events.extend(new_events)
+
+        if new_events:
+            logger.info(f"Detected {len(new_events)} alert events ({len(dispatch)} dispatched)")
+        self._dispatch(dispatch)
+        return new_events
+
+    def _dispatch(self, events: List[AlertEvent]):
+        """Send events to every sink; a failing sink is logged and doesn't stop the others"""
+        if not events:
+            return
+        for sink in self.sinks:
+            try:
+                sink.send(events)
+            except Exception as e:
+                logger.error(f"Alert sink {type(sink).__name__} failed: {str(e)}")
+
+    def recent(self, since: str = None, kinds: Iterable[str] = None,
+               limit: int = None) -> List[AlertEvent]:
+        """
+        Get logged events, newest first
+
+        Args:
+            since: Only events dated on or after this date (YYYY-MM-DD)
+            kinds: Only these event kinds
+            limit: Maximum number of events
+        """
+        kinds = set(kinds) if kinds else None
+        events = [e for e in self.events
+                  if (since is None or e.date >= since) and (kinds is None or e.kind in kinds)]
+        events.sort(key=lambda e: e.date, reverse=True)
+        return events[:limit] if limit else events
+
+    def status(self) -> List[Dict]:
+        """Each detector's name and progress"""
+        return [{'name': d.name, **d.state()} for d in self.detectors]
+
+    def _on_data(self, series_id: str):
+        watched = {self.fred_client.registry.series_id(name)
+                   for detector in self.detectors for name in detector.series}
+        if series_id in watched:
+            self._pending.set()
+
+    def start(self):
+        """Evaluate on a background thread whenever watched series receive new data"""
+        if self._thread is not None:
+            return
+        self.fred_client.add_listener(self._on_data)
+        self._thread = threading.Thread(target=self._run, name='alert-pipeline', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current evaluation"""
+        self._stop.set()
+        self._pending.set()
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            if self._stop.wait(self.debounce):
+                return
+            self._pending.clear()
+            self.evaluate()
@@ -0,0 +1,415 @@
+"""
+Rolling Analytics - Momentum, inflation and spread statistics over full series history
+"""
+from __future__ import annotations
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from lazy_import import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Kind of statistics computed for each tracked series
+ANALYTICS_SERIES = {
+    'fed_funds_rate': 'rate',
+    'treasury_10y': 'rate',
+    'treasury_2y': 'rate',
+    'cpi': 'price_index',
+    'core_pce': 'price_index',
+    'yield_curve': 'spread',
+}
+
+
+class _GrowableArray:
+    """NumPy array with amortized O(1) appends"""
+
+    def __init__(self, dtype, capacity: int = 64):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def extend(self, values: np.ndarray):
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def _shift_months(dates: np.ndarray, months: int) -> np.ndarray:
+    """Move each date back by a number of calendar months"""
+    return (pd.DatetimeIndex(dates) - pd.DateOffset(months=months)).values
+
+
+class RollingSeries:
+    """Observations of one series and their derived statistics, extended in place
+
+    Updates and reads hold a lock, so a reader never sees statistics of a different
+    length than the dates.
+    """
+
+    # Observations re-checked for revisions on each update
+    REVISION_WINDOW = 24
+    # Minimum observations in the z-score window before a score is reported
+    ZSCORE_MIN_PERIODS = 20
+
+    def __init__(self, name: str, kind: str,
+                 momentum_months: List[int] = None, zscore_years: int = None):
+        """
+        Initialize an empty series
+
+        Args:
+            name: Series name from the registry
+            kind: 'rate', 'price_index' or 'spread'
+            momentum_months: Lookbacks for rate momentum (default config.ANALYTICS_MOMENTUM_MONTHS)
+            zscore_years: Window for spread z-scores (default config.ANALYTICS_ZSCORE_YEARS)
+        """
+        self.name = name
+        self.kind = kind
+        self.momentum_months = list(momentum_months or config.ANALYTICS_MOMENTUM_MONTHS)
+        self.zscore_years = zscore_years or config.ANALYTICS_ZSCORE_YEARS
+        self.version = 0
+        self._lock = threading.RLock()
+        self._reset()
+
+    @property
+    def columns(self) -> List[str]:
+        """Names of the statistics computed for this series"""
+        if self.kind == 'rate':
+            return [f'momentum_{m}m' for m in self.momentum_months]
+        if self.kind == 'price_index':
+            return ['yoy', 'mom', 'mom_annualized', 'annualized_3m']
+        if self.kind == 'spread':
+            return ['zscore', 'percentile']
+        raise ValueError(f"Unknown analytics kind: {self.kind}")
+
+    def _reset(self):
+        """Drop all observations and statistics"""
+        self._dates = _GrowableArray('datetime64[ns]')
+        self._values = _GrowableArray(np.float64)
+        self._stats = {col: _GrowableArray(np.float64) for col in self.columns}
+        self._cumsum = _GrowableArray(np.float64)
+        self._cumsum_sq = _GrowableArray(np.float64)
+        self._cumsum.extend(np.zeros(1))
+        self._cumsum_sq.extend(np.zeros(1))
+        self._sorted = []
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    @classmethod
+    def restore(cls, name: str, kind: str, dates: np.ndarray, values: np.ndarray,
+                stats: Dict[str, np.ndarray]) -> 'RollingSeries':
+        """
+        Rebuild a series from previously computed arrays without recomputing statistics
+
+        Args:
+            name: Series name from the registry
+            kind: 'rate', 'price_index' or 'spread'
+            dates: Observation dates (datetime64[ns])
+            values: Observation values
+            stats: Statistic column -> values, computed with the current configuration
+
+        Returns:
+            RollingSeries ready for incremental updates
+        """
+        series = cls(name, kind)
+        if set(stats) != set(series.columns):
+            raise ValueError(f"Saved statistics for {name} don't match configured columns")
+        series._dates.extend(dates)
+        series._values.extend(values)
+        for col in series.columns:
+            series._stats[col].extend(stats[col])
+        if kind == 'spread':
+            series._cumsum.extend(np.cumsum(values))
+            series._cumsum_sq.extend(np.cumsum(values ** 2))
+            series._sorted = sorted(values.tolist())
+        series.version = 1
+        return series
+
+    @property
+    def params(self) -> Dict:
+        """Settings the statistics depend on (restored statistics must match)"""
+        return {'momentum_months': self.momentum_months, 'zscore_years': self.zscore_years}
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Dates, values and each statistic column as arrays"""
+        with self._lock:
+            return {
+                'dates': self._dates.values,
+                'values': self._values.values,
+                **{col: self._stats[col].values for col in self.columns}
+            }
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        """Date of the latest observation"""
+        return pd.Timestamp(self._dates.values[-1]) if len(self) else None
+
+    def update(self, data: pd.Series) -> int:
+        """
+        Merge observations, computing statistics only for points not seen before
+
+        Revisions to recent observations trigger a full recompute.
+
+        Args:
+            data: Series indexed by date
+
+        Returns:
+            Number of new observations added
+        """
+        data = data.dropna()
+        dates = data.index.values.astype('datetime64[ns]')
+        values = data.values.astype(np.float64)
+
+        with self._lock:
+            if len(self) and self._is_revised(dates, values):
+                logger.info(f"Revisions detected in {self.name}, recomputing analytics")
+                self._reset()
+
+            if len(self):
+                new = dates > self._dates.values[-1]
+                dates, values = dates[new], values[new]
+            if not len(dates):
+                return 0
+
+            start = len(self)
+            self._dates.extend(dates)
+            self._values.extend(values)
+            self._compute(start)
+            self.version += 1
+            return len(dates)
+
+    def _is_revised(self, dates: np.ndarray, values: np.ndarray) -> bool:
+        """Check whether recent stored observations were changed, removed or backfilled"""
+        stored_dates = self._dates.values[-self.REVISION_WINDOW:]
+        stored_values = self._values.values[-self.REVISION_WINDOW:]
+        lo = np.searchsorted(dates, stored_dates[0], side='left')
+        hi = np.searchsorted(dates, stored_dates[-1], side='right')
+        if lo == hi:
+            # Incoming data does not overlap the recent window (e.g. only newer points)
+            return False
+
+        in_range = stored_dates >= dates[lo]
+        stored_dates, stored_values = stored_dates[in_range], stored_values[in_range]
+        if hi - lo != len(stored_dates) or (dates[lo:hi] != stored_dates).any():
+            return True
+        return not np.allclose(values[lo:hi], stored_values)
+
+    def _compute(self, start: int):
+        """Compute statistics for rows from start onwards"""
+        if self.kind == 'rate':
+            self._compute_momentum(start)
+        elif self.kind == 'price_index':
+            self._compute_inflation(start)
+        else:
+            self._compute_spread(start)
+
+    def _lookup_asof(self, targets: np.ndarray) -> np.ndarray:
+        """Index of the last observation on or before each target date (-1 if none)"""
+        return np.searchsorted(self._dates.values, targets, side='right') - 1
+
+    def _lookup_exact(self, targets: np.ndarray) -> np.ndarray:
+        """Index of the observation dated exactly at each target date (-1 if missing)"""
+        dates = self._dates.values
+        pos = np.searchsorted(dates, targets, side='left')
+        capped = np.minimum(pos, len(dates) - 1)
+        return np.where((pos < len(dates)) & (dates[capped] == targets), capped, -1)
+
+    def _compute_momentum(self, start: int):
+        """Change in value versus the observation N months earlier"""
+        dates = self._dates.values[start:]
+        values = self._values.values
+        current = values[start:]
+        for months in self.momentum_months:
+            pos = self._lookup_asof(_shift_months(dates, months))
+            change = np.where(pos >= 0, current - values[np.maximum(pos, 0)], np.nan)
+            self._stats[f'momentum_{months}m'].extend(change)
+
+    def _compute_inflation(self, start: int):
+        """YoY, MoM and annualized inflation from exact calendar-month lookbacks"""
+        dates = self._dates.values[start:]
+        values = self._values.values
+        current = values[start:]
+
+        def ratio(months):
+            pos = self._lookup_exact(_shift_months(dates, months))
+            return np.where(pos >= 0, current / values[np.maximum(pos, 0)], np.nan)
+
+        one_month = ratio(1)
+        self._stats['yoy'].extend((ratio(12) - 1) * 100)
+        self._stats['mom'].extend((one_month - 1) * 100)
+        self._stats['mom_annualized'].extend((one_month ** 12 - 1) * 100)
+        self._stats['annualized_3m'].extend((ratio(3) ** 4 - 1) * 100)
+
+    def _compute_spread(self, start: int):
+        """Rolling z-score and point-in-time percentile of the level"""
+        dates = self._dates.values[start:]
+        values = self._values.values
+        current = values[start:]
+
+        self._cumsum.extend(self._cumsum.values[-1] + np.cumsum(current))
+        self._cumsum_sq.extend(self._cumsum_sq.values[-1] + np.cumsum(current ** 2))
+        cs, cs_sq = self._cumsum.values, self._cumsum_sq.values
+
+        end = np.arange(start, len(values)) + 1
+        window_start = np.searchsorted(
+            self._dates.values, _shift_months(dates, 12 * self.zscore_years), side='left'
+        )
+        count = end - window_start
+        mean = (cs[end] - cs[window_start]) / count
+        var = np.maximum((cs_sq[end] - cs_sq[window_start]) / count - mean ** 2, 0.0)
+        std = np.sqrt(var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zscore = np.where((count >= self.ZSCORE_MIN_PERIODS) & (std > 0),
+                              (current - mean) / std, np.nan)
+        self._stats['zscore'].extend(zscore)
+
+        if start == 0:
+            percentile = pd.Series(current).expanding().rank(pct=True).values * 100
+            self._sorted = sorted(current.tolist())
+        else:
+            percentile = np.empty(len(current))
+            for i, value in enumerate(current.tolist()):
+                bisect.insort(self._sorted, value)
+                less = bisect.bisect_left(self._sorted, value)
+                ties = bisect.bisect_right(self._sorted, value) - less
+                percentile[i] = (less + (ties + 1) / 2) / len(self._sorted) * 100
+        self._stats['percentile'].extend(percentile)
+
+    def at(self, date=None) -> Optional[Dict]:
+        """
+        Get the value and statistics as of a date
+
+        Args:
+            date: Date (string or timestamp); defaults to the latest observation
+
+        Returns:
+            Dictionary with date, value and each statistic, or None if no data
+        """
+        with self._lock:
+            if not len(self):
+                return None
+            if date is None:
+                i = len(self) - 1
+            else:
+                i = int(self._lookup_asof(np.array([pd.Timestamp(date).to_datetime64()]))[0])
+                if i < 0:
+                    return None
+
+            row = {
+                'date': pd.Timestamp(self._dates.values[i]).strftime('%Y-%m-%d'),
+                'value': float(self._values.values[i])
+            }
+            for col in self.columns:
+                value = self._stats[col].values[i]
+                row[col] = None if np.isnan(value) else float(value)
+            return row
+
+    def to_frame(self, start=None, end=None) -> pd.DataFrame:
+        """Get values and statistics as a DataFrame, optionally limited to a date range"""
+        with self._lock:
+            frame = pd.DataFrame(
+                {'value': self._values.values, **{c: self._stats[c].values for c in self.columns}},
+                index=pd.DatetimeIndex(self._dates.values)
+            )
+        return frame.loc[start:end]
+
+
+class AnalyticsEngine:
+    """Keeps rolling statistics for tracked series in sync with the FRED client cache"""
+
+    def __init__(self, fred_client, series_kinds: Dict[str, str] = None):
+        """
+        Initialize the engine
+
+        Args:
+            fred_client: FREDClient used to load observations
+            series_kinds: Series name -> statistics kind (default ANALYTICS_SERIES)
+        """
+        self.fred_client = fred_client
+        self.series_kinds = series_kinds or ANALYTICS_SERIES
+        self._series: Dict[str, RollingSeries] = {}
+        self._sources: Dict[str, pd.Series] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> RollingSeries:
+        """
+        Get analytics for a series, folding in any new observations from the client
+
+        Args:
+            name: Series name (must be listed in series_kinds)
+
+        Returns:
+            Up-to-date RollingSeries
+        """
+        if name not in self.series_kinds:
+            raise ValueError(f"No analytics configured for series: {name}")
+
+        data = self.fred_client.get_series(self.fred_client.registry.series_id(name))
+        # Request, alert and model-signal threads share the series; checking the
+        # source and updating must happen together or both threads append the same rows
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = RollingSeries(name, self.series_kinds[name])
+            if self._sources.get(name) is not data:
+                added = series.update(data)
+                self._sources[name] = data
+                if added:
+                    logger.info(f"Analytics for {name}: {added} new observations")
+        return series
+
+    def tracked(self) -> List[tuple]:
+        """Computed series paired with the client data they were last updated from"""
+        with self._lock:
+            return [(series, self._sources[name]) for name, series in self._series.items()
+                    if name in self._sources]
+
+    def restore(self, series: RollingSeries, source: pd.Series):
+        """
+        Install saved analytics for a series
+
+        Args:
+            series: Restored RollingSeries
+            source: Client-cached data the statistics were computed from; the
+                series is only updated again once the client returns other data
+        """
+        with self._lock:
+            self._series[series.name] = series
+            self._sources[series.name] = source
+
+    def value(self, name: str, field: str, date=None) -> Optional[float]:
+        """Get a single statistic for a series as of a date"""
+        try:
+            row = self.get(name).at(date)
+            return row.get(field) if row else None
+        except Exception as e:
+            logger.error(f"Error reading {field} for {name}: {str(e)}")
+            return None
+
+    def snapshot(self, date=None) -> Dict[str, Optional[Dict]]:
+        """Get statistics for every tracked series as of a date"""
+        result = {}
+        for name in self.series_kinds:
+            try:
+                result[name] = self.get(name).at(date)
+            except Exception as e:
+                logger.error(f"Error computing analytics for {name}: {str(e)}")
+                result[name] = None
+        return result
@@ -1,24 +1,129 @@
 """
 Policy Analyzer - Analyzes Federal Reserve policy stance and economic conditions
 """
-import pandas as pd
-import numpy as np
+from __future__ import annotations
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from lazy_import import lazy_import
+from analytics import AnalyticsEngine
+from results import (
+    INFLATION_UNKNOWN, STANCE_LABELS, TRAJECTORY_STABLE, TRAJECTORY_UNKNOWN,
+    YIELD_CURVE_UNKNOWN, InflationPressure, RateTrajectory, StanceAnalysis, YieldCurveAnalysis
+)
 import config
 import logging
 
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
 logger = logging.getLogger(__name__)
 
 
+def stance_signals(rate_momentum, inflation, unemployment, yield_curve,
+                   policy_gap=None) -> Tuple:
+    """
+    Count hawkish and dovish signals for scalars or aligned NumPy arrays
+
+    Missing values (None/NaN) contribute no signal.
+
+    Args:
+        rate_momentum: Fed funds change over recent months
+        inflation: YoY CPI inflation
+        unemployment: Unemployment rate
+        yield_curve: 10Y-2Y spread
+        policy_gap: Fed funds minus the Taylor-rule rate (optional)
+
+    Returns:
+        Tuple of (hawkish_signals, dovish_signals) arrays
+    """
+    momentum, inflation, unemployment, spread, gap = (
+        np.asarray(np.nan if x is None else x, dtype=float)
+        for x in (rate_momentum, inflation, unemployment, yield_curve, policy_gap)
+    )
+    hawkish = (2 * (momentum > 0.1)
+               + 2 * (inflation > config.INFLATION_TARGET + 1)
+               + (unemployment < 4.0)
+               + (gap > config.TAYLOR_GAP_THRESHOLD))
+    dovish = (2 * (momentum < -0.1)
+              + (inflation < config.INFLATION_TARGET)
+              + (spread < config.YIELD_CURVE_INVERSION_THRESHOLD)
+              + (unemployment > 5.0)
+              + (gap < -config.TAYLOR_GAP_THRESHOLD))
+    return hawkish, dovish
+
+
+def classify_stance(hawkish, dovish) -> np.ndarray:
+    """Map signal counts to 'Hawkish', 'Dovish' or 'Neutral' labels"""
+    return np.where(hawkish > dovish + 1, 'Hawkish',
+                    np.where(dovish > hawkish + 1, 'Dovish', 'Neutral'))
+
+
+def classify_yield_curve(spread) -> Tuple[np.ndarray, np.ndarray]:
+    """Map 10Y-2Y spreads (scalar or array) to curve statuses and spread-implied recession risk"""
+    spread = np.asarray(np.nan if spread is None else spread, dtype=float)
+    conditions = [np.isnan(spread), spread < 0, spread < 0.5]
+    return (np.select(conditions, ['Unknown', 'Inverted', 'Flat'], default='Normal'),
+            np.select(conditions, ['Unknown', 'High', 'Moderate'], default='Low'))
+
+
+YIELD_CURVE_DESCRIPTIONS = {
+    'Inverted': "10-year yield below 2-year (recession warning)",
+    'Flat': "Yield curve flattening (caution)",
+    'Normal': "Positive slope (healthy economy)",
+}
+
+
+def summarize(stance: str, fed_funds: Optional[float], inflation: Optional[float]) -> str:
+    """One-sentence summary of the stance, Fed funds rate and inflation"""
+    # Degrade gracefully when upstream data is unavailable
+    rate_text = f"{fed_funds:.2f}%" if fed_funds is not None else "N/A"
+    inflation_text = f"{inflation:.1f}%" if inflation is not None else "N/A"
+
+    if stance == "Hawkish":
+        return (f"Fed maintains {stance.lower()} stance with rates at {rate_text} "
+                f"as inflation remains at {inflation_text}, above the 2% target.")
+    elif stance == "Dovish":
+        return (f"Fed signals {stance.lower()} pivot with rates at {rate_text} "
+                f"as economic concerns mount.")
+    else:
+        return (f"Fed holds {stance.lower()} position at {rate_text} "
+                f"while monitoring inflation at {inflation_text}.")
+
+
+def classify_inflation(inflation) -> np.ndarray:
+    """Map YoY inflation (scalar or array) to inflation pressure statuses"""
+    inflation = np.asarray(np.nan if inflation is None else inflation, dtype=float)
+    target = config.INFLATION_TARGET
+    return np.select(
+        [np.isnan(inflation), inflation > target + 2, inflation > target + 0.5,
+         inflation < target - 0.5],
+        ['Unknown', 'High Pressure', 'Elevated', 'Below Target'],
+        default='Near Target'
+    )
+
+
 class PolicyAnalyzer:
     """Analyzes Fed policy stance and economic conditions"""
 
-    def __init__(self, fred_client):
-        """Initialize with a FRED client"""
+    def __init__(self, fred_client, analytics: AnalyticsEngine = None, term_structure=None,
+                 recession_model=None, taylor_rule=None, signals=None):
+        """
+        Initialize with a FRED client, optional shared analytics engine,
+        optional TermStructure and RecessionModel used to assess recession risk,
+        and optional TaylorRule whose policy gap informs the stance. With ModelSignals
+        the current model outputs are read from its background computation (None while
+        it is cold) instead of being computed in the caller's thread.
+        """
         self.fred_client = fred_client
-
-    def analyze_policy_stance(self, indicators: Dict[str, float]) -> Dict:
+        self.analytics = analytics or AnalyticsEngine(fred_client)
+        self.term_structure = term_structure
+        self.recession_model = recession_model
+        self.taylor_rule = taylor_rule
+        self.signals = signals
+        self._stance_history = None
+        self._stance_history_key = None
+
+    def analyze_policy_stance(self, indicators: Dict[str, float]) -> StanceAnalysis:
         """
         Determine current Fed policy stance (Hawkish, Neutral, Dovish)
 
@@ -26,190 +131,236 @@ class PolicyAnalyzer:
             indicators: Dictionary of current economic indicators
 
         Returns:
-            Dictionary with policy stance analysis
+            StanceAnalysis with the stance and the signals behind it
         """
-        fed_funds = indicators.get('fed_funds_rate')
-        inflation = self._calculate_inflation_rate(indicators.get('cpi'))
-        unemployment = indicators.get('unemployment')
-        yield_curve = indicators.get('yield_curve')
-
-        # Get rate momentum
-        rate_momentum = self._calculate_rate_momentum('fed_funds_rate')
-
-        # Determine stance based on multiple factors
-        hawkish_signals = 0
-        dovish_signals = 0
-
-        # Signal 1: Rate trajectory
-        if rate_momentum > 0.1:  # Rising rates
-            hawkish_signals += 2
-        elif rate_momentum < -0.1:  # Falling rates
-            dovish_signals += 2
-
-        # Signal 2: Inflation vs target
-        if inflation and inflation > config.INFLATION_TARGET + 1:
-            hawkish_signals += 2
-        elif inflation and inflation < config.INFLATION_TARGET:
-            dovish_signals += 1
-
-        # Signal 3: Yield curve
-        if yield_curve and yield_curve < config.YIELD_CURVE_INVERSION_THRESHOLD:
-            dovish_signals += 1  # Inverted = recession risk = potential easing
-
-        # Signal 4: Unemployment
-        if unemployment and unemployment > 5.0:
-            dovish_signals += 1
-        elif unemployment and unemployment < 4.0:
-            hawkish_signals += 1
-
-        # Determine overall stance
-        if hawkish_signals > dovish_signals + 1:
-            stance = "Hawkish"
-            color = "red"
-            description = "Tightening policy to combat inflation"
-        elif dovish_signals > hawkish_signals + 1:
-            stance = "Dovish"
-            color = "green"
-            description = "Accommodative policy to support growth"
-        else:
-            stance = "Neutral"
-            color = "yellow"
-            description = "Balanced approach, monitoring data"
+        inputs = self.stance_inputs(indicators)
+        rate_momentum, policy_gap = inputs['rate_momentum'], inputs['policy_gap']
+
+        # Determine stance based on rate trajectory, inflation, yield curve, unemployment
+        # and where the Fed funds rate sits relative to the Taylor rule
+        hawkish, dovish = stance_signals(**inputs)
+        hawkish_signals, dovish_signals = int(hawkish), int(dovish)
+        stance = str(classify_stance(hawkish_signals, dovish_signals))
+        color, description = STANCE_LABELS[stance]
+
+        return StanceAnalysis(
+            stance=stance,
+            color=color,
+            description=description,
+            confidence=abs(hawkish_signals - dovish_signals) * 10,
+            hawkish_signals=hawkish_signals,
+            dovish_signals=dovish_signals,
+            rate_momentum=rate_momentum,
+            analysis_date=datetime.now().isoformat(),
+            policy_gap=policy_gap
+        )
+
+    def stance_inputs(self, indicators: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """
+        Current values of the inputs to stance_signals
 
+        Args:
+            indicators: Dictionary of current economic indicators
+
+        Returns:
+            Dictionary with rate_momentum, inflation, unemployment, yield_curve
+            and policy_gap (None where unavailable)
+        """
         return {
-            'stance': stance,
-            'color': color,
-            'description': description,
-            'confidence': abs(hawkish_signals - dovish_signals) * 10,
-            'hawkish_signals': hawkish_signals,
-            'dovish_signals': dovish_signals,
-            'rate_momentum': rate_momentum,
-            'analysis_date': datetime.now().isoformat()
+            'rate_momentum': self._calculate_rate_momentum('fed_funds_rate'),
+            'inflation': self._calculate_inflation_rate(indicators.get('cpi')),
+            'unemployment': indicators.get('unemployment'),
+            'yield_curve': indicators.get('yield_curve'),
+            'policy_gap': self._policy_gap(),
         }
 
     def _calculate_rate_momentum(self, series_name: str, months: int = 6) -> float:
         """Calculate rate change momentum over recent months"""
+        momentum = self.analytics.value(series_name, f'momentum_{months}m')
+        return momentum if momentum is not None else 0.0
+
+    def _policy_gap(self) -> Optional[float]:
+        """Current Fed funds rate minus the Taylor-rule rate, or None if unavailable"""
+        if self.signals is not None:
+            return self.signals.get('policy_gap')
+        if self.taylor_rule is None:
+            return None
         try:
-            series_id = config.FRED_SERIES.get(series_name)
-            if not series_id:
-                return 0.0
-
-            data = self.fred_client.get_recent_data(series_id, years=1)
-            if len(data) < 2:
-                return 0.0
-
-            # Calculate change over last 6 months
-            recent = data.last(f'{months}M')
-            if len(recent) >= 2:
-                change = float(recent.iloc[-1] - recent.iloc[0])
-                return change
-            return 0.0
+            return self.taylor_rule.policy_gap()
         except Exception as e:
-            logger.error(f"Error calculating momentum: {str(e)}")
-            return 0.0
+            logger.error(f"Error computing Taylor rule: {str(e)}")
+            return None
 
     def _calculate_inflation_rate(self, cpi_value: float) -> float:
         """Calculate year-over-year inflation rate from CPI"""
-        try:
-            series_id = config.FRED_SERIES['cpi']
-            data = self.fred_client.get_recent_data(series_id, years=2)
+        return self.analytics.value('cpi', 'yoy')
 
-            if len(data) < 12:
-                return None
+    def stance_history(self) -> pd.Series:
+        """
+        Classify the policy stance for every month in history
 
-            # Get YoY change
-            current = data.iloc[-1]
-            year_ago = data.iloc[-13] if len(data) >= 13 else data.iloc[-12]
+        Uses the same signals as analyze_policy_stance, evaluated in one vectorized
+        pass. The result is cached until any input series changes.
 
-            inflation_rate = ((current - year_ago) / year_ago) * 100
-            return float(inflation_rate)
-        except Exception as e:
-            logger.error(f"Error calculating inflation: {str(e)}")
-            return None
+        Returns:
+            Series of stance labels indexed by month start
+        """
+        key = self._stance_inputs_key()
+        if key == self._stance_history_key:
+            return self._stance_history
+
+        self._stance_history = self.stance_labels()
+        self._stance_history_key = key
+        return self._stance_history
+
+    def _stance_inputs_key(self) -> tuple:
+        """Identifies the current version of every stance input"""
+        registry = self.fred_client.registry
+        taylor_version = None
+        if self.taylor_rule is not None:
+            self.taylor_rule.history()
+            taylor_version = self.taylor_rule.version
+        return (self.analytics.get('fed_funds_rate').version, self.analytics.get('cpi').version,
+                id(self.fred_client.get_series(registry.series_id('unemployment'))),
+                id(self.fred_client.get_series(registry.series_id('yield_curve'))),
+                taylor_version)
+
+    def stance_labels(self, start=None) -> pd.Series:
+        """
+        Classify the policy stance for each month from a given month onward
+
+        Only the months requested are evaluated, so callers tracking new data
+        pay for the new months rather than the whole history.
 
-    def analyze_yield_curve(self, indicators: Dict[str, float]) -> Dict:
+        Args:
+            start: First month (string or timestamp); defaults to the start of history
+
+        Returns:
+            Series of stance labels indexed by month start
+        """
+        registry = self.fred_client.registry
+        if start is not None:
+            start = pd.Timestamp(start).to_period('M').to_timestamp()
+        momentum = self.analytics.get('fed_funds_rate').to_frame(start)['momentum_6m']
+        inflation = self.analytics.get('cpi').to_frame(start)['yoy']
+        unemployment = self.fred_client.get_series(registry.series_id('unemployment'))
+        spread = self.fred_client.get_series(registry.series_id('yield_curve'))
+        policy_gap = np.nan
+        if self.taylor_rule is not None:
+            policy_gap = self.taylor_rule.history(start)['policy_gap']
+
+        panel = pd.DataFrame({
+            'momentum': momentum.resample('MS').last(),
+            'inflation': inflation.resample('MS').last(),
+            'unemployment': unemployment.loc[start:].resample('MS').last(),
+            'yield_curve': spread.loc[start:].resample('MS').last(),
+            'policy_gap': policy_gap,
+        }).dropna(subset=['momentum', 'inflation'])
+
+        hawkish, dovish = stance_signals(panel['momentum'].values, panel['inflation'].values,
+                                         panel['unemployment'].values,
+                                         panel['yield_curve'].values,
+                                         panel['policy_gap'].values)
+        return pd.Series(classify_stance(hawkish, dovish), index=panel.index)
+
+    def analyze_yield_curve(self, indicators: Dict[str, float]) -> YieldCurveAnalysis:
         """Analyze yield curve for recession signals"""
         spread = indicators.get('yield_curve')
 
         if spread is None:
-            return {
-                'status': 'Unknown',
-                'description': 'Data unavailable',
-                'recession_risk': 'Unknown'
-            }
-
-        if spread < 0:
-            status = "Inverted"
-            description = "10-year yield below 2-year (recession warning)"
-            recession_risk = "High"
-        elif spread < 0.5:
-            status = "Flat"
-            description = "Yield curve flattening (caution)"
-            recession_risk = "Moderate"
-        else:
-            status = "Normal"
-            description = "Positive slope (healthy economy)"
-            recession_risk = "Low"
+            return YIELD_CURVE_UNKNOWN
+
+        status, recession_risk = (str(label) for label in classify_yield_curve(spread))
+        description = YIELD_CURVE_DESCRIPTIONS[status]
+
+        # The model's probability, when available, replaces the fixed spread thresholds
+        probability = self._recession_probability()
+        if probability is not None:
+            if probability >= config.RECESSION_PROBABILITY_HIGH:
+                recession_risk = "High"
+            elif probability >= config.RECESSION_PROBABILITY_MODERATE:
+                recession_risk = "Moderate"
+            else:
+                recession_risk = "Low"
+
+        # A persistent 10Y-3M inversion is a stronger warning than the 10Y-2Y spread alone
+        curve = self._term_structure_signals()
+        if curve and curve['inverted_10y3m']:
+            if curve['inversion_days'] >= config.INVERSION_PERSISTENCE_DAYS:
+                recession_risk = "High"
+                description += f"; 10Y-3M inverted for {curve['inversion_days']} days"
+            elif recession_risk == "Low":
+                recession_risk = "Moderate"
+
+        return YieldCurveAnalysis(status, description, recession_risk, spread, curve, probability)
+
+    def _recession_probability(self) -> Optional[float]:
+        """Model probability of recession within its horizon, or None if unavailable"""
+        if self.signals is not None:
+            return self.signals.get('recession_probability')
+        if self.recession_model is None:
+            return None
+        try:
+            current = self.recession_model.current()
+            return current['probability'] if current else None
+        except Exception as e:
+            logger.error(f"Error scoring recession model: {str(e)}")
+            return None
 
-        return {
-            'status': status,
-            'spread': spread,
-            'description': description,
-            'recession_risk': recession_risk
-        }
+    def _term_structure_signals(self) -> Optional[Dict]:
+        """Current curve factors and inversion state, or None if unavailable"""
+        if self.signals is not None:
+            return self.signals.get('term_structure')
+        if self.term_structure is None:
+            return None
+        try:
+            return self.term_structure.signals()
+        except Exception as e:
+            logger.error(f"Error reading term structure: {str(e)}")
+            return None
 
-    def analyze_inflation_pressure(self, indicators: Dict[str, float]) -> Dict:
+    def analyze_inflation_pressure(self, indicators: Dict[str, float]) -> InflationPressure:
         """Analyze inflation pressure relative to Fed target"""
         inflation = self._calculate_inflation_rate(indicators.get('cpi'))
 
         if inflation is None:
-            return {
-                'status': 'Unknown',
-                'description': 'Data unavailable'
-            }
+            return INFLATION_UNKNOWN
 
         distance_from_target = inflation - config.INFLATION_TARGET
+        status = str(classify_inflation(inflation))
 
-        if inflation > config.INFLATION_TARGET + 2:
-            status = "High Pressure"
+        if status == "High Pressure":
             description = f"Inflation {distance_from_target:.1f}pp above target"
             color = "red"
-        elif inflation > config.INFLATION_TARGET + 0.5:
-            status = "Elevated"
+        elif status == "Elevated":
             description = f"Inflation {distance_from_target:.1f}pp above target"
             color = "orange"
-        elif inflation < config.INFLATION_TARGET - 0.5:
-            status = "Below Target"
+        elif status == "Below Target":
             description = f"Inflation {abs(distance_from_target):.1f}pp below target"
             color = "blue"
         else:
-            status = "Near Target"
             description = "Inflation close to Fed's 2% target"
             color = "green"
 
-        return {
-            'status': status,
-            'current_rate': inflation,
-            'target': config.INFLATION_TARGET,
-            'distance_from_target': distance_from_target,
-            'description': description,
-            'color': color
-        }
+        return InflationPressure(
+            status=status,
+            description=description,
+            current_rate=inflation,
+            target=config.INFLATION_TARGET,
+            distance_from_target=distance_from_target,
+            color=color
+        )
 
-    def get_rate_trajectory(self) -> Dict:
+    def get_rate_trajectory(self) -> RateTrajectory:
         """Analyze recent rate changes and trajectory"""
         try:
             changes = self.fred_client.get_rate_changes(
-                config.FRED_SERIES['fed_funds_rate'],
+                self.fred_client.registry.series_id('fed_funds_rate'),
                 months=24
             )
 
             if not changes:
-                return {
-                    'recent_changes': [],
-                    'trajectory': 'Stable',
-                    'total_change': 0
-                }
+                return TRAJECTORY_STABLE
 
             # Calculate total change
             if len(changes) > 0:
@@ -231,36 +382,23 @@ class PolicyAnalyzer:
             else:
                 trajectory = "Stable"
 
-            return {
-                'recent_changes': changes[-10:],  # Last 10 changes
-                'trajectory': trajectory,
-                'total_change': total_change,
-                'num_changes': len(changes)
-            }
+            return RateTrajectory(
+                recent_changes=tuple(changes[-10:]),  # Last 10 changes
+                trajectory=trajectory,
+                total_change=total_change,
+                num_changes=len(changes)
+            )
         except Exception as e:
             logger.error(f"Error analyzing trajectory: {str(e)}")
-            return {
-                'recent_changes': [],
-                'trajectory': 'Unknown',
-                'total_change': 0
-            }
+            return TRAJECTORY_UNKNOWN
 
-    def generate_summary(self, indicators: Dict[str, float]) -> str:
+    def generate_summary(self, indicators: Dict[str, float],
+                         stance_analysis: StanceAnalysis = None) -> str:
         """Generate a one-sentence summary of current conditions"""
-        stance_analysis = self.analyze_policy_stance(indicators)
-        stance = stance_analysis['stance']
+        if stance_analysis is None:
+            stance_analysis = self.analyze_policy_stance(indicators)
         inflation = self._calculate_inflation_rate(indicators.get('cpi'))
-        fed_funds = indicators.get('fed_funds_rate')
-
-        if stance == "Hawkish":
-            return (f"Fed maintains {stance.lower()} stance with rates at {fed_funds:.2f}% "
-                    f"as inflation remains at {inflation:.1f}%, above the 2% target.")
-        elif stance == "Dovish":
-            return (f"Fed signals {stance.lower()} pivot with rates at {fed_funds:.2f}% "
-                    f"as economic concerns mount.")
-        else:
-            return (f"Fed holds {stance.lower()} position at {fed_funds:.2f}% "
-                    f"while monitoring inflation at {inflation:.1f}%.")
+        return summarize(stance_analysis.stance, indicators.get('fed_funds_rate'), inflation)
 
 
 if __name__ == "__main__":
@@ -282,25 +420,25 @@ if __name__ == "__main__":
         print("\nPolicy Stance Analysis:")
         print("-" * 60)
         stance = analyzer.analyze_policy_stance(indicators)
-        print(f"  Stance: {stance['stance']} ({stance['confidence']}% confidence)")
-        print(f"  Description: {stance['description']}")
-        print(f"  Rate Momentum: {stance['rate_momentum']:.2f}")
+        print(f"  Stance: {stance.stance} ({stance.confidence}% confidence)")
+        print(f"  Description: {stance.description}")
+        print(f"  Rate Momentum: {stance.rate_momentum:.2f}")
 
         # Test yield curve analysis
         print("\nYield Curve Analysis:")
         print("-" * 60)
         yc_analysis = analyzer.analyze_yield_curve(indicators)
-        print(f"  Status: {yc_analysis['status']}")
-        print(f"  Spread: {yc_analysis.get('spread', 'N/A')}")
-        print(f"  Recession Risk: {yc_analysis['recession_risk']}")
+        print(f"  Status: {yc_analysis.status}")
+        print(f"  Spread: {yc_analysis.spread if yc_analysis.spread is not None else 'N/A'}")
+        print(f"  Recession Risk: {yc_analysis.recession_risk}")
 
         # Test inflation analysis
         print("\nInflation Analysis:")
         print("-" * 60)
         inf_analysis = analyzer.analyze_inflation_pressure(indicators)
-        print(f"  Status: {inf_analysis['status']}")
-        print(f"  Current: {inf_analysis.get('current_rate', 'N/A'):.2f}%")
-        print(f"  Target: {inf_analysis.get('target', 'N/A')}%")
+        print(f"  Status: {inf_analysis.status}")
+        print(f"  Current: {inf_analysis.current_rate:.2f}%")
+        print(f"  Target: {inf_analysis.target}%")
 
         # Test summary
         print("\nExecutive Summary:")
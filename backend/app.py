@@ -1,14 +1,20 @@
 """
 Flask API for FRED Portfolio Advisor
+
+Build the app with create_app(); `app` is created on first access, so
+`from app import app` and `gunicorn app:app` work as before.
 """
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-from datetime import datetime
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request
+from werkzeug.local import LocalProxy
+from datetime import datetime, timedelta
 import logging
+import math
+import threading
+import time
 
-from fred_client import FREDClient
-from analyzer import PolicyAnalyzer
-from portfolio_advisor import PortfolioAdvisor
+from circuit_breaker import CircuitOpenError
+from lazy_import import lazy_import
+from serialization import conditional
 import config
 
 # Configure logging
@@ -18,22 +24,221 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+api = Blueprint('api', __name__)
+
+EXTENSION_KEY = 'fred_advisor'
+
+
+def _component(name: str) -> LocalProxy:
+    """Proxy to a component of the app handling the current request"""
+    return LocalProxy(lambda: current_app.extensions[EXTENSION_KEY][name])
+
+
+fred_client = _component('fred_client')
+analytics = _component('analytics')
+analyzer = _component('analyzer')
+advisor = _component('advisor')
+term_structure = _component('term_structure')
+recession_model = _component('recession_model')
+taylor_rule = _component('taylor_rule')
+correlations = _component('correlations')
+alert_pipeline = _component('alerts')
+
+
+def create_app(client=None) -> Flask:
+    """
+    Build the Flask app and its components
+
+    Heavy dependencies (pandas, numpy, requests) are imported here rather than
+    when the module is imported, so tooling and CLI entry points stay fast.
+
+    Args:
+        client: FREDClient to serve data from (default: one configured from config)
+
+    Returns:
+        Configured Flask app
+    """
+    from flask_cors import CORS
+    from fred_client import FREDClient
+    from analytics import AnalyticsEngine
+    from analyzer import PolicyAnalyzer
+    from term_structure import TermStructure
+    from recession_model import RecessionModel
+    from taylor_rule import TaylorRule
+    from correlations import CrossSeriesAnalytics
+    from model_signals import ModelSignals
+    from alerts import AlertPipeline
+    from portfolio_advisor import PortfolioAdvisor
+    from optimizer import RegimeOptimizer
+    from snapshot import CacheSnapshotter
+    from quotas import TenantQuotas
+    from profiling import RequestProfiles, SamplingProfiler
+    from serialization import ResponseJSONProvider, compress_response
+
+    flask_app = Flask(__name__)
+    flask_app.json = ResponseJSONProvider(flask_app)
+    flask_app.after_request(finish_request_profile)  # runs last, so compression is included
+    flask_app.after_request(compress_response)
+    flask_app.before_request(enforce_tenant_quota)
+    flask_app.before_request(start_request_profile)
+    flask_app.teardown_request(discard_request_profile)
+    CORS(flask_app)  # Enable CORS for frontend
+
+    # Initialize components
+    try:
+        client = client or FREDClient()
+        engine = AnalyticsEngine(client)
+        curve = TermStructure(client)
+        recession = RecessionModel(client)
+        rule = TaylorRule(client, engine)
+        cross_series = CrossSeriesAnalytics(client)
+        signals = ModelSignals(client, curve, recession, rule)
+        policy_analyzer = PolicyAnalyzer(client, engine, curve, recession, rule, signals)
+        optimizer = (RegimeOptimizer.from_csv(config.ASSET_RETURNS_FILE)
+                     if config.ASSET_RETURNS_FILE else None)
+        portfolio_advisor = PortfolioAdvisor(policy_analyzer, optimizer)
+        if optimizer is not None:
+            signals.add_source('regime_labels', portfolio_advisor.update_regime_labels)
+        signals.start()
+        alerts = AlertPipeline(client, policy_analyzer)
+        alerts.start()
+        quotas = TenantQuotas.from_config()
+        profiles = RequestProfiles() if config.PROFILING_TOKEN else None
+        sampler = None
+        if config.PROFILER_SAMPLE_INTERVAL > 0:
+            sampler = SamplingProfiler()
+            sampler.start()
+        snapshotter = None
+        if config.SNAPSHOT_FILE:
+            snapshotter = CacheSnapshotter(client, engine)
+            snapshotter.restore()
+            snapshotter.start()
+        series_store = None
+        if config.QUERY_DB_FILE:
+            from series_store import SeriesStore  # sqlite3 is only loaded when enabled
+            series_store = SeriesStore(client)
+            series_store.start()
+        logger.info("Application initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize application: {str(e)}")
+        raise
+
+    flask_app.extensions[EXTENSION_KEY] = {
+        'fred_client': client,
+        'analytics': engine,
+        'analyzer': policy_analyzer,
+        'term_structure': curve,
+        'recession_model': recession,
+        'taylor_rule': rule,
+        'model_signals': signals,
+        'correlations': cross_series,
+        'alerts': alerts,
+        'advisor': portfolio_advisor,
+        'quotas': quotas,
+        'profiles': profiles,
+        'sampler': sampler,
+        'snapshotter': snapshotter,
+        'series_store': series_store
+    }
+    flask_app.register_blueprint(api)
+    return flask_app
+
+
+_default_app = None
+_default_app_lock = threading.Lock()
 
-# Initialize components
-try:
-    fred_client = FREDClient()
-    analyzer = PolicyAnalyzer(fred_client)
-    advisor = PortfolioAdvisor(analyzer)
-    logger.info("Application initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize application: {str(e)}")
-    raise
 
+def __getattr__(name: str):
+    """Build the default app on first access, so `from app import app` keeps working"""
+    global _default_app
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _default_app_lock:
+        if _default_app is None:
+            _default_app = create_app()
+    return _default_app
 
-@app.route('/')
+
+def upstream_unavailable(e: Exception):
+    """503 response when FRED is down and nothing is cached to fall back on"""
+    response = jsonify({
+        'success': False,
+        'error': f"FRED data temporarily unavailable: {str(e)}",
+        'stale_as_of': fred_client.stale_as_of()
+    })
+    response.headers['Retry-After'] = str(config.CIRCUIT_RESET_TIMEOUT)
+    return response, 503
+
+
+def enforce_tenant_quota():
+    """Reject the request with 429 when its tenant is over quota (health checks are exempt)"""
+    quotas = current_app.extensions[EXTENSION_KEY]['quotas']
+    if quotas is None or request.method == 'OPTIONS' or request.path == '/':
+        return None
+    tenant = quotas.identify(request.headers.get(config.TENANT_KEY_HEADER),
+                             request.headers.get(config.TENANT_HEADER), request.remote_addr)
+    wait = quotas.check(tenant)
+    if not wait:
+        return None
+    response = jsonify({
+        'success': False,
+        'error': f"Request quota exceeded for tenant {tenant}"
+    })
+    response.headers['Retry-After'] = str(math.ceil(wait))
+    return response, 429
+
+
+def start_request_profile():
+    """Run the request under cProfile when it carries the profiling token"""
+    profiles = current_app.extensions[EXTENSION_KEY]['profiles']
+    if profiles is None or request.path.startswith('/api/profiles'):
+        return None
+    from profiling import token_valid
+    if token_valid(request.headers.get(config.PROFILE_HEADER)):
+        g.profile = (profiles.start(), time.perf_counter())
+    return None
+
+
+def finish_request_profile(response: Response) -> Response:
+    """Store the request's profile and point the client at it with X-Profile-Id"""
+    started = g.pop('profile', None)
+    if started is None:
+        return response
+    profiler, start = started
+    duration = time.perf_counter() - start
+    profiles = current_app.extensions[EXTENSION_KEY]['profiles']
+    profile_id = profiles.finish(profiler, request.method, request.full_path.rstrip('?'),
+                                 response.status_code, duration)
+    response.headers['X-Profile-Id'] = str(profile_id)
+    response.headers['Server-Timing'] = f'app;dur={duration * 1000:.1f}'
+    return response
+
+
+def discard_request_profile(error=None):
+    """Make sure a profiler never outlives its request (e.g. when after_request was skipped)"""
+    started = g.pop('profile', None)
+    if started is not None:
+        started[0].disable()
+
+
+def chart_history(series_name: str, period: str = '2Y') -> dict:
+    """Historical data for dashboard charts, empty if the series is unavailable"""
+    try:
+        return fred_client.get_historical_data(series_name, period)
+    except Exception as e:
+        logger.error(f"Chart history unavailable for {series_name}: {str(e)}")
+        return {
+            'dates': pd.DatetimeIndex([]),
+            'values': np.array([]),
+            'series_name': series_name,
+            'series_id': fred_client.registry.series_id(series_name)
+        }
+
+
+@api.route('/')
 def home():
     """Health check endpoint"""
     return jsonify({
@@ -44,7 +249,22 @@ def home():
     })
 
 
-@app.route('/api/indicators', methods=['GET'])
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Get cache, upstream fetch queue, model signal and tenant quota metrics"""
+    metrics = fred_client.get_metrics()
+    metrics['model_signals'] = current_app.extensions[EXTENSION_KEY]['model_signals'].status()
+    quotas = current_app.extensions[EXTENSION_KEY]['quotas']
+    if quotas is not None:
+        metrics['tenant_quotas'] = quotas.metrics()
+    return jsonify({
+        'success': True,
+        'timestamp': datetime.now().isoformat(),
+        'metrics': metrics
+    })
+
+
+@api.route('/api/indicators', methods=['GET'])
 def get_indicators():
     """Get all current economic indicators"""
     try:
@@ -57,6 +277,7 @@ def get_indicators():
         response = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
             'indicators': indicators,
             'calculated': {
                 'inflation_rate': inflation_rate
@@ -71,22 +292,23 @@ def get_indicators():
         }), 500
 
 
-@app.route('/api/policy-stance', methods=['GET'])
+@api.route('/api/policy-stance', methods=['GET'])
 def get_policy_stance():
     """Get current Fed policy stance analysis"""
     try:
         logger.info("Analyzing policy stance")
-        indicators = fred_client.get_all_indicators()
+        indicators = fred_client.get_indicators('analyzer')
 
         stance = analyzer.analyze_policy_stance(indicators)
         yield_curve = analyzer.analyze_yield_curve(indicators)
         inflation_pressure = analyzer.analyze_inflation_pressure(indicators)
         rate_trajectory = analyzer.get_rate_trajectory()
-        summary = analyzer.generate_summary(indicators)
+        summary = analyzer.generate_summary(indicators, stance)
 
         response = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
             'policy_stance': stance,
             'yield_curve': yield_curve,
             'inflation_pressure': inflation_pressure,
@@ -102,20 +324,22 @@ def get_policy_stance():
         }), 500
 
 
-@app.route('/api/portfolio-recommendation', methods=['GET'])
+@api.route('/api/portfolio-recommendation', methods=['GET'])
 def get_portfolio_recommendation():
     """Get portfolio strategy recommendation"""
     try:
         logger.info("Generating portfolio recommendation")
-        indicators = fred_client.get_all_indicators()
+        indicators = fred_client.get_indicators('analyzer')
 
-        recommendation = advisor.get_recommendation(indicators)
-        scenarios = advisor.get_scenario_analysis(indicators)
-        asset_outlook = advisor.get_asset_class_outlook(indicators)
+        stance = analyzer.analyze_policy_stance(indicators)
+        recommendation = advisor.get_recommendation(indicators, stance)
+        scenarios = advisor.get_scenario_analysis(indicators, stance)
+        asset_outlook = advisor.get_asset_class_outlook(indicators, stance)
 
         response = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
             'recommendation': recommendation,
             'alternative_scenarios': scenarios,
             'asset_class_outlook': asset_outlook
@@ -129,7 +353,117 @@ def get_portfolio_recommendation():
         }), 500
 
 
-@app.route('/api/historical/<series_name>', methods=['GET'])
+@api.route('/api/portfolio-recommendation/batch', methods=['POST'])
+def get_batch_recommendations():
+    """
+    Get allocations for many client risk profiles, streamed as NDJSON
+    Body: {"profiles": [{"id", "risk_tolerance", "horizon_years", "constraints"}, ...]}
+    """
+    try:
+        body = request.get_json(silent=True)
+        profiles = body.get('profiles') if isinstance(body, dict) else None
+        if not isinstance(profiles, list):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must contain a list of profiles'
+            }), 400
+
+        logger.info(f"Generating batch recommendations for {len(profiles)} profiles")
+        indicators = fred_client.get_indicators('analyzer')
+        results = advisor.get_batch_recommendations(indicators, profiles)
+
+        encode = current_app.json.dumps
+
+        def generate(chunk_size=1000):
+            lines = []
+            for result in results:
+                lines.append(encode(result))
+                if len(lines) >= chunk_size:
+                    yield '\n'.join(lines) + '\n'
+                    lines = []
+            if lines:
+                yield '\n'.join(lines) + '\n'
+
+        return Response(generate(), mimetype='application/x-ndjson')
+    except Exception as e:
+        logger.error(f"Error generating batch recommendations: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/what-if', methods=['POST'])
+def what_if_analysis():
+    """
+    Evaluate the policy stance for hypothetical indicator values
+    Body: {"overrides": {input: value}, "shifts": {input: delta},
+           "grid": {input: [values] | {"start", "stop", "step" | "num"}}}
+    Inputs: rate_momentum, inflation, unemployment, yield_curve, policy_gap
+    """
+    try:
+        import what_if
+
+        body = request.get_json(silent=True) or {}
+        for key in ('overrides', 'shifts', 'grid'):
+            if not isinstance(body.get(key, {}), dict):
+                raise ValueError(f"'{key}' must be an object")
+
+        indicators = fred_client.get_indicators('analyzer')
+        baseline = analyzer.stance_inputs(indicators)
+        result = what_if.evaluate(baseline, body.get('overrides'), body.get('shifts'),
+                                  body.get('grid'))
+        logger.info(f"Evaluated what-if grid of shape {result['shape']}")
+
+        codes = result['stance']
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'baseline': baseline,
+            'scenario': result['scenario'],
+            'stances': what_if.STANCES,
+            'recommendations': {stance: advisor.content.recommendation(stance).strategy_name
+                                for stance in what_if.STANCES},
+        }
+        if not result['axes']:
+            stance = what_if.STANCES[int(codes)]
+            response.update({
+                'stance': stance,
+                'confidence': int(result['confidence']),
+                'hawkish_signals': int(result['hawkish_signals']),
+                'dovish_signals': int(result['dovish_signals']),
+                'recommendation': advisor.content.recommendation(stance)
+            })
+        else:
+            response.update({
+                'axes': result['axes'],
+                'shape': result['shape'],
+                'surface': {key: result[key] for key in
+                            ('stance', 'confidence', 'hawkish_signals', 'dovish_signals')},
+                'shares': what_if.stance_shares(codes)
+            })
+            if len(result['axes']) == 1:
+                response['breakpoints'] = what_if.breakpoints(
+                    next(iter(result['axes'].values())), codes
+                )
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error in what-if analysis: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/historical/<series_name>', methods=['GET'])
 def get_historical_data(series_name):
     """
     Get historical data for a specific series
@@ -144,6 +478,7 @@ def get_historical_data(series_name):
         response = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
             'data': data
         }
         return jsonify(response)
@@ -152,6 +487,8 @@ def get_historical_data(series_name):
             'success': False,
             'error': str(e)
         }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
     except Exception as e:
         logger.error(f"Error fetching historical data: {str(e)}")
         return jsonify({
@@ -160,50 +497,586 @@ def get_historical_data(series_name):
         }), 500
 
 
-@app.route('/api/dashboard', methods=['GET'])
+@api.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Get rolling analytics (momentum, inflation, spread statistics) for all tracked series
+    Query params: date (YYYY-MM-DD, defaults to latest)
+    """
+    try:
+        date = request.args.get('date')
+        logger.info(f"Computing analytics snapshot as of {date or 'latest'}")
+
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'as_of': date,
+            'analytics': analytics.snapshot(date)
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error computing analytics: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/analytics/<series_name>', methods=['GET'])
+def get_series_analytics(series_name):
+    """
+    Get rolling analytics history for one series
+    Query params: start, end (YYYY-MM-DD)
+    """
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        logger.info(f"Fetching analytics history for {series_name}")
+
+        frame = analytics.get(series_name).to_frame(start, end)
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'data': {
+                'series_name': series_name,
+                'dates': frame.index,
+                **{col: frame[col].to_numpy() for col in frame.columns}
+            }
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error fetching analytics history: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/term-structure', methods=['GET'])
+def get_term_structure():
+    """
+    Get the observed and Nelson-Siegel fitted Treasury curve for one day
+    Query params: date (YYYY-MM-DD, defaults to latest)
+    """
+    try:
+        date = request.args.get('date')
+        logger.info(f"Building term structure as of {date or 'latest'}")
+
+        curve = term_structure.curve(date)
+        if curve is None:
+            return jsonify({
+                'success': False,
+                'error': f"No curve available as of {date}"
+            }), 404
+
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'curve': curve,
+            'signals': term_structure.signals()
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error building term structure: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/term-structure/history', methods=['GET'])
+def get_term_structure_history():
+    """
+    Get level/slope/curvature factor and spread history with inversion episodes
+    Query params: start, end (YYYY-MM-DD)
+    """
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        logger.info("Fetching term structure history")
+
+        frame = term_structure.history(start, end)
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'data': {
+                'dates': frame.index,
+                **{col: frame[col].to_numpy()
+                   for col in ('level', 'slope', 'curvature', 'spread_10y3m', 'spread_10y2y')}
+            },
+            'inversions': term_structure.episodes()
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error fetching term structure history: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/recession-probability', methods=['GET'])
+def get_recession_probability():
+    """Get the model's current recession probability and its fit"""
+    try:
+        logger.info("Scoring recession model")
+        current = recession_model.current()
+
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'current': current,
+            'model': recession_model.fit()
+        }
+        return jsonify(response)
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error scoring recession model: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/recession-probability/history', methods=['GET'])
+def get_recession_probability_history():
+    """
+    Get the model probability for every month alongside actual recessions
+    Query params: start, end (YYYY-MM-DD)
+    """
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        logger.info("Fetching recession probability history")
+
+        frame = recession_model.history(start, end)
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'horizon_months': recession_model.horizon,
+            'data': {
+                'dates': frame.index,
+                'probability': frame['probability'].round(6).to_numpy(),
+                'recession': frame['recession'].to_numpy()
+            }
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error fetching recession probability history: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/taylor-rule', methods=['GET'])
+def get_taylor_rule():
+    """Get the current Taylor-rule implied rate and the Fed funds policy gap"""
+    try:
+        logger.info("Computing Taylor rule")
+        current = taylor_rule.current()
+        if current is None:
+            return jsonify({
+                'success': False,
+                'error': "Taylor rule inputs unavailable"
+            }), 404
+
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'current': current
+        }
+        return jsonify(response)
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error computing Taylor rule: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/taylor-rule/history', methods=['GET'])
+def get_taylor_rule_history():
+    """
+    Get the implied rate and policy gap for every month
+    Query params: start, end (YYYY-MM-DD), neutral_rate, natural_unemployment
+    (override the configured assumptions)
+    """
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        assumptions = {
+            name: float(request.args[name])
+            for name in ('neutral_rate', 'natural_unemployment') if name in request.args
+        }
+        logger.info("Fetching Taylor rule history")
+
+        frame = taylor_rule.history(start, end, **assumptions)
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'inflation_measure': taylor_rule.inflation_measure,
+            'assumptions': {**taylor_rule.assumptions, **assumptions},
+            'data': {
+                'dates': frame.index,
+                **{col: frame[col].round(4).to_numpy()
+                   for col in ('fed_funds', 'implied_rate', 'policy_gap', 'implied_cpi',
+                               'implied_core_pce', 'unemployment_gap')}
+            }
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error fetching Taylor rule history: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _rounded(values, digits: int = 4):
+    """Nested lists of rounded floats with None for NaN, from an array or scalar"""
+    if isinstance(values, (list, tuple)) or getattr(values, 'ndim', 0) > 0:
+        return [_rounded(v, digits) for v in values]
+    return None if values is None or math.isnan(values) else round(float(values), digits)
+
+
+def _int_arg(name: str):
+    """Integer query parameter, or None if it isn't given"""
+    if name not in request.args:
+        return None
+    try:
+        return int(request.args[name])
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+
+
+@api.route('/api/correlations', methods=['GET'])
+def get_correlations():
+    """
+    Get pairwise correlation, rolling correlation, lead-lag and Granger matrices
+    Query params: series (comma-separated names, default all), start, end (YYYY-MM-DD),
+    window (months), max_lag (months), lags (Granger lags)
+    """
+    try:
+        names = [n for n in request.args.get('series', '').split(',') if n]
+        result = correlations.summary(
+            names, request.args.get('start'), request.args.get('end'),
+            _int_arg('window'), _int_arg('max_lag'), _int_arg('lags')
+        )
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'series': result['series'],
+            'transforms': result['transforms'],
+            'start': result['start'],
+            'end': result['end'],
+            'observations': result['observations'],
+            'correlation': _rounded(result['correlation']),
+            'rolling': {
+                'window': result['rolling']['window'],
+                'correlation': _rounded(result['rolling']['correlation'])
+            },
+            'lead_lag': {
+                'max_lag': result['lead_lag']['max_lag'],
+                'lag': result['lead_lag']['lag'],
+                'correlation': _rounded(result['lead_lag']['correlation'])
+            },
+            'granger': {
+                'lags': result['granger']['lags'],
+                'f_stat': _rounded(result['granger']['f_stat'], 3),
+                'p_value': _rounded(result['granger']['p_value'], 5)
+            }
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error computing correlations: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/correlations/<first>/<second>', methods=['GET'])
+def get_pair_correlation(first: str, second: str):
+    """
+    Get rolling correlations, the cross-correlation curve and Granger tests for two series
+    Query params: start, end (YYYY-MM-DD), windows (comma-separated months), max_lag, lags
+    """
+    try:
+        try:
+            windows = [int(w) for w in request.args.get('windows', '').split(',') if w]
+        except ValueError:
+            raise ValueError("'windows' must be comma-separated integers")
+        result = correlations.pair(
+            first, second, request.args.get('start'), request.args.get('end'),
+            windows, _int_arg('max_lag'), _int_arg('lags')
+        )
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
+            'series': result['series'],
+            'transforms': result['transforms'],
+            'correlation': _rounded(result['correlation']),
+            'rolling': {
+                'dates': result['dates'],
+                **{window: _rounded(values) for window, values in result['rolling'].items()}
+            },
+            'lead_lag': {
+                'lags': result['lead_lag']['lags'],
+                'correlation': _rounded(result['lead_lag']['correlation'])
+            },
+            'granger': {
+                direction: test if direction == 'lags' else
+                {'f_stat': _rounded(test['f_stat'], 3), 'p_value': _rounded(test['p_value'], 5)}
+                for direction, test in result['granger'].items()
+            }
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except CircuitOpenError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error computing pair correlation: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    """
+    Get detected transitions (stance flips, inversions, inflation status, rate moves)
+    Query params: since (YYYY-MM-DD), kind (comma-separated), limit (default 100)
+    """
+    try:
+        since = request.args.get('since')
+        kinds = [k for k in request.args.get('kind', '').split(',') if k]
+        limit = int(request.args.get('limit', 100))
+
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'events': alert_pipeline.recent(since, kinds, limit),
+            'detectors': alert_pipeline.status()
+        }
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error fetching alerts: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/data-quality', methods=['GET'])
+def get_data_quality():
+    """
+    Get continuity, outlier and staleness checks for every ingested series
+    Query params: flagged (true to list only series with flags)
+    """
+    try:
+        names = {spec.series_id: spec.name for spec in fred_client.registry}
+        reports = fred_client.get_data_quality()
+        if request.args.get('flagged', '').lower() in ('1', 'true', 'yes'):
+            reports = {sid: report for sid, report in reports.items() if report['flags']}
+
+        response = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'series': {sid: {'name': names.get(sid), **report} for sid, report in reports.items()},
+            'flagged': sorted(sid for sid, report in reports.items() if report['flags'])
+        }
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"Error fetching data quality: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def store_unavailable(error: str):
+    return jsonify({
+        'success': False,
+        'error': error
+    }), 503
+
+
+@api.route('/api/query', methods=['GET'])
+def get_query_schema():
+    """Get the tables, per-series views and stored series available to queries"""
+    store = current_app.extensions[EXTENSION_KEY]['series_store']
+    if store is None:
+        return store_unavailable('Series store is disabled (QUERY_DB_FILE)')
+    try:
+        return jsonify({'success': True, **store.tables()})
+    except FileNotFoundError as e:
+        return store_unavailable(str(e))
+    except Exception as e:
+        logger.error(f"Error reading series store schema: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/query', methods=['POST'])
+def run_query():
+    """
+    Run a read-only SQL query over the stored observations
+    Body: {"sql": "SELECT ...", "params": [...], "max_rows": 1000}
+    """
+    store = current_app.extensions[EXTENSION_KEY]['series_store']
+    if store is None:
+        return store_unavailable('Series store is disabled (QUERY_DB_FILE)')
+    try:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        sql = body.get('sql')
+        params = body.get('params', [])
+        max_rows = body.get('max_rows', config.QUERY_MAX_ROWS)
+        if not isinstance(sql, str) or not sql.strip():
+            raise ValueError("'sql' must be a non-empty string")
+        if not isinstance(params, list):
+            raise ValueError("'params' must be a list")
+        if isinstance(max_rows, bool) or not isinstance(max_rows, int) or max_rows < 1:
+            raise ValueError("'max_rows' must be a positive integer")
+
+        result = store.query(sql, params, max_rows=min(max_rows, config.QUERY_MAX_ROWS))
+        logger.info(f"Ran query returning {result['row_count']} rows in {result['elapsed_ms']}ms")
+        return jsonify({'success': True, **result})
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except FileNotFoundError as e:
+        return store_unavailable(str(e))
+    except Exception as e:
+        logger.error(f"Error running query: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def dashboard_analysis() -> dict:
+    """Current indicators and policy analysis shown on the dashboard"""
+    indicators = fred_client.get_indicators('dashboard', 'analyzer')
+    inflation_rate = analyzer._calculate_inflation_rate(indicators.get('cpi'))
+    stance = analyzer.analyze_policy_stance(indicators)
+    return {
+        'stance': stance,
+        'executive_summary': analyzer.generate_summary(indicators, stance),
+        'indicators': {
+            **indicators,
+            'inflation_rate': inflation_rate
+        },
+        'policy_stance': stance,
+        'yield_curve': analyzer.analyze_yield_curve(indicators),
+        'inflation_pressure': analyzer.analyze_inflation_pressure(indicators),
+        'rate_trajectory': analyzer.get_rate_trajectory()
+    }
+
+
+@api.route('/api/dashboard', methods=['GET'])
 def get_dashboard_data():
     """Get all data needed for dashboard in one call"""
     try:
         logger.info("Fetching complete dashboard data")
 
         # Get all components
-        indicators = fred_client.get_all_indicators()
-        inflation_rate = analyzer._calculate_inflation_rate(indicators.get('cpi'))
+        analysis = dashboard_analysis()
+        indicators, stance = analysis['indicators'], analysis['stance']
 
-        stance = analyzer.analyze_policy_stance(indicators)
-        yield_curve = analyzer.analyze_yield_curve(indicators)
-        inflation_pressure = analyzer.analyze_inflation_pressure(indicators)
-        rate_trajectory = analyzer.get_rate_trajectory()
-        summary = analyzer.generate_summary(indicators)
-
-        recommendation = advisor.get_recommendation(indicators)
-        scenarios = advisor.get_scenario_analysis(indicators)
-        asset_outlook = advisor.get_asset_class_outlook(indicators)
-
-        # Get recent historical data for charts
-        fed_funds_history = fred_client.get_historical_data('fed_funds_rate', '2Y')
-        treasury_10y_history = fred_client.get_historical_data('treasury_10y', '2Y')
-        treasury_2y_history = fred_client.get_historical_data('treasury_2y', '2Y')
+        recommendation = advisor.get_recommendation(indicators, stance)
+        scenarios = advisor.get_scenario_analysis(indicators, stance)
+        asset_outlook = advisor.get_asset_class_outlook(indicators, stance)
 
         response = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
             'last_update': datetime.now().strftime('%B %d, %Y at %I:%M %p'),
 
             # Summary
-            'executive_summary': summary,
+            'executive_summary': analysis['executive_summary'],
 
             # Current indicators
-            'indicators': {
-                **indicators,
-                'inflation_rate': inflation_rate
-            },
+            'indicators': indicators,
 
             # Analysis
             'policy_stance': stance,
-            'yield_curve': yield_curve,
-            'inflation_pressure': inflation_pressure,
-            'rate_trajectory': rate_trajectory,
+            'yield_curve': analysis['yield_curve'],
+            'inflation_pressure': analysis['inflation_pressure'],
+            'rate_trajectory': analysis['rate_trajectory'],
 
             # Recommendations
             'recommendation': recommendation,
@@ -212,9 +1085,8 @@ def get_dashboard_data():
 
             # Historical data for charts
             'historical_data': {
-                'fed_funds_rate': fed_funds_history,
-                'treasury_10y': treasury_10y_history,
-                'treasury_2y': treasury_2y_history
+                name: chart_history(name, config.DASHBOARD_CHART_PERIOD)
+                for name in config.DASHBOARD_CHART_SERIES
             }
         }
 
@@ -229,7 +1101,112 @@ def get_dashboard_data():
         }), 500
 
 
-@app.route('/api/export/report', methods=['GET'])
+@api.route('/api/dashboard/static', methods=['GET'])
+def get_dashboard_static():
+    """
+    Get the strategy, outlook and scenario content for every regime
+    Query params: v (content version; when it matches, the response may be cached indefinitely)
+    """
+    content = advisor.content
+    if request.args.get('v') == content.version:
+        cache_control = f'public, max-age={config.DASHBOARD_STATIC_MAX_AGE}, immutable'
+    else:
+        cache_control = 'no-cache'
+    return conditional(content.version, cache_control, lambda: jsonify({
+        'success': True,
+        'static_version': content.version,
+        'regimes': content.export()
+    }))
+
+
+@api.route('/api/dashboard/current', methods=['GET'])
+def get_dashboard_current():
+    """
+    Get current indicators, analysis and the regime whose content applies
+    Revalidated by ETag, so unchanged data costs a 304 with no body
+    """
+    try:
+        # Analyze first: it may fetch or fall back to stale data, which the
+        # version and ETag must describe
+        analysis = dashboard_analysis()
+        stance = analysis.pop('stance')
+        recommendation = advisor.get_recommendation(analysis['indicators'], stance)
+        stale_as_of = fred_client.stale_as_of()
+        data_version = fred_client.data_version()
+        static_version = advisor.content.version
+        etag = f'{data_version}-{static_version}-{stale_as_of or "fresh"}'
+
+        def build():
+            return jsonify({
+                'success': True,
+                'timestamp': datetime.now().isoformat(),
+                'stale_as_of': stale_as_of,
+                'last_update': datetime.now().strftime('%B %d, %Y at %I:%M %p'),
+                'data_version': data_version,
+                'static_version': static_version,
+                'regime': advisor.content.resolve(stance.stance),
+                'allocation': recommendation.allocation,
+                'allocation_method': recommendation.allocation_method,
+                **analysis
+            })
+
+        return conditional(etag, 'no-cache', build)
+    except Exception as e:
+        logger.error(f"Error fetching current dashboard data: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/dashboard/history', methods=['GET'])
+def get_dashboard_history():
+    """
+    Get chart histories, or only their recent part for a client that has the rest
+    Query params: since (YYYY-MM-DD, the last date the client has); observations from
+    config.DASHBOARD_REVISION_DAYS before it are resent to pick up revisions
+    """
+    try:
+        since = request.args.get('since')
+        resend_from = None
+        if since:
+            resend_from = (datetime.strptime(since, '%Y-%m-%d')
+                           - timedelta(days=config.DASHBOARD_REVISION_DAYS)).strftime('%Y-%m-%d')
+        histories = {name: chart_history(name, config.DASHBOARD_CHART_PERIOD)
+                     for name in config.DASHBOARD_CHART_SERIES}
+        starts = [h['dates'][0] for h in histories.values() if len(h['dates'])]
+        window_start = min(starts).strftime('%Y-%m-%d') if starts else None
+        data_version = fred_client.data_version()
+
+        def build():
+            series = {}
+            for name, history in histories.items():
+                i = history['dates'].searchsorted(resend_from) if resend_from else 0
+                series[name] = {**history, 'dates': history['dates'][i:],
+                                'values': history['values'][i:]}
+            return jsonify({
+                'success': True,
+                'data_version': data_version,
+                'start': window_start,
+                'from': resend_from,
+                'series': series
+            })
+
+        return conditional(f'{data_version}-{window_start}', 'no-cache', build)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error fetching dashboard history: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/export/report', methods=['GET'])
 def export_report():
     """Generate exportable report data"""
     try:
@@ -237,19 +1214,20 @@ def export_report():
         indicators = fred_client.get_all_indicators()
 
         stance = analyzer.analyze_policy_stance(indicators)
-        recommendation = advisor.get_recommendation(indicators)
-        asset_outlook = advisor.get_asset_class_outlook(indicators)
-        summary = analyzer.generate_summary(indicators)
+        recommendation = advisor.get_recommendation(indicators, stance)
+        asset_outlook = advisor.get_asset_class_outlook(indicators, stance)
+        summary = analyzer.generate_summary(indicators, stance)
 
         report = {
             'generated_at': datetime.now().isoformat(),
+            'stale_as_of': fred_client.stale_as_of(),
             'report_date': datetime.now().strftime('%B %d, %Y'),
             'title': 'Federal Reserve Policy Analysis & Portfolio Strategy',
             'summary': summary,
-            'policy_stance': stance['stance'],
-            'recommendation': recommendation['strategy_name'],
-            'key_actions': recommendation['key_actions'],
-            'allocation': recommendation['allocation'],
+            'policy_stance': stance.stance,
+            'recommendation': recommendation.strategy_name,
+            'key_actions': recommendation.key_actions,
+            'allocation': recommendation.allocation,
             'asset_outlook': asset_outlook,
             'indicators': indicators
         }
@@ -266,7 +1244,84 @@ def export_report():
         }), 500
 
 
-@app.errorhandler(404)
+def profiling_forbidden():
+    """403 unless the request carries the profiling token"""
+    from profiling import token_valid
+    if token_valid(request.headers.get(config.PROFILE_HEADER)):
+        return None
+    return jsonify({
+        'success': False,
+        'error': f"Profiling requires a valid {config.PROFILE_HEADER} header"
+    }), 403
+
+
+@api.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """List stored request profiles and the sampling profiler status"""
+    forbidden = profiling_forbidden()
+    if forbidden:
+        return forbidden
+    profiles = current_app.extensions[EXTENSION_KEY]['profiles']
+    sampler = current_app.extensions[EXTENSION_KEY]['sampler']
+    return jsonify({
+        'success': True,
+        'profiles': profiles.list() if profiles else [],
+        'sampling': sampler.status() if sampler else None
+    })
+
+
+@api.route('/api/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id: int):
+    """
+    Get a request profile
+    Query params: format (text or pstats), sort (default cumulative), limit (default 40)
+    """
+    forbidden = profiling_forbidden()
+    if forbidden:
+        return forbidden
+    profiles = current_app.extensions[EXTENSION_KEY]['profiles']
+    try:
+        if request.args.get('format') == 'pstats':
+            response = Response(profiles.raw(profile_id), mimetype='application/octet-stream')
+            response.headers['Content-Disposition'] = f'attachment; filename=request-{profile_id}.prof'
+            return response
+        report = profiles.report(profile_id, request.args.get('sort', 'cumulative'),
+                                 int(request.args.get('limit', 40)))
+        return Response(report, mimetype='text/plain')
+    except KeyError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e.args[0])
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+
+@api.route('/api/profiles/sampling', methods=['GET'])
+def get_sampled_stacks():
+    """
+    Get stacks aggregated by the sampling profiler, in collapsed (flame graph) format
+    Query params: reset (true to start a new aggregation after reading)
+    """
+    forbidden = profiling_forbidden()
+    if forbidden:
+        return forbidden
+    sampler = current_app.extensions[EXTENSION_KEY]['sampler']
+    if sampler is None:
+        return jsonify({
+            'success': False,
+            'error': "Sampling profiler is off (set PROFILER_SAMPLE_INTERVAL)"
+        }), 404
+    stacks = sampler.collapsed()
+    if request.args.get('reset', '').lower() in ('1', 'true', 'yes'):
+        sampler.reset()
+    return Response(stacks, mimetype='text/plain')
+
+
+@api.app_errorhandler(404)
 def not_found(e):
     """Handle 404 errors"""
     return jsonify({
@@ -275,7 +1330,7 @@ def not_found(e):
     }), 404
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def server_error(e):
     """Handle 500 errors"""
     return jsonify({
@@ -291,14 +1346,35 @@ if __name__ == '__main__':
     print("\nStarting server...")
     print("\nAPI Endpoints:")
     print("  GET  /                              - Health check")
+    print("  GET  /api/metrics                   - Cache and fetch queue metrics")
     print("  GET  /api/indicators                - Current indicators")
     print("  GET  /api/policy-stance             - Policy analysis")
     print("  GET  /api/portfolio-recommendation  - Strategy recommendation")
+    print("  POST /api/portfolio-recommendation/batch - Per-profile allocations (NDJSON)")
     print("  GET  /api/historical/<series>       - Historical data")
+    print("  GET  /api/analytics                 - Rolling analytics snapshot")
+    print("  GET  /api/analytics/<series>        - Rolling analytics history")
+    print("  GET  /api/term-structure            - Treasury curve fit")
+    print("  GET  /api/term-structure/history    - Curve factors and inversions")
+    print("  GET  /api/recession-probability     - Recession model probability")
+    print("  GET  /api/recession-probability/history - Monthly probability history")
+    print("  GET  /api/taylor-rule                - Taylor-rule rate and policy gap")
+    print("  GET  /api/taylor-rule/history        - Monthly policy gap history")
+    print("  GET  /api/correlations               - Cross-series correlation matrices")
+    print("  GET  /api/correlations/<a>/<b>       - Lead-lag and Granger for a pair")
+    print("  GET  /api/alerts                     - Detected indicator transitions")
+    print("  GET  /api/data-quality               - Per-series data quality checks")
+    print("  GET  /api/query                      - Tables and views for SQL queries")
+    print("  POST /api/query                      - Read-only SQL over stored observations")
+    print("  POST /api/what-if                    - Stance across hypothetical indicators")
     print("  GET  /api/dashboard                 - Complete dashboard data")
+    print("  GET  /api/dashboard/static          - Strategy content (versioned)")
+    print("  GET  /api/dashboard/current         - Current analysis (ETag)")
+    print("  GET  /api/dashboard/history         - Chart history deltas")
     print("  GET  /api/export/report             - Export report")
+    print("  GET  /api/profiles                  - Request profiles (X-Profile-Token)")
     print("\nServer running on http://localhost:5001")
     print("=" * 60)
     print()
 
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    create_app().run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,377 @@
+"""
+Batch Reports - Generates policy reports for many as-of dates from one loaded data panel
+
+    python batch_reports.py --start 2005-01-01 --end 2024-12-01 --output reports.csv
+    python batch_reports.py --freq W-FRI --format jsonl --output reports.jsonl --workers 4
+
+Every series is fetched once; reports for each date use the last observation on
+or before it (latest data vintage, so values may include later revisions). Dates
+are split into chunks that a process pool turns into reports. Chunks are built only
+as the pool has room for them, and each is written as soon as it is ready, so memory
+stays flat however many dates are asked for.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+
+from lazy_import import lazy_import
+from analyzer import (
+    classify_inflation, classify_stance, classify_yield_curve, stance_signals, summarize
+)
+from strategy_table import StrategyTable
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ['csv', 'jsonl', 'json', 'parquet']
+
+# Derived inputs the analysis needs besides the raw indicator values
+DERIVED_COLUMNS = ['inflation', 'rate_momentum', 'policy_gap']
+# Chunks submitted to the process pool per worker before waiting on the oldest
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+class ReportPanel:
+    """Observations for every report input, looked up as of any set of dates"""
+
+    def __init__(self, series: Dict[str, pd.Series]):
+        """
+        Initialize from raw series
+
+        Args:
+            series: Input name -> observations (indicator names plus DERIVED_COLUMNS)
+        """
+        self.series = {name: data.dropna().sort_index() for name, data in series.items()}
+
+    @classmethod
+    def load(cls, fred_client, analytics, taylor_rule=None) -> 'ReportPanel':
+        """
+        Fetch every indicator once and derive inflation, momentum and policy gap
+
+        Args:
+            fred_client: FREDClient to load indicators from
+            analytics: AnalyticsEngine for YoY inflation and rate momentum
+            taylor_rule: Optional TaylorRule for the policy gap
+        """
+        registry = fred_client.registry
+        series = {name: fred_client.get_series(registry.series_id(name))
+                  for name in registry.names('indicators')}
+        series['inflation'] = analytics.get('cpi').to_frame()['yoy']
+        series['rate_momentum'] = analytics.get('fed_funds_rate').to_frame()['momentum_6m']
+        if taylor_rule is not None:
+            series['policy_gap'] = taylor_rule.history()['policy_gap']
+        return cls(series)
+
+    @property
+    def indicators(self) -> List[str]:
+        return [name for name in self.series if name not in DERIVED_COLUMNS]
+
+    def at(self, dates: pd.DatetimeIndex) -> pd.DataFrame:
+        """Latest value of each input on or before each date (NaN before the first observation)"""
+        frame = pd.DataFrame(
+            {name: data.reindex(dates, method='ffill') for name, data in self.series.items()},
+            index=dates
+        )
+        return frame.reindex(columns=[*self.indicators, *DERIVED_COLUMNS])
+
+
+def build_reports(inputs: pd.DataFrame, indicators: List[str],
+                  content: StrategyTable) -> List[Dict]:
+    """
+    Build reports for a block of dates, classifying all of them in one vectorized pass
+
+    Args:
+        inputs: ReportPanel.at() output for the dates
+        indicators: Indicator columns to include in each report
+        content: Strategy content for recommendations and outlooks
+
+    Returns:
+        Report dictionaries (the /api/export/report fields plus the signals behind them)
+    """
+    def column(name):
+        return inputs[name].values if name in inputs else np.full(len(inputs), np.nan)
+
+    hawkish, dovish = stance_signals(column('rate_momentum'), column('inflation'),
+                                     column('unemployment'), column('yield_curve'),
+                                     column('policy_gap'))
+    stances = classify_stance(hawkish, dovish)
+    curve_status, recession_risk = classify_yield_curve(column('yield_curve'))
+    inflation_status = classify_inflation(column('inflation'))
+
+    def value(x):
+        return None if x != x else float(x)  # NaN -> None
+
+    fed_funds_rate, inflation_rate = column('fed_funds_rate'), column('inflation')
+    momentum, policy_gap = column('rate_momentum'), column('policy_gap')
+    values = inputs.to_numpy(dtype=float)
+    positions = {name: i for i, name in enumerate(inputs.columns)}
+    reports = []
+    for i, as_of in enumerate(inputs.index):
+        row = values[i]
+        stance = str(stances[i])
+        recommendation = content.recommendation(stance)
+        fed_funds, inflation = value(fed_funds_rate[i]), value(inflation_rate[i])
+        reports.append({
+            'as_of': as_of.strftime('%Y-%m-%d'),
+            'summary': summarize(stance, fed_funds, inflation),
+            'policy_stance': stance,
+            'confidence': int(abs(hawkish[i] - dovish[i]) * 10),
+            'hawkish_signals': int(hawkish[i]),
+            'dovish_signals': int(dovish[i]),
+            'rate_momentum': value(momentum[i]),
+            'inflation': inflation,
+            'policy_gap': value(policy_gap[i]),
+            'yield_curve_status': str(curve_status[i]),
+            'recession_risk': str(recession_risk[i]),
+            'inflation_pressure': str(inflation_status[i]),
+            'recommendation': recommendation.strategy_name,
+            'risk_level': recommendation.risk_level,
+            'key_actions': list(recommendation.key_actions),
+            'allocation': dict(recommendation.allocation),
+            'asset_outlook': content.asset_class_outlook(stance),
+            'indicators': {name: value(row[positions[name]]) for name in indicators}
+        })
+    return reports
+
+
+# Strategy content loaded once per worker process
+_worker_content = None
+
+
+def _init_worker(content_path: str):
+    global _worker_content
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_content = StrategyTable.load(content_path)
+
+
+def _build_chunk(args) -> List[Dict]:
+    inputs, indicators = args
+    return build_reports(inputs, indicators, _worker_content)
+
+
+def flatten(report: Dict) -> Dict:
+    """One-level row for tabular formats: allocation and indicators become columns"""
+    row = {k: v for k, v in report.items()
+           if k not in ('key_actions', 'allocation', 'asset_outlook', 'indicators')}
+    row['key_actions'] = '; '.join(report['key_actions'])
+    row.update({f'allocation.{asset}': pct for asset, pct in report['allocation'].items()})
+    row.update(report['indicators'])
+    return row
+
+
+class ReportWriter(ABC):
+    """Streams reports to a file, one chunk at a time"""
+
+    def __init__(self, path: str, columns: List[str]):
+        self.path = path
+        self.columns = columns
+
+    @abstractmethod
+    def write(self, reports: List[Dict]):
+        """Append a chunk of reports, in date order"""
+
+    def close(self):
+        """Finish the file (called once, after the last chunk)"""
+
+
+class CSVReportWriter(ReportWriter):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        self._writer.writeheader()
+
+    def write(self, reports):
+        self._writer.writerows(flatten(r) for r in reports)
+
+    def close(self):
+        self._file.close()
+
+
+class JSONLinesReportWriter(ReportWriter):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, reports):
+        self._file.writelines(json.dumps(r) + '\n' for r in reports)
+
+    def close(self):
+        self._file.close()
+
+
+class JSONArrayReportWriter(JSONLinesReportWriter):
+    """A single JSON array, written element by element"""
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file.write('[')
+        self._first = True
+
+    def write(self, reports):
+        for report in reports:
+            self._file.write(('\n' if self._first else ',\n') + json.dumps(report))
+            self._first = False
+
+    def close(self):
+        self._file.write('\n]\n')
+        super().close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """Parquet row groups per chunk (requires pyarrow)"""
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow (pip install pyarrow)")
+        self._pa = pyarrow
+        self._writer = None
+        self._path = path
+
+    def write(self, reports):
+        frame = pd.DataFrame([flatten(r) for r in reports], columns=self.columns)
+        if self._writer is None:
+            table = self._pa.Table.from_pandas(frame, preserve_index=False)
+            self._schema = table.schema
+            self._writer = self._pa.parquet.ParquetWriter(self._path, self._schema)
+        else:
+            table = self._pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {
+    'csv': CSVReportWriter,
+    'jsonl': JSONLinesReportWriter,
+    'json': JSONArrayReportWriter,
+    'parquet': ParquetReportWriter,
+}
+
+
+def report_columns(panel: ReportPanel, content: StrategyTable) -> List[str]:
+    """Tabular columns: report fields, every regime's allocation assets, then indicators"""
+    sample = build_reports(panel.at(pd.DatetimeIndex([pd.Timestamp.now()])),
+                           panel.indicators, content)[0]
+    assets = dict.fromkeys(asset for regime in content.regimes
+                           for asset in content.recommendation(regime).allocation)
+    fields = [k for k in flatten(sample) if not k.startswith('allocation.')
+              and k not in panel.indicators]
+    return [*fields, *(f'allocation.{asset}' for asset in assets), *panel.indicators]
+
+
+def _chunks(panel: ReportPanel, dates: pd.DatetimeIndex,
+            chunk_size: int) -> Iterator[Tuple[pd.DataFrame, List[str]]]:
+    """Units of work, built only as they are submitted"""
+    for i in range(0, len(dates), chunk_size):
+        yield panel.at(dates[i:i + chunk_size]), panel.indicators
+
+
+def generate(panel: ReportPanel, dates: pd.DatetimeIndex, path: str, fmt: str = 'csv',
+             workers: int = None, chunk_size: int = 250, content_path: str = None) -> int:
+    """
+    Generate and write reports for every date
+
+    Args:
+        panel: Loaded inputs
+        dates: As-of dates
+        path: Output file
+        fmt: One of FORMATS
+        workers: Worker processes (default: CPU count; 1 builds reports in this process)
+        chunk_size: Dates per unit of work and per write
+        content_path: Strategy content file (default config.STRATEGY_CONTENT_FILE)
+
+    Returns:
+        Number of reports written
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt} (choose from {', '.join(FORMATS)})")
+    content_path = content_path or config.STRATEGY_CONTENT_FILE
+    content = StrategyTable.load(content_path)
+    workers = workers or os.cpu_count() or 1
+
+    chunks = _chunks(panel, dates, chunk_size)
+    writer = WRITERS[fmt](path, report_columns(panel, content))
+    written = 0
+    try:
+        if workers == 1 or len(dates) <= chunk_size:
+            for inputs, indicators in chunks:
+                reports = build_reports(inputs, indicators, content)
+                writer.write(reports)
+                written += len(reports)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(content_path,)) as pool:
+                # Keep a bounded window of chunks in flight and write them in order
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_build_chunk, chunk))
+                    if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                        reports = pending.popleft().result()
+                        writer.write(reports)
+                        written += len(reports)
+                while pending:
+                    reports = pending.popleft().result()
+                    writer.write(reports)
+                    written += len(reports)
+    finally:
+        writer.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate policy reports for a range of dates')
+    parser.add_argument('--start', default='2005-01-01', help='First as-of date')
+    parser.add_argument('--end', default=None, help='Last as-of date (default: today)')
+    parser.add_argument('--freq', default='MS', help='Date frequency (pandas alias, e.g. MS, W-FRI, B)')
+    parser.add_argument('--output', required=True, help='Output file')
+    parser.add_argument('--format', choices=FORMATS,
+                        help='Output format (default: from the output file extension)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=250, help='Dates per work unit')
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        parser.error(f"Can't infer format from {args.output}; pass --format")
+
+    from fred_client import FREDClient
+    from analytics import AnalyticsEngine
+    from taylor_rule import TaylorRule
+
+    started = time.perf_counter()
+    client = FREDClient()
+    engine = AnalyticsEngine(client)
+    panel = ReportPanel.load(client, engine, TaylorRule(client, engine))
+    loaded = time.perf_counter()
+
+    dates = pd.date_range(args.start, args.end or pd.Timestamp.now().normalize(), freq=args.freq)
+    try:
+        count = generate(panel, dates, args.output, fmt, args.workers, args.chunk_size)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - loaded
+    print(f"Loaded data in {loaded - started:.1f}s; wrote {count} reports to {args.output} "
+          f"in {elapsed:.1f}s ({count / elapsed * 60:,.0f} reports/minute)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Load Benchmark - Replays dashboard traffic profiles against the API and reports throughput and latency
+
+    python bench_load.py                               # fixture + app, 'mixed' profile, 20 users, 30s
+    python bench_load.py --profile dashboard --users 50 --duration 60
+    python bench_load.py --url http://localhost:5001   # against a server that is already running
+    python bench_load.py --output results/1.1.0.json   # save results for later comparison
+    python bench_load.py --compare results/1.0.0.json  # show changes against a saved run
+
+Without --url the offline FRED fixture and the app are started as child
+processes on free ports. Exits non-zero if the error rate or p95 latency is over budget.
+"""
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Version of the result document; bump when fields change meaning
+SCHEMA_VERSION = 1
+
+REQUEST_TIMEOUT = 30  # seconds
+READY_TIMEOUT = 60  # seconds to wait for a spawned server
+
+Request = namedtuple('Request', ['weight', 'label', 'method', 'path', 'body'])
+Sample = namedtuple('Sample', ['label', 'latency', 'status', 'size'])
+
+HISTORICAL_SERIES = ['fed_funds_rate', 'treasury_10y', 'treasury_2y', 'yield_curve',
+                     'cpi', 'unemployment']
+HISTORICAL_PERIODS = ['1Y', '2Y', '5Y', '10Y']
+
+
+def _historical(weight: float) -> List[Request]:
+    """Chart requests spread evenly over series and periods"""
+    share = weight / (len(HISTORICAL_SERIES) * len(HISTORICAL_PERIODS))
+    return [Request(share, 'historical', 'GET', f'/api/historical/{name}?period={period}', None)
+            for name in HISTORICAL_SERIES for period in HISTORICAL_PERIODS]
+
+
+# Traffic profiles: weighted requests a simulated user picks from
+PROFILES = {
+    # Users sitting on the dashboard and refreshing it
+    'dashboard': [Request(1, 'dashboard', 'GET', '/api/dashboard', None)],
+    # Users browsing charts
+    'historical': _historical(1),
+    # Typical day: dashboard loads, chart browsing, report exports and API clients
+    'mixed': [
+        Request(50, 'dashboard', 'GET', '/api/dashboard', None),
+        *_historical(30),
+        Request(10, 'export', 'GET', '/api/export/report', None),
+        Request(5, 'indicators', 'GET', '/api/indicators', None),
+        Request(5, 'policy_stance', 'GET', '/api/policy-stance', None),
+    ],
+    # Research users running heavier analyses
+    'analyst': [
+        Request(30, 'what_if', 'POST', '/api/what-if',
+                {'grid': {'inflation': {'start': 0, 'stop': 8, 'num': 100},
+                          'unemployment': {'start': 3, 'stop': 8, 'num': 50}}}),
+        Request(25, 'taylor_rule_history', 'GET', '/api/taylor-rule/history?start=2000-01-01', None),
+        Request(25, 'analytics_history', 'GET', '/api/analytics/yield_curve?start=2015-01-01', None),
+        Request(20, 'dashboard', 'GET', '/api/dashboard', None),
+    ],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _environment(fred_url: str) -> Dict[str, str]:
+    """Environment for the spawned app: fixture upstream, no persistence, no tenant quotas"""
+    env = dict(os.environ)
+    env.setdefault('FRED_API_KEY', 'load-benchmark')
+    env['FRED_API_BASE_URL'] = fred_url
+    env['SNAPSHOT_FILE'] = ''
+    env['ALERT_LOG_FILE'] = ''
+    env['QUERY_DB_FILE'] = ''
+    env['TENANT_RATE_LIMIT_PER_MINUTE'] = '0'
+    env['TENANT_QUOTAS_FILE'] = ''
+    return env
+
+
+def start_servers() -> tuple:
+    """
+    Start the FRED fixture and the app (threaded Flask server) as child processes
+
+    Returns:
+        Tuple of (app URL, list of processes to stop)
+    """
+    fixture_port, app_port = _free_port(), _free_port()
+    fixture = subprocess.Popen(
+        [sys.executable, 'fred_fixture.py', '--port', str(fixture_port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    app = subprocess.Popen(
+        [sys.executable, '-c',
+         f"import app; app.create_app().run(host='127.0.0.1', port={app_port}, threaded=True)"],
+        cwd=BACKEND_DIR, env=_environment(f'http://127.0.0.1:{fixture_port}/fred'),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{app_port}'
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{url}/', timeout=1).ok:
+                return url, [app, fixture]
+        except requests.RequestException:
+            pass
+        if app.poll() is not None:
+            break
+        time.sleep(0.2)
+    stop_servers([app, fixture])
+    raise RuntimeError("App did not start; run it directly to see the error")
+
+
+def stop_servers(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait(timeout=10)
+
+
+def warm_up(url: str, profile: List[Request]):
+    """Send each distinct request once so the run measures a warm cache"""
+    session = requests.Session()
+    for request in profile:
+        session.request(request.method, url + request.path, json=request.body,
+                        timeout=REQUEST_TIMEOUT)
+
+
+def cache_counters(url: str) -> Optional[Dict]:
+    """Cache and upstream counters from /api/metrics, or None if unavailable"""
+    try:
+        metrics = requests.get(f'{url}/api/metrics', timeout=REQUEST_TIMEOUT).json()['metrics']
+        return {**metrics['cache'], 'upstream_requests': metrics['scheduler']['completed']}
+    except (requests.RequestException, KeyError, ValueError):
+        return None
+
+
+def run_load(url: str, profile: List[Request], users: int, duration: float,
+             think: float = 0.0, seed: int = 0) -> List[Sample]:
+    """
+    Simulate users sending requests from a profile for a fixed time
+
+    Args:
+        url: Base URL of the app
+        profile: Weighted requests to pick from
+        users: Concurrent users, each with its own keep-alive session
+        duration: Seconds to run
+        think: Mean pause between a user's requests in seconds (exponential)
+        seed: Random seed, so runs replay the same request sequence
+
+    Returns:
+        Every request's label, latency (seconds), status (0 for connection errors) and size
+    """
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    weights = [request.weight for request in profile]
+    deadline = time.perf_counter() + duration
+
+    def user(index: int):
+        rng = random.Random(seed + index)
+        session = requests.Session()
+        recorded = []
+        while time.perf_counter() < deadline:
+            request = rng.choices(profile, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = session.request(request.method, url + request.path,
+                                           json=request.body, timeout=REQUEST_TIMEOUT)
+                status, size = response.status_code, len(response.content)
+            except requests.RequestException:
+                status, size = 0, 0
+            recorded.append(Sample(request.label, time.perf_counter() - started, status, size))
+            if think:
+                time.sleep(rng.expovariate(1 / think))
+        with lock:
+            samples.extend(recorded)
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict:
+    """
+    Throughput, error count and latency percentiles for a set of samples
+
+    Returns:
+        Dictionary with requests, errors (non-2xx or failed), throughput_rps,
+        mean_bytes and latency_ms (mean, p50, p95, p99, max)
+    """
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    errors = sum(1 for sample in samples if not 200 <= sample.status < 300)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_bytes': round(sum(sample.size for sample in samples) / len(samples)) if samples else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            **{f'p{q}': None if not latencies else round(percentile(latencies, q), 2)
+               for q in (50, 95, 99)},
+            'max': round(latencies[-1], 2) if latencies else None,
+        }
+    }
+
+
+def cache_summary(before: Optional[Dict], after: Optional[Dict]) -> Optional[Dict]:
+    """Cache hit rate and upstream requests during the run, from /api/metrics counters"""
+    if before is None or after is None:
+        return None
+    delta = {name: after[name] - before[name]
+             for name in ('cache_hits', 'cache_misses', 'stale_served', 'upstream_requests')}
+    lookups = delta['cache_hits'] + delta['cache_misses']
+    return {**delta, 'hit_rate': round(delta['cache_hits'] / lookups, 4) if lookups else None}
+
+
+def _revision() -> Optional[str]:
+    """Git revision of the code under test, if available"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(url: str = None, profile: str = 'mixed', users: int = 20, duration: float = 30,
+        think: float = 0.0, seed: int = 0, warmup: bool = True) -> Dict:
+    """
+    Run a load test and build the result document
+
+    Args:
+        url: App to test (default: spawn the fixture and the app)
+        profile: Name of a traffic profile in PROFILES
+        users: Concurrent users
+        duration: Seconds of load
+        think: Mean think time between a user's requests in seconds
+        seed: Random seed for the request sequence
+        warmup: Send each request once before measuring
+
+    Returns:
+        Result document (schema_version, started_at, revision, config, results)
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile: {profile} (choose from {', '.join(PROFILES)})")
+    traffic = PROFILES[profile]
+    processes = []
+    if url is None:
+        url, processes = start_servers()
+    try:
+        if warmup:
+            warm_up(url, traffic)
+        before = cache_counters(url)
+        started_at = datetime.now().isoformat()
+        started = time.perf_counter()
+        samples = run_load(url, traffic, users, duration, think, seed)
+        elapsed = time.perf_counter() - started
+        after = cache_counters(url)
+    finally:
+        stop_servers(processes)
+
+    by_label = {}
+    for sample in samples:
+        by_label.setdefault(sample.label, []).append(sample)
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'started_at': started_at,
+        'revision': _revision(),
+        'config': {
+            'profile': profile, 'users': users, 'duration_s': duration, 'think_s': think,
+            'seed': seed, 'warmup': warmup, 'target': 'fixture' if processes else url,
+        },
+        'results': {
+            'elapsed_s': round(elapsed, 2),
+            **summarize(samples, elapsed),
+            'endpoints': {label: summarize(group, elapsed) for label, group in sorted(by_label.items())},
+            'cache': cache_summary(before, after),
+        }
+    }
+
+
+def _change(new: Optional[float], old: Optional[float]) -> str:
+    if new is None or not old:
+        return 'n/a'
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def print_report(document: Dict, baseline: Dict = None):
+    """Print a results table, with changes against a baseline document if given"""
+    results = document['results']
+    config = document['config']
+    print(f"Profile {config['profile']}: {config['users']} users for {results['elapsed_s']}s "
+          f"({document['revision'] or 'unknown revision'})\n")
+    print(f"{'Endpoint':22s} {'Requests':>9s} {'Errors':>7s} {'Req/s':>9s} "
+          f"{'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    print("-" * 80)
+    rows = [('all', results)] + list(results['endpoints'].items())
+    for label, row in rows:
+        latency = row['latency_ms']
+        print(f"{label:22s} {row['requests']:>9d} {row['errors']:>7d} {row['throughput_rps']:>9.1f} "
+              f"{latency['p50'] or 0:>9.1f} {latency['p95'] or 0:>9.1f} {latency['p99'] or 0:>9.1f}")
+        if baseline is not None:
+            old = (baseline['results'] if label == 'all'
+                   else baseline['results']['endpoints'].get(label))
+            if old is not None:
+                print(f"{'  vs baseline':22s} {'':>9s} {'':>7s} "
+                      f"{_change(row['throughput_rps'], old['throughput_rps']):>9s} "
+                      + ' '.join(f"{_change(latency[q], old['latency_ms'][q]):>9s}"
+                                 for q in ('p50', 'p95', 'p99')))
+
+    cache = results['cache']
+    if cache is not None:
+        hit_rate = 'n/a' if cache['hit_rate'] is None else f"{cache['hit_rate']:.1%}"
+        print(f"\nCache hit rate {hit_rate} ({cache['cache_hits']} hits, {cache['cache_misses']} misses, "
+              f"{cache['stale_served']} stale), {cache['upstream_requests']} upstream requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API with realistic traffic profiles')
+    parser.add_argument('--url', help='App to test (default: start the fixture and the app)')
+    parser.add_argument('--profile', default='mixed', choices=sorted(PROFILES))
+    parser.add_argument('--users', type=int, default=20, help='Concurrent users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load')
+    parser.add_argument('--think', type=float, default=0.0, help='Mean seconds between a user\'s requests')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the request sequence')
+    parser.add_argument('--no-warmup', action='store_true', help='Measure from a cold cache')
+    parser.add_argument('--output', help='Write the result document (JSON) to this file')
+    parser.add_argument('--compare', help='Earlier result document to compare against')
+    parser.add_argument('--json', action='store_true', help='Print the result document as JSON')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help='Fail if more than this fraction of requests error')
+    parser.add_argument('--p95-budget-ms', type=float, help='Fail if overall p95 latency exceeds this')
+    args = parser.parse_args()
+
+    document = run(args.url, args.profile, args.users, args.duration, args.think,
+                   args.seed, not args.no_warmup)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.json:
+        print(json.dumps(document, indent=2))
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        print_report(document, baseline)
+
+    results = document['results']
+    error_rate = results['errors'] / results['requests'] if results['requests'] else 1.0
+    p95 = results['latency_ms']['p95']
+    within_budget = (error_rate <= args.max_error_rate
+                     and (args.p95_budget_ms is None or (p95 is not None and p95 <= args.p95_budget_ms)))
+    sys.exit(0 if within_budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Startup Benchmark - Measures module import time against a budget using `python -X importtime`
+
+    python bench_startup.py            # table of median times vs budget
+    python bench_startup.py --json     # machine-readable output
+
+Exits non-zero if any measurement exceeds its budget.
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time budgets in milliseconds. pandas, numpy and requests are
+# loaded lazily, so none of these should include them. Flask itself accounts for
+# about 170ms of the app budget.
+IMPORT_BUDGETS_MS = {
+    'config': 30,
+    'fred_client': 60,
+    'analytics': 60,
+    'analyzer': 80,
+    'portfolio_advisor': 80,
+    'app': 250,
+}
+
+# Building the app constructs all components; data is still fetched lazily
+CREATE_APP_BUDGET_MS = 400
+
+CREATE_APP_SCRIPT = (
+    "import time; start = time.perf_counter(); "
+    "import app; app.create_app(); "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def _environment() -> Dict[str, str]:
+    """Environment for child interpreters: no persistence, placeholder API key"""
+    env = dict(os.environ)
+    env.setdefault('FRED_API_KEY', 'startup-benchmark')
+    env['SNAPSHOT_FILE'] = ''
+    env['ALERT_LOG_FILE'] = ''
+    env['QUERY_DB_FILE'] = ''
+    return env
+
+
+def import_time_ms(module: str) -> float:
+    """
+    Measure the cumulative import time of a module in a fresh interpreter
+
+    Returns:
+        Milliseconds reported by -X importtime for the top-level import
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, env=_environment(), capture_output=True, text=True, check=True
+    )
+    for line in reversed(result.stderr.splitlines()):
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.rstrip() == f' {module}':
+            return int(cumulative) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def create_app_ms() -> float:
+    """Measure importing the app and building it in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', CREATE_APP_SCRIPT],
+        cwd=BACKEND_DIR, env=_environment(), capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int = 5) -> List[Dict]:
+    """
+    Measure every budgeted target
+
+    Args:
+        repeat: Runs per target; the median is reported
+
+    Returns:
+        List of dictionaries with target, median_ms, budget_ms and within_budget
+    """
+    # Warm the bytecode cache so the first run isn't an outlier
+    import_time_ms('app')
+
+    targets = [(module, lambda m=module: import_time_ms(m), budget)
+               for module, budget in IMPORT_BUDGETS_MS.items()]
+    targets.append(('create_app()', create_app_ms, CREATE_APP_BUDGET_MS))
+
+    results = []
+    for name, measure, budget in targets:
+        median = statistics.median(measure() for _ in range(repeat))
+        results.append({
+            'target': name,
+            'median_ms': round(median, 1),
+            'budget_ms': budget,
+            'within_budget': median <= budget
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure backend import and startup time')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per target (median reported)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = run(args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Target':20s} {'Median':>10s} {'Budget':>10s}")
+        print("-" * 44)
+        for r in results:
+            status = "✓" if r['within_budget'] else "✗"
+            print(f"{r['target']:20s} {r['median_ms']:>8.1f}ms {r['budget_ms']:>8d}ms {status}")
+        print(f"\nMeasured in {time.perf_counter() - started:.1f}s")
+
+    sys.exit(0 if all(r['within_budget'] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Circuit Breaker - Fails fast when the upstream FRED API keeps erroring
+"""
+from typing import Callable, Dict
+import logging
+import threading
+import time
+
+import config
+from fetch_scheduler import is_transient
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Opens after repeated upstream failures and periodically lets one probe through"""
+
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None):
+        """
+        Initialize a closed breaker
+
+        Args:
+            failure_threshold: Consecutive failures before opening (default config.CIRCUIT_FAILURE_THRESHOLD)
+            reset_timeout: Seconds open before a probe is allowed (default config.CIRCUIT_RESET_TIMEOUT)
+        """
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or config.CIRCUIT_RESET_TIMEOUT
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allows_request(self) -> bool:
+        """Check whether a call would be attempted now (without reserving a probe)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self._opened_at >= self.reset_timeout
+            return not self._probing
+
+    def _before_call(self):
+        """Reserve the right to call upstream or raise CircuitOpenError"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("FRED API circuit is open")
+                self.state = HALF_OPEN
+                logger.info("Circuit half-open, probing FRED API")
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError("FRED API circuit is half-open, probe in progress")
+                self._probing = True
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call fn through the breaker, recording success or transient failure"""
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        return result
+
+    def _record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("FRED API recovered, circuit closed")
+            self.state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def _record_failure(self, error: Exception):
+        with self._lock:
+            self._probing = False
+            if not is_transient(error):
+                # Bad requests (e.g. unknown series) say nothing about upstream health
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+                    self._failures = 0
+                return
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"FRED API failing ({str(error)}), circuit opened")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def metrics(self) -> Dict:
+        """Get breaker state and failure count"""
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self._failures}
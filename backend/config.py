@@ -10,6 +10,16 @@ load_dotenv()
 # PUT YOUR FRED API KEY HERE (or set it in .env file as FRED_API_KEY=your_key)
 FRED_API_KEY = os.getenv('FRED_API_KEY', 'YOUR_API_KEY_HERE')
 
+# Optional pool of keys (comma-separated). Each key gets its own upstream rate
+# limit, so N keys allow N times the request rate. Defaults to FRED_API_KEY.
+FRED_API_KEYS = [key.strip() for key in os.getenv('FRED_API_KEYS', '').split(',')
+                 if key.strip()] or [FRED_API_KEY]
+
+# FRED REST API (override to point at a local stand-in, e.g. fred_fixture.py)
+FRED_API_BASE_URL = os.getenv('FRED_API_BASE_URL', 'https://api.stlouisfed.org/fred')
+FRED_HTTP_POOL_SIZE = int(os.getenv('FRED_HTTP_POOL_SIZE', 8))
+FRED_HTTP_TIMEOUT = 15  # seconds per upstream HTTP request
+
 # Key economic indicators from FRED
 FRED_SERIES = {
     'fed_funds_rate': 'FEDFUNDS',
@@ -21,12 +31,219 @@ FRED_SERIES = {
     'unemployment': 'UNRATE',
     'gdp': 'GDPC1',
     'm2_money_supply': 'M2SL',
+    # Treasury constant-maturity yields used for the full curve
+    'treasury_1m': 'DGS1MO',
+    'treasury_3m': 'DGS3MO',
+    'treasury_6m': 'DGS6MO',
+    'treasury_1y': 'DGS1',
+    'treasury_3y': 'DGS3',
+    'treasury_5y': 'DGS5',
+    'treasury_7y': 'DGS7',
+    'treasury_20y': 'DGS20',
+    'treasury_30y': 'DGS30',
+    'recession': 'USREC',
+}
+
+# Parts of the app that read each series. Endpoints only fetch the series
+# declared for their consumer, so unused indicators are never requested.
+SERIES_CONSUMERS = {
+    'fed_funds_rate': ['indicators', 'analyzer', 'dashboard', 'taylor_rule'],
+    'treasury_10y': ['indicators', 'dashboard', 'term_structure'],
+    'treasury_2y': ['indicators', 'dashboard', 'term_structure'],
+    'yield_curve': ['indicators', 'analyzer', 'dashboard'],
+    'cpi': ['indicators', 'analyzer', 'taylor_rule'],
+    'core_pce': ['indicators', 'taylor_rule'],
+    'unemployment': ['indicators', 'analyzer', 'dashboard', 'taylor_rule'],
+    'gdp': ['indicators'],
+    'm2_money_supply': ['indicators'],
+    'treasury_1m': ['term_structure'],
+    'treasury_3m': ['term_structure'],
+    'treasury_6m': ['term_structure'],
+    'treasury_1y': ['term_structure'],
+    'treasury_3y': ['term_structure'],
+    'treasury_5y': ['term_structure'],
+    'treasury_7y': ['term_structure'],
+    'treasury_20y': ['term_structure'],
+    'treasury_30y': ['term_structure'],
+    'recession': ['recession_model'],
 }
 
+# Optional JSON file with additional series for the registry, e.g.
+# [{"name": "housing_starts", "series_id": "HOUST", "consumers": ["research"]}]
+FRED_SERIES_FILE = os.getenv('FRED_SERIES_FILE')
+
 # Analysis thresholds
 INFLATION_TARGET = 2.0
 YIELD_CURVE_INVERSION_THRESHOLD = 0.0
 RATE_CHANGE_THRESHOLD = 0.25  # 25 basis points
 
+# Taylor rule: rate = r* + inflation + a * (inflation - target) + b * (u* - unemployment)
+# Defaults are Taylor (1993) with the output gap mapped to unemployment by Okun's law
+TAYLOR_NEUTRAL_RATE = float(os.getenv('TAYLOR_NEUTRAL_RATE', 2.0))  # real r*
+TAYLOR_NATURAL_UNEMPLOYMENT = float(os.getenv('TAYLOR_NATURAL_UNEMPLOYMENT', 4.2))  # u*
+TAYLOR_INFLATION_WEIGHT = 0.5
+TAYLOR_UNEMPLOYMENT_WEIGHT = 1.0
+TAYLOR_INFLATION_MEASURE = os.getenv('TAYLOR_INFLATION_MEASURE', 'core_pce')  # or 'cpi'
+TAYLOR_GAP_THRESHOLD = 1.0  # Fed funds this far above/below the rule counts as a stance signal
+
+# What-if analysis: largest grid of hypothetical indicator values evaluated per request
+WHAT_IF_MAX_POINTS = 250_000
+
+# Cross-series correlations, lead-lag and Granger tests on a monthly panel.
+# Series are differenced unless listed here ('level', 'diff' or 'log_diff').
+CORRELATION_TRANSFORMS = {
+    'cpi': 'log_diff',
+    'core_pce': 'log_diff',
+    'gdp': 'log_diff',
+    'm2_money_supply': 'log_diff',
+    'recession': 'level',
+}
+CORRELATION_WINDOW = 60  # months in the rolling window
+CORRELATION_MAX_LAG = 24  # months of lead/lag searched
+CORRELATION_GRANGER_LAGS = 6  # months of lags in the Granger models
+CORRELATION_MIN_PERIODS = 36  # overlapping months needed for a result
+CORRELATION_WINDOW_LIMIT = 240  # largest rolling window a request may ask for
+CORRELATION_MAX_LAG_LIMIT = 60  # largest lead/lag a request may search
+CORRELATION_GRANGER_LAGS_LIMIT = 24  # most Granger lags a request may ask for
+CORRELATION_WINDOWS_LIMIT = 5  # most rolling windows in one pair request
+
+# Rolling analytics settings
+ANALYTICS_MOMENTUM_MONTHS = [3, 6, 12]  # Lookbacks for rate momentum
+ANALYTICS_ZSCORE_YEARS = 5  # Window for yield curve z-scores
+
+# Term structure settings: maturity in years of each Treasury series on the curve
+TREASURY_CURVE = {
+    'treasury_1m': 1 / 12,
+    'treasury_3m': 0.25,
+    'treasury_6m': 0.5,
+    'treasury_1y': 1,
+    'treasury_2y': 2,
+    'treasury_3y': 3,
+    'treasury_5y': 5,
+    'treasury_7y': 7,
+    'treasury_10y': 10,
+    'treasury_20y': 20,
+    'treasury_30y': 30,
+}
+NELSON_SIEGEL_DECAY = 0.7308  # Diebold-Li lambda (0.0609 per month), per year of maturity
+TERM_STRUCTURE_MIN_MATURITIES = 4  # Observed maturities needed to fit a day's curve
+INVERSION_PERSISTENCE_DAYS = 90  # 10Y-3M inversion this long raises recession risk
+
+# Recession probability model (logit of USREC on lagged indicators)
+RECESSION_HORIZON_MONTHS = 12  # Predict recession within this many months
+RECESSION_PROBABILITY_HIGH = 0.4  # Probability thresholds for recession risk levels
+RECESSION_PROBABILITY_MODERATE = 0.2
+# Optional JSON file with coefficients fit offline (python recession_model.py --output ...);
+# without it the model is refit whenever its input data changes
+RECESSION_MODEL_FILE = os.getenv('RECESSION_MODEL_FILE')
+
+# Recommendation, outlook and scenario content keyed by stance
+STRATEGY_CONTENT_FILE = os.getenv(
+    'STRATEGY_CONTENT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'strategy_content.json')
+)
+
+# Allocation optimizer settings
+# CSV of monthly asset-class returns (date column, then one column per asset class
+# named as in the strategy allocations). Fixed allocations are used when unset.
+ASSET_RETURNS_FILE = os.getenv('ASSET_RETURNS_FILE')
+OPTIMIZER_METHOD = os.getenv('OPTIMIZER_METHOD', 'mean_variance')  # or 'risk_parity'
+OPTIMIZER_RISK_AVERSION = 4.0
+OPTIMIZER_MIN_WEIGHT = 0.05
+OPTIMIZER_MAX_WEIGHT = 0.40
+OPTIMIZER_SHRINKAGE = 0.2  # Covariance shrinkage toward the diagonal
+OPTIMIZER_MIN_OBSERVATIONS = 24  # Months of history required per regime
+
+# Upstream request scheduling (FRED allows 120 requests per minute per key).
+# Limits apply per key and per process (see README: divide across worker processes).
+FRED_RATE_LIMIT_PER_MINUTE = int(os.getenv('FRED_RATE_LIMIT_PER_MINUTE', 120))
+FRED_RATE_LIMIT_BURST = 10
+FRED_KEY_SELECTION = os.getenv('FRED_KEY_SELECTION', 'least_loaded')  # or 'round_robin'
+FETCH_WORKERS = 4
+FETCH_MAX_RETRIES = 3
+FETCH_BACKOFF_BASE = 0.5  # seconds; doubles per retry, with full jitter
+FETCH_BACKOFF_MAX = 8.0
+FETCH_TIMEOUT = 30  # seconds a request waits on a fetch with no cached copy
+FETCH_STALE_TIMEOUT = 2  # seconds to wait before serving an expired cached copy
+
+# Circuit breaker around upstream calls
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive transient failures before failing fast
+CIRCUIT_RESET_TIMEOUT = 30  # Seconds before a probe request is let through
+
+# Per-tenant quotas on our own API. A rate of 0 disables quotas. Tenants are
+# identified by an issued API key sent in TENANT_KEY_HEADER (TENANT_KEYS_FILE is a
+# JSON object of key -> tenant), else by TENANT_HEADER on requests from one of
+# TENANT_TRUSTED_PROXIES (comma-separated addresses of proxies that authenticate
+# clients), else by the client address. TENANT_QUOTAS_FILE is an optional JSON
+# object of per-tenant overrides, e.g. {"reporting": {"rate_per_minute": 30, "burst": 5}}.
+TENANT_KEY_HEADER = os.getenv('TENANT_KEY_HEADER', 'X-API-Key')
+TENANT_KEYS_FILE = os.getenv('TENANT_KEYS_FILE')
+TENANT_HEADER = os.getenv('TENANT_HEADER', 'X-Tenant-ID')
+TENANT_TRUSTED_PROXIES = [address.strip() for address in
+                          os.getenv('TENANT_TRUSTED_PROXIES', '').split(',') if address.strip()]
+TENANT_RATE_LIMIT_PER_MINUTE = int(os.getenv('TENANT_RATE_LIMIT_PER_MINUTE', 0))
+TENANT_RATE_LIMIT_BURST = int(os.getenv('TENANT_RATE_LIMIT_BURST', 20))
+TENANT_QUOTAS_FILE = os.getenv('TENANT_QUOTAS_FILE')
+TENANT_MAX_TRACKED = 10000  # least recently seen anonymous clients beyond this are forgotten
+
+# Data quality checks, run on each series as it is fetched or restored
+DATA_QUALITY_OUTLIER_Z = 12.0  # Robust z-score of a change that counts as an outlier
+DATA_QUALITY_RECENT_YEARS = 2  # Gaps and outliers this recent flag the series
+DATA_QUALITY_MAX_LISTED = 10  # Most recent gaps/outliers listed per series
+# Age of the latest observation, by frequency, before a series counts as stale
+# (allows for the usual publication lag, e.g. GDP arrives a month after the quarter)
+DATA_QUALITY_MAX_AGE_DAYS = {'D': 10, 'W': 21, 'M': 100, 'Q': 225, 'A': 730}
+
+# Profiling. Requests sending PROFILING_TOKEN in PROFILE_HEADER run under
+# cProfile; the profiles are listed at /api/profiles (same header required).
+# PROFILER_SAMPLE_INTERVAL > 0 also samples stacks continuously (e.g. 0.01 = 100 Hz).
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')  # unset disables request profiling
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_HISTORY = 50  # request profiles kept in memory
+PROFILE_DIR = os.getenv('PROFILE_DIR')  # optional: also save .prof and collapsed stack files here
+PROFILER_SAMPLE_INTERVAL = float(os.getenv('PROFILER_SAMPLE_INTERVAL', 0))
+PROFILER_MODULES = ['fred_client', 'analyzer', 'portfolio_advisor']  # code paths sampled
+
 # Cache settings (in seconds)
 CACHE_DURATION = 900  # 15 minutes
+
+# Cache snapshot, restored on startup so restarts and deploys don't begin cold.
+# Set SNAPSHOT_FILE to an empty string to disable.
+SNAPSHOT_FILE = os.getenv(
+    'SNAPSHOT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'fred_cache.snapshot')
+)
+SNAPSHOT_INTERVAL = 300  # seconds between periodic saves
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600  # older snapshots are ignored
+
+# Local SQLite copy of cached observations for read-only ad hoc queries (API and
+# series_store.py CLI). Set QUERY_DB_FILE to an empty string to disable.
+QUERY_DB_FILE = os.getenv(
+    'QUERY_DB_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'observations.db')
+)
+QUERY_DB_DEBOUNCE = 5  # seconds to let a burst of fetches settle before rebuilding
+QUERY_TIMEOUT = 2.0  # seconds an API query may run
+QUERY_MAX_ROWS = 10000  # rows returned per query; longer results are truncated
+
+# Alerts: transitions detected as new observations land, logged and sent to sinks
+ALERT_LOG_FILE = os.getenv(  # JSON lines event log ('' keeps events in memory only)
+    'ALERT_LOG_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'alerts.jsonl')
+)
+ALERT_FILE = os.getenv('ALERT_FILE')  # Optional file sink receiving dispatched alerts
+ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')  # Optional webhook sink (JSON POST)
+ALERT_WEBHOOK_TIMEOUT = 5  # seconds
+ALERT_DEBOUNCE = 2  # seconds to let a burst of fetches settle before evaluating
+ALERT_HISTORY_SIZE = 1000  # recent events kept in memory for the API
+
+# Split dashboard API (static content, current analysis, chart history deltas)
+DASHBOARD_CHART_SERIES = ['fed_funds_rate', 'treasury_10y', 'treasury_2y']
+DASHBOARD_CHART_PERIOD = '2Y'
+DASHBOARD_REVISION_DAYS = 90  # history deltas resend this much before the client's last date
+DASHBOARD_STATIC_MAX_AGE = 365 * 24 * 3600  # seconds, for strategy content requested by version
+
+# Response compression (brotli when installed and accepted, otherwise gzip)
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller responses are sent as-is
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
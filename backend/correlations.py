@@ -0,0 +1,475 @@
+"""
+Cross-Series Analytics - Rolling correlations, lead-lag cross-correlations and Granger tests across series pairs
+"""
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+import logging
+import math
+import threading
+
+from lazy_import import lazy_import
+from data_quality import infer_frequency
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+TRANSFORMS = ['level', 'diff', 'log_diff']
+
+# Results kept per data version before the oldest are dropped
+CACHE_SIZE = 32
+
+
+def transform_series(data: pd.Series, kind: str) -> pd.Series:
+    """
+    Monthly, roughly stationary version of a series
+
+    Daily and weekly series are averaged to months first. Changes of quarterly
+    and annual series are taken at their own frequency and carried forward to
+    the following months.
+
+    Args:
+        data: Observations at the series' native frequency
+        kind: 'level', 'diff' (change) or 'log_diff' (percent change, log approximation)
+
+    Returns:
+        Series indexed by month start
+    """
+    if kind not in TRANSFORMS:
+        raise ValueError(f"Unknown transform: {kind} (choose from {', '.join(TRANSFORMS)})")
+    data = data.dropna()
+    frequency = infer_frequency(data.index.values)
+    if frequency in ('D', 'W'):
+        data = data.resample('MS').mean()
+    if kind == 'diff':
+        data = data.diff()
+    elif kind == 'log_diff':
+        data = 100 * np.log(data.where(data > 0)).diff()
+    if frequency in ('Q', 'A'):
+        data = data.resample('MS').ffill(limit=2 if frequency == 'Q' else 11)
+    return data
+
+
+def pairwise_correlation(a: np.ndarray, b: np.ndarray, min_periods: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Correlation of every column of a with every column of b over rows where both are present
+
+    All pairs are computed with five matrix products instead of a loop over pairs.
+
+    Args:
+        a: (T, N) observations, NaN where missing
+        b: (T, M) observations aligned with a
+        min_periods: Fewest overlapping rows for a result (default config.CORRELATION_MIN_PERIODS)
+
+    Returns:
+        Tuple of ((N, M) correlations, NaN without enough overlap; (N, M) overlap counts)
+    """
+    min_periods = min_periods or config.CORRELATION_MIN_PERIODS
+    mask_a, mask_b = ~np.isnan(a), ~np.isnan(b)
+    a, b = np.where(mask_a, a, 0.0), np.where(mask_b, b, 0.0)
+    ma, mb = mask_a.astype(float), mask_b.astype(float)
+
+    n = ma.T @ mb
+    sum_a, sum_b = a.T @ mb, ma.T @ b
+    covariance = n * (a.T @ b) - sum_a * sum_b
+    variance = (n * ((a * a).T @ mb) - sum_a ** 2) * (n * (ma.T @ (b * b)) - sum_b ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = covariance / np.sqrt(variance)
+    correlation[(n < min_periods) | ~(variance > 0)] = np.nan
+    return np.clip(correlation, -1, 1), n
+
+
+def rolling_correlation(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """
+    Rolling correlation matrices for every date
+
+    Running sums of the pairwise cross products are built once; each window
+    is then a difference of two running sums, so the cost doesn't grow with
+    the window length.
+
+    Args:
+        values: (T, N) panel, NaN where missing
+        window: Rows per window
+        min_periods: Fewest overlapping rows in a window (default: window * 3 / 4)
+
+    Returns:
+        (T, N, N) correlations of the window ending at each row (NaN before enough data)
+    """
+    min_periods = min_periods or max(3, (3 * window) // 4)
+    mask = ~np.isnan(values)
+    x = np.where(mask, values, 0.0)
+    m = mask.astype(float)
+
+    def running(p, q):
+        totals = np.cumsum(p[:, :, None] * q[:, None, :], axis=0)
+        totals = np.concatenate([np.zeros((1,) + totals.shape[1:]), totals])
+        return totals[window:] - totals[:-window]
+
+    n = running(m, m)
+    sum_x, sum_y = running(x, m), running(m, x)
+    covariance = n * running(x, x) - sum_x * sum_y
+    variance = (n * running(x * x, m) - sum_x ** 2) * (n * running(m, x * x) - sum_y ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = covariance / np.sqrt(variance)
+    correlation[(n < min_periods) | ~(variance > 1e-12 * n ** 4)] = np.nan
+
+    result = np.full((len(values),) + correlation.shape[1:], np.nan)
+    result[window - 1:] = np.clip(correlation, -1, 1)
+    return result
+
+
+def cross_correlation(values: np.ndarray, max_lag: int, min_periods: int = None) -> np.ndarray:
+    """
+    Lead-lag correlations of every pair
+
+    Args:
+        values: (T, N) panel
+        max_lag: Largest lead or lag in rows
+        min_periods: Fewest overlapping rows (default config.CORRELATION_MIN_PERIODS)
+
+    Returns:
+        (2 * max_lag + 1, N, N) array; entry [max_lag + k, i, j] is the correlation
+        of series i with series j k rows later, so a peak at k > 0 means i leads j
+    """
+    lags = []
+    rows = len(values)
+    for k in range(-max_lag, max_lag + 1):
+        if k >= 0:
+            a, b = values[:rows - k], values[k:]
+        else:
+            a, b = values[-k:], values[:rows + k]
+        lags.append(pairwise_correlation(a, b, min_periods)[0])
+    return np.stack(lags)
+
+
+def _betacf(a: np.ndarray, b: np.ndarray, x: np.ndarray, max_iter: int = 300) -> np.ndarray:
+    """Continued fraction for the incomplete beta function (modified Lentz), vectorized"""
+    tiny = 1e-300
+
+    def guard(v):
+        return np.where(np.abs(v) < tiny, tiny, v)
+
+    c = np.ones_like(x)
+    d = 1 / guard(1 - (a + b) * x / (a + 1))
+    h = d.copy()
+    for m in range(1, max_iter + 1):
+        aa = m * (b - m) * x / ((a - 1 + 2 * m) * (a + 2 * m))
+        d = 1 / guard(1 + aa * d)
+        c = guard(1 + aa / c)
+        h *= d * c
+        aa = -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 1 + 2 * m))
+        d = 1 / guard(1 + aa * d)
+        c = guard(1 + aa / c)
+        delta = d * c
+        h *= delta
+        if np.all(np.abs(delta - 1) < 1e-12):
+            break
+    return h
+
+
+def f_survival(f: np.ndarray, df1, df2) -> np.ndarray:
+    """
+    P(F > f) for an F(df1, df2) distribution, without scipy
+
+    Uses the regularized incomplete beta: P(F > f) = I_x(df2 / 2, df1 / 2)
+    with x = df2 / (df2 + df1 * f).
+    """
+    f, df1, df2 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (f, df1, df2)))
+    df2 = np.where(df2 > 0, df2, np.nan)  # lgamma(0) raises
+    a, b = df2 / 2, df1 / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = df2 / (df2 + df1 * np.maximum(f, 0))
+        # Evaluate the continued fraction where it converges fast, using I_x(a, b) = 1 - I_1-x(b, a)
+        flip = x > (a + 1) / (a + b + 2)
+        a2, b2, x2 = np.where(flip, b, a), np.where(flip, a, b), np.where(flip, 1 - x, x)
+        lgamma = np.vectorize(math.lgamma, otypes=[float])
+        front = np.exp(lgamma(a2 + b2) - lgamma(a2) - lgamma(b2)
+                       + a2 * np.log(x2) + b2 * np.log1p(-x2)) / a2
+        result = front * _betacf(a2, b2, x2)
+        p = np.where(flip, 1 - result, result)
+    return np.where(np.isnan(f) | np.isnan(df2), np.nan, np.clip(p, 0, 1))
+
+
+def granger(values: np.ndarray, lags: int, min_periods: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Granger-style F tests of whether each series' past helps predict each other series
+
+    For target j and candidate i the restricted model regresses j on a
+    constant and its own lags; the unrestricted model adds lags of i. All
+    candidates for a target are solved together as one batch of normal
+    equations over the rows where that pair's data is complete.
+
+    Args:
+        values: (T, N) panel
+        lags: Lags of each series in the models
+        min_periods: Fewest complete rows for a test (default config.CORRELATION_MIN_PERIODS)
+
+    Returns:
+        Tuple of ((N, N) F statistics, (N, N) p-values); entry [i, j] tests
+        "i Granger-causes j", and the diagonal is NaN
+    """
+    min_periods = min_periods or config.CORRELATION_MIN_PERIODS
+    rows, count = values.shape
+    # lagged[t, l, s] = value of series s, l + 1 rows before row t + lags
+    lagged = np.stack([values[lags - l - 1:rows - l - 1] for l in range(lags)], axis=1)
+    target = values[lags:]
+    present = ~np.isnan(lagged).any(axis=1)  # (T', N): all lags of a series available
+    lagged = np.nan_to_num(lagged)
+
+    f_stat = np.full((count, count), np.nan)
+    dof = np.zeros((count, count))
+    k_restricted, k_full = lags + 1, 2 * lags + 1
+    for j in range(count):
+        y = target[:, j]
+        base = ~np.isnan(y) & present[:, j]
+        weights = (base[:, None] & present).T.astype(float)  # (N, T') rows usable per candidate
+        y = np.nan_to_num(y)
+        design = np.empty((count, len(y), k_full))
+        design[:, :, 0] = 1
+        design[:, :, 1:k_restricted] = lagged[:, :, j]
+        design[:, :, k_restricted:] = np.moveaxis(lagged, 2, 0)
+        weighted = design * weights[:, :, None]
+        xtx = weighted.transpose(0, 2, 1) @ design
+        xty = weighted.transpose(0, 2, 1) @ y
+        n = weights.sum(axis=1)
+        ridge = 1e-9 * np.eye(k_full)
+
+        full = np.linalg.solve(xtx + ridge, xty[..., None])[..., 0]
+        restricted = np.linalg.solve(xtx[:, :k_restricted, :k_restricted] + ridge[:k_restricted, :k_restricted],
+                                     xty[:, :k_restricted, None])[..., 0]
+        rss_full = (weights * (y - np.einsum('ntk,nk->nt', design, full)) ** 2).sum(axis=1)
+        rss_restricted = (weights * (y - np.einsum('ntk,nk->nt', design[:, :, :k_restricted],
+                                                   restricted)) ** 2).sum(axis=1)
+        dof[:, j] = n - k_full
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stat = ((rss_restricted - rss_full) / lags) / (rss_full / dof[:, j])
+        stat[(n < min_periods) | (dof[:, j] <= 0)] = np.nan
+        f_stat[:, j] = stat
+    np.fill_diagonal(f_stat, np.nan)
+    return f_stat, f_survival(f_stat, lags, dof)
+
+
+def check_options(windows: Sequence[int], max_lag: int, lags: int, length: int = None):
+    """
+    Validate analysis options against the config limits and the sample length
+
+    Checked before any arrays are built, so a request can't ask for more work
+    than the limits allow or for lags the sample can't support.
+
+    Args:
+        windows: Rolling windows in months
+        max_lag: Largest lead/lag in months
+        lags: Lags in the Granger models
+        length: Months in the sample (None checks only the limits)
+
+    Raises:
+        ValueError: With a message naming the offending option
+    """
+    def check(name, value, low, high):
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)):
+            raise ValueError(f"'{name}' must be an integer")
+        if not low <= value <= high:
+            raise ValueError(f"'{name}' must be between {low} and {high}")
+
+    if len(windows) > config.CORRELATION_WINDOWS_LIMIT:
+        raise ValueError(f"At most {config.CORRELATION_WINDOWS_LIMIT} windows can be requested")
+    for window in windows:
+        check('window', window, 3, config.CORRELATION_WINDOW_LIMIT)
+    check('max_lag', max_lag, 1, config.CORRELATION_MAX_LAG_LIMIT)
+    check('lags', lags, 1, config.CORRELATION_GRANGER_LAGS_LIMIT)
+    if length is None:
+        return
+
+    needed = config.CORRELATION_MIN_PERIODS
+    if length < needed:
+        raise ValueError(f"The sample has {length} months; at least {needed} are needed")
+    if length - max_lag < needed:
+        raise ValueError(f"'max_lag' must be at most {length - needed} for a "
+                         f"{length}-month sample (at least {needed} months must overlap)")
+    # The unrestricted Granger model uses 2 * lags + 1 coefficients on length - lags rows
+    if length - 3 * lags - 1 < needed:
+        raise ValueError(f"'lags' must be at most {(length - needed - 1) // 3} for a "
+                         f"{length}-month sample")
+
+
+class CrossSeriesAnalytics:
+    """Relationships between registered series, recomputed only when their data changes"""
+
+    def __init__(self, fred_client, transforms: Dict[str, str] = None):
+        """
+        Initialize the analytics
+
+        Args:
+            fred_client: FREDClient the series are loaded from
+            transforms: Series name -> transform overrides (default config.CORRELATION_TRANSFORMS;
+                series not listed are differenced)
+        """
+        self.fred_client = fred_client
+        self.transforms = {**config.CORRELATION_TRANSFORMS, **(transforms or {})}
+        self._version = None
+        self._panel = None
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def transform_for(self, name: str) -> str:
+        """Transform applied to a series"""
+        return self.transforms.get(name, 'diff')
+
+    def _check_names(self, names: Sequence[str]) -> List[str]:
+        registry = self.fred_client.registry
+        names = list(names) if names else registry.names()
+        unknown = [name for name in names if name not in registry]
+        if unknown:
+            raise ValueError(f"Unknown series: {', '.join(unknown)}")
+        if len(names) < 2:
+            raise ValueError("At least two series are needed")
+        return names
+
+    def _current(self) -> Tuple[str, pd.DataFrame]:
+        """Data version and the panel built from it, rebuilding the panel when the version moves"""
+        # Read the version before the series: if a refresh lands in between, the
+        # panel is labeled older than its data and rebuilt next time, never the reverse
+        version = self.fred_client.data_version()
+        registry = self.fred_client.registry
+        data = {name: self.fred_client.get_series(registry.series_id(name)) for name in registry.names()}
+        with self._lock:
+            if version != self._version or self._panel is None:
+                self._panel = pd.DataFrame({
+                    name: transform_series(series, self.transform_for(name))
+                    for name, series in data.items()
+                })
+                self._version = version
+                self._results = {}
+                logger.info(f"Built correlation panel of {self._panel.shape[1]} series x "
+                            f"{self._panel.shape[0]} months")
+            return self._version, self._panel
+
+    def panel(self) -> pd.DataFrame:
+        """Transformed monthly panel of every registered series, rebuilt when the data version changes"""
+        return self._current()[1]
+
+    def _cached(self, key: tuple, compute):
+        version, panel = self._current()
+        with self._lock:
+            if version == self._version and key in self._results:
+                return self._results[key]
+        result = compute(panel)
+        with self._lock:
+            # Results for a panel replaced while computing are returned but not kept
+            if version == self._version:
+                if key not in self._results and len(self._results) >= CACHE_SIZE:
+                    self._results.pop(next(iter(self._results)))
+                self._results[key] = result
+        return result
+
+    def summary(self, names: Sequence[str] = None, start: str = None, end: str = None,
+                window: int = None, max_lag: int = None, lags: int = None) -> Dict:
+        """
+        Pairwise matrices for a set of series
+
+        Args:
+            names: Series names (default: every registered series)
+            start: First month (YYYY-MM-DD)
+            end: Last month (YYYY-MM-DD)
+            window: Rolling window in months (default config.CORRELATION_WINDOW)
+            max_lag: Largest lead/lag in months (default config.CORRELATION_MAX_LAG)
+            lags: Lags in the Granger models (default config.CORRELATION_GRANGER_LAGS)
+
+        Returns:
+            Dictionary with the series, transforms, sample, and (N, N) arrays:
+            correlation, rolling (latest window), best lead/lag and its
+            correlation, and Granger F statistics and p-values (row -> column)
+        """
+        names = self._check_names(names)
+        window = config.CORRELATION_WINDOW if window is None else window
+        max_lag = config.CORRELATION_MAX_LAG if max_lag is None else max_lag
+        lags = config.CORRELATION_GRANGER_LAGS if lags is None else lags
+        check_options([window], max_lag, lags)
+
+        def compute(panel):
+            frame = panel[names].loc[start:end].dropna(how='all')
+            check_options([window], max_lag, lags, len(frame))
+            values = frame.values
+            correlation, overlap = pairwise_correlation(values, values)
+            rolling = rolling_correlation(values, window) if len(values) >= window else None
+            lead_lag = cross_correlation(values, max_lag)
+            strength = np.where(np.isnan(lead_lag), -1, np.abs(lead_lag))
+            best = strength.argmax(axis=0)
+            best_correlation = np.take_along_axis(lead_lag, best[None], axis=0)[0]
+            f_stat, p_value = granger(values, lags)
+            return {
+                'series': names,
+                'transforms': {name: self.transform_for(name) for name in names},
+                'start': frame.index[0].strftime('%Y-%m-%d') if len(frame) else None,
+                'end': frame.index[-1].strftime('%Y-%m-%d') if len(frame) else None,
+                'observations': overlap.astype(int),
+                'correlation': correlation,
+                'rolling': {
+                    'window': window,
+                    'correlation': rolling[-1] if rolling is not None else None,
+                },
+                'lead_lag': {
+                    'max_lag': max_lag,
+                    'lag': np.where(np.isnan(best_correlation), 0, best - max_lag),
+                    'correlation': best_correlation,
+                },
+                'granger': {'lags': lags, 'f_stat': f_stat, 'p_value': p_value},
+            }
+
+        return self._cached(('summary', tuple(names), start, end, window, max_lag, lags), compute)
+
+    def pair(self, first: str, second: str, start: str = None, end: str = None,
+             windows: Sequence[int] = None, max_lag: int = None, lags: int = None) -> Dict:
+        """
+        Detailed relationship between two series
+
+        Args:
+            first: Series name
+            second: Series name
+            start: First month (YYYY-MM-DD)
+            end: Last month (YYYY-MM-DD)
+            windows: Rolling windows in months (default [config.CORRELATION_WINDOW])
+            max_lag: Largest lead/lag in months (default config.CORRELATION_MAX_LAG)
+            lags: Lags in the Granger models (default config.CORRELATION_GRANGER_LAGS)
+
+        Returns:
+            Dictionary with dates, rolling correlation per window, the
+            cross-correlation at every lag (positive: first leads second) and
+            Granger tests in both directions
+        """
+        names = self._check_names([first, second])
+        windows = tuple(windows) if windows else (config.CORRELATION_WINDOW,)
+        max_lag = config.CORRELATION_MAX_LAG if max_lag is None else max_lag
+        lags = config.CORRELATION_GRANGER_LAGS if lags is None else lags
+        check_options(windows, max_lag, lags)
+
+        def compute(panel):
+            frame = panel[names].loc[start:end].dropna(how='all')
+            check_options(windows, max_lag, lags, len(frame))
+            values = frame.values
+            lead_lag = cross_correlation(values, max_lag)[:, 0, 1]
+            f_stat, p_value = granger(values, lags)
+            return {
+                'series': names,
+                'transforms': {name: self.transform_for(name) for name in names},
+                'dates': frame.index.strftime('%Y-%m-%d').tolist(),
+                'correlation': pairwise_correlation(values[:, :1], values[:, 1:])[0][0, 0],
+                'rolling': {
+                    str(window): rolling_correlation(values, window)[:, 0, 1]
+                    if len(values) >= window else np.full(len(values), np.nan)
+                    for window in windows
+                },
+                'lead_lag': {
+                    'lags': np.arange(-max_lag, max_lag + 1),
+                    'correlation': lead_lag,
+                },
+                'granger': {
+                    f'{first}->{second}': {'f_stat': f_stat[0, 1], 'p_value': p_value[0, 1]},
+                    f'{second}->{first}': {'f_stat': f_stat[1, 0], 'p_value': p_value[1, 0]},
+                    'lags': lags,
+                },
+            }
+
+        return self._cached(('pair', tuple(names), start, end, windows, max_lag, lags), compute)
@@ -0,0 +1,172 @@
+"""
+Data Quality - Continuity, outlier and staleness checks run once per series ingest
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+from lazy_import import lazy_import
+from results import SeriesQuality
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Frequency code -> largest median spacing in days it covers
+FREQUENCY_SPACING = [('D', 3), ('W', 10), ('M', 45), ('Q', 120), ('A', None)]
+
+
+def infer_frequency(dates: np.ndarray) -> str:
+    """
+    Observation frequency from the median spacing of the dates
+
+    Returns:
+        'D' (business daily), 'W', 'M', 'Q' or 'A'
+    """
+    if len(dates) < 2:
+        return 'M'
+    spacing = np.median(np.diff(dates).astype('timedelta64[D]').astype(np.int64))
+    for frequency, days in FREQUENCY_SPACING:
+        if days is None or spacing <= days:
+            return frequency
+
+
+def period_steps(dates: np.ndarray, frequency: str) -> np.ndarray:
+    """
+    Periods between consecutive observations (1 = next period, >1 = periods missing)
+
+    Daily series count business days, since FRED lists holidays as missing
+    values rather than leaving the dates out.
+    """
+    if frequency == 'D':
+        days = dates.astype('datetime64[D]')
+        return np.busday_count(days[:-1], days[1:])
+    if frequency == 'W':
+        return np.diff(dates).astype('timedelta64[D]').astype(np.int64) // 7
+    ordinals = pd.DatetimeIndex(dates).to_period(frequency).asi8
+    return np.diff(ordinals)
+
+
+def find_outliers(values: np.ndarray, threshold: float = None) -> np.ndarray:
+    """
+    Positions of observations whose change from the previous one is extreme
+
+    Changes are scored by robust z-score (median and MAD of all changes), so
+    long histories with a few genuine shocks don't mask a bad print. Series
+    whose changes are mostly zero (e.g. 0/1 indicators) have no MAD and are skipped.
+
+    Args:
+        values: Observations without missing values
+        threshold: Robust z-score above which a change is an outlier
+            (default config.DATA_QUALITY_OUTLIER_Z)
+
+    Returns:
+        Indexes into values of the observations following an extreme change
+    """
+    threshold = threshold or config.DATA_QUALITY_OUTLIER_Z
+    if len(values) < 3:
+        return np.array([], dtype=np.int64)
+    changes = np.diff(values)
+    median = np.median(changes)
+    mad = 1.4826 * np.median(np.abs(changes - median))
+    if mad == 0:
+        return np.array([], dtype=np.int64)
+    return np.flatnonzero(np.abs(changes - median) / mad > threshold) + 1
+
+
+def check_series(series_id: str, data: pd.Series) -> SeriesQuality:
+    """
+    Validate a freshly ingested series
+
+    Args:
+        series_id: FRED series identifier
+        data: Observations indexed by date (NaN for missing values)
+
+    Returns:
+        SeriesQuality with gaps, outliers and the latest valid observation.
+        Gaps and outliers anywhere are counted; the series is flagged when one
+        falls within the last config.DATA_QUALITY_RECENT_YEARS.
+    """
+    dates = data.index.values
+    values = data.values
+    frequency = infer_frequency(dates)
+    valid = ~np.isnan(values)
+    recent = ((data.index[-1] - pd.DateOffset(years=config.DATA_QUALITY_RECENT_YEARS)).to_datetime64()
+              if len(data) else None)
+    limit = config.DATA_QUALITY_MAX_LISTED
+
+    steps = period_steps(dates, frequency) if len(dates) > 1 else np.array([], dtype=np.int64)
+    gap_at = np.flatnonzero(steps > 1)
+    unordered = int(np.count_nonzero(steps < 1))
+    gaps = tuple(
+        {'after': str(dates[i])[:10], 'before': str(dates[i + 1])[:10],
+         'missing_periods': int(steps[i] - 1)}
+        for i in gap_at[-limit:]
+    )
+
+    valid_dates, valid_values = dates[valid], values[valid]
+    outlier_at = find_outliers(valid_values)
+    outliers = tuple(
+        {'date': str(valid_dates[i])[:10], 'value': float(valid_values[i]),
+         'change': float(valid_values[i] - valid_values[i - 1])}
+        for i in outlier_at[-limit:]
+    )
+
+    flags = []
+    if len(gap_at) and dates[gap_at[-1] + 1] >= recent:
+        flags.append('gaps')
+    if len(outlier_at) and valid_dates[outlier_at[-1]] >= recent:
+        flags.append('outliers')
+    if unordered:
+        flags.append('unordered')
+    if not len(valid_values):
+        flags.append('empty')
+
+    quality = SeriesQuality(
+        series_id=series_id,
+        frequency=frequency,
+        observations=len(data),
+        missing_values=int(len(values) - np.count_nonzero(valid)),
+        gap_count=len(gap_at),
+        missing_periods=int(steps[gap_at].sum() - len(gap_at)),
+        gaps=gaps,
+        outlier_count=len(outlier_at),
+        outliers=outliers,
+        unordered=unordered,
+        flags=tuple(flags),
+        latest_date=str(valid_dates[-1])[:10] if len(valid_values) else None,
+        latest_value=float(valid_values[-1]) if len(valid_values) else None,
+        checked_at=datetime.now().isoformat()
+    )
+    if flags:
+        logger.warning(f"Data quality flags for {series_id}: {', '.join(flags)}")
+    return quality
+
+
+def assess(quality: SeriesQuality, now: datetime = None) -> Dict:
+    """
+    Quality report with staleness, which depends on when it is read
+
+    Args:
+        quality: Result of check_series()
+        now: Time to measure the age against (default: now)
+
+    Returns:
+        quality.to_dict() plus age_days and stale, with 'stale' added to flags
+        when the latest observation is older than config.DATA_QUALITY_MAX_AGE_DAYS
+        allows for the series' frequency
+    """
+    report = quality.to_dict()
+    flags: List[str] = list(quality.flags)
+    age = None
+    if quality.latest_date is not None:
+        age = ((now or datetime.now()) - datetime.fromisoformat(quality.latest_date)).days
+        if age > config.DATA_QUALITY_MAX_AGE_DAYS[quality.frequency]:
+            flags.append('stale')
+    report['age_days'] = age
+    report['stale'] = 'stale' in flags
+    report['flags'] = flags
+    return report
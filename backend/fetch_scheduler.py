@@ -0,0 +1,318 @@
+"""
+Fetch Scheduler - Rate-limited, prioritized execution of upstream FRED requests
+"""
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence
+import itertools
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+import urllib.error
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
+
+TRANSIENT_HTTP_STATUS = {429, 500, 502, 503, 504}
+
+KEY_SELECTION = ['round_robin', 'least_loaded']
+
+
+def _status(error: Exception) -> Optional[int]:
+    """HTTP status of an upstream error, if it has one"""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether an upstream error is worth retrying"""
+    status = _status(error)
+    if status is not None:
+        return status in TRANSIENT_HTTP_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError, socket.timeout, urllib.error.URLError)):
+        return True
+    # requests' ConnectionError/Timeout don't subclass the builtins
+    return type(error).__name__ in ('ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout')
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the rate of upstream requests"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize a full bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one will be available
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def available(self) -> float:
+        """Get the number of tokens currently available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def drain(self):
+        """Empty the bucket, e.g. after upstream reports the limit was hit anyway"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Block until a token is taken or the timeout expires"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class KeyPool:
+    """API keys for the upstream service, each with its own rate limit"""
+
+    def __init__(self, keys: Sequence[Optional[str]], rate_per_minute: float, burst: float,
+                 selection: str = None):
+        """
+        Initialize the pool with a full bucket per key
+
+        Args:
+            keys: API keys (a single None when calls don't need a key)
+            rate_per_minute: Requests allowed per minute for each key
+            burst: Requests allowed back-to-back for each key
+            selection: 'round_robin' or 'least_loaded' (default config.FRED_KEY_SELECTION)
+        """
+        self.selection = selection or config.FRED_KEY_SELECTION
+        if self.selection not in KEY_SELECTION:
+            raise ValueError(f"Unknown key selection: {self.selection}")
+        self.keys = list(keys)
+        if not self.keys:
+            raise ValueError("At least one API key is required")
+        self.buckets = [TokenBucket(rate_per_minute / 60, burst) for _ in self.keys]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._in_flight = [0] * len(self.keys)
+        self._counters = [{'requests': 0, 'rate_limited': 0} for _ in self.keys]
+
+    def _candidates(self) -> List[int]:
+        """Key indexes in the order they should be tried"""
+        with self._lock:
+            if self.selection == 'round_robin':
+                start = self._next
+                self._next = (self._next + 1) % len(self.keys)
+                return [(start + i) % len(self.keys) for i in range(len(self.keys))]
+            # Fewest calls in progress first, then the fullest bucket, then the least used
+            return sorted(range(len(self.keys)),
+                          key=lambda i: (self._in_flight[i], -int(self.buckets[i].available()),
+                                         self._counters[i]['requests']))
+
+    def acquire(self) -> int:
+        """
+        Block until some key has a token, and take it
+
+        Returns:
+            Index of the key to use; pass it to release() when the call is done
+        """
+        while True:
+            waits = []
+            for index in self._candidates():
+                wait = self.buckets[index].try_acquire()
+                if wait == 0:
+                    with self._lock:
+                        self._in_flight[index] += 1
+                        self._counters[index]['requests'] += 1
+                    return index
+                waits.append(wait)
+            time.sleep(min(waits))
+
+    def release(self, index: int, rate_limited: bool = False):
+        """
+        Finish a call made with a key
+
+        Args:
+            index: Key index from acquire()
+            rate_limited: Upstream rejected the call with 429; the key's bucket is
+                drained so the retry goes to another key
+        """
+        with self._lock:
+            self._in_flight[index] -= 1
+            if rate_limited:
+                self._counters[index]['rate_limited'] += 1
+        if rate_limited:
+            self.buckets[index].drain()
+
+    def available(self) -> float:
+        """Tokens available across all keys"""
+        return sum(bucket.available() for bucket in self.buckets)
+
+    def metrics(self) -> List[Dict]:
+        """Per-key counters (keys are identified by position, never by value)"""
+        with self._lock:
+            return [{'key': i, 'in_flight': self._in_flight[i], **self._counters[i],
+                     'tokens_available': round(self.buckets[i].available(), 2)}
+                    for i in range(len(self.keys))]
+
+
+class FetchScheduler:
+    """Runs upstream calls on worker threads under per-key rate limits, with retries"""
+
+    def __init__(self, rate_per_minute: float = None, burst: int = None, workers: int = None,
+                 max_retries: int = None, backoff_base: float = None, backoff_max: float = None,
+                 keys: Sequence[str] = None, key_selection: str = None):
+        """
+        Initialize the scheduler and start its workers
+
+        Args:
+            rate_per_minute: Upstream requests allowed per minute for each key
+                (default config.FRED_RATE_LIMIT_PER_MINUTE)
+            burst: Requests allowed back-to-back for each key (default config.FRED_RATE_LIMIT_BURST)
+            workers: Worker threads (default config.FETCH_WORKERS)
+            max_retries: Retries for transient errors (default config.FETCH_MAX_RETRIES)
+            backoff_base: First backoff ceiling in seconds (default config.FETCH_BACKOFF_BASE)
+            backoff_max: Largest backoff ceiling in seconds (default config.FETCH_BACKOFF_MAX)
+            keys: API keys spread across calls (see current_key); without keys,
+                calls share a single rate limit
+            key_selection: 'round_robin' or 'least_loaded' (default config.FRED_KEY_SELECTION)
+        """
+        rate_per_minute = rate_per_minute or config.FRED_RATE_LIMIT_PER_MINUTE
+        self.keys = KeyPool(keys or [None], rate_per_minute, burst or config.FRED_RATE_LIMIT_BURST,
+                            key_selection)
+        self._local = threading.local()
+        self.max_retries = config.FETCH_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or config.FETCH_BACKOFF_BASE
+        self.backoff_max = backoff_max or config.FETCH_BACKOFF_MAX
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._pending: Dict[int, int] = {}
+        self._counters = {'in_flight': 0, 'completed': 0, 'failed': 0, 'retries': 0}
+        self._workers = [
+            threading.Thread(target=self._run, name=f'fred-fetch-{i}', daemon=True)
+            for i in range(workers or config.FETCH_WORKERS)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_USER, **kwargs) -> Future:
+        """
+        Queue an upstream call
+
+        Args:
+            fn: Callable performing one upstream request
+            priority: PRIORITY_USER for request-path fetches, PRIORITY_BACKGROUND for refreshes
+
+        Returns:
+            Future resolving to the call's result
+        """
+        future = Future()
+        with self._lock:
+            self._pending[priority] = self._pending.get(priority, 0) + 1
+        self._queue.put((priority, next(self._sequence), fn, args, kwargs, future))
+        return future
+
+    def call(self, fn: Callable, *args, priority: int = PRIORITY_USER,
+             timeout: float = None, **kwargs):
+        """Submit a call and wait for its result (raises TimeoutError if it takes too long)"""
+        return self.submit(fn, *args, priority=priority, **kwargs).result(timeout=timeout)
+
+    def _run(self):
+        """Worker loop: take the highest-priority call, respect the rate limit, retry on failure"""
+        while True:
+            priority, _, fn, args, kwargs, future = self._queue.get()
+            with self._lock:
+                self._pending[priority] -= 1
+                self._counters['in_flight'] += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(self._execute(fn, args, kwargs))
+                    self._count('completed')
+            except Exception as e:
+                future.set_exception(e)
+                self._count('failed')
+            finally:
+                with self._lock:
+                    self._counters['in_flight'] -= 1
+                self._queue.task_done()
+
+    def current_key(self) -> Optional[str]:
+        """API key assigned to the call running on this worker thread (None outside a call)"""
+        return getattr(self._local, 'key', None)
+
+    def _execute(self, fn: Callable, args: tuple, kwargs: dict):
+        """Run one call with jittered exponential backoff on transient errors"""
+        attempt = 0
+        while True:
+            index = self.keys.acquire()
+            self._local.key = self.keys.keys[index]
+            try:
+                result = fn(*args, **kwargs)
+                self.keys.release(index)
+                return result
+            except Exception as e:
+                self.keys.release(index, rate_limited=_status(e) == 429)
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                logger.warning(f"Transient upstream error ({str(e)}), retrying in {delay:.2f}s")
+                self._count('retries')
+                attempt += 1
+                time.sleep(delay)
+            finally:
+                self._local.key = None
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def metrics(self) -> Dict:
+        """Get queue depth by priority and request counters"""
+        with self._lock:
+            return {
+                'queue_depth': sum(self._pending.values()),
+                'queue_depth_by_priority': {
+                    ('user' if p == PRIORITY_USER else 'background' if p == PRIORITY_BACKGROUND
+                     else str(p)): n
+                    for p, n in sorted(self._pending.items())
+                },
+                **self._counters,
+                'tokens_available': round(self.keys.available(), 2),
+                'keys': self.keys.metrics(),
+            }
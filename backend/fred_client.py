@@ -1,31 +1,149 @@
 """
 FRED API Client - Handles all interactions with the Federal Reserve Economic Data API
 """
-from fredapi import Fred
+from __future__ import annotations
 from datetime import datetime, timedelta
-import pandas as pd
 import config
-from typing import Dict, Optional, List
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, List
+from lazy_import import lazy_import
+from series_registry import SeriesRegistry
+from fetch_scheduler import FetchScheduler, PRIORITY_BACKGROUND, PRIORITY_USER
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from data_quality import assess, check_series
+import hashlib
 import logging
+import threading
+
+# Loaded on first use so importing the client (e.g. for the CLI) stays fast
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def rate_changes(data: pd.Series, threshold: float = None) -> pd.DataFrame:
+    """
+    Find observations that moved at least a threshold from the previous one
+
+    Args:
+        data: Rate series
+        threshold: Minimum absolute change (default config.RATE_CHANGE_THRESHOLD)
+
+    Returns:
+        DataFrame indexed by date with value, change and previous columns
+    """
+    threshold = config.RATE_CHANGE_THRESHOLD if threshold is None else threshold
+    previous = data.shift(1)
+    change = data - previous
+    moved = (change.abs() >= threshold).values
+    return pd.DataFrame({'value': data, 'change': change, 'previous': previous})[moved]
+
+
+class LazyIndicators(Mapping):
+    """Latest indicator values keyed by series name, fetched on first access"""
+
+    def __init__(self, client: 'FREDClient', names: Iterable[str]):
+        """Initialize with the client to fetch through and the series names exposed"""
+        self._client = client
+        self._names = list(names)
+        self._known = set(self._names)
+        self._values = {}
+
+    def __getitem__(self, name: str) -> Optional[float]:
+        if name not in self._known:
+            raise KeyError(name)
+        if name not in self._values:
+            self._values[name] = self._client.get_indicator(name)
+        return self._values[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        """Fetch every remaining series and return a plain dictionary"""
+        return {name: self[name] for name in self._names}
+
+
 class FREDClient:
     """Wrapper for FRED API with caching and error handling"""
 
-    def __init__(self, api_key: str = None):
-        """Initialize FRED client with API key"""
-        self.api_key = api_key or config.FRED_API_KEY
-        if self.api_key == 'YOUR_API_KEY_HERE':
+    def __init__(self, api_key: str = None, registry: SeriesRegistry = None,
+                 scheduler: FetchScheduler = None, base_url: str = None,
+                 breaker: CircuitBreaker = None, api_keys: List[str] = None):
+        """
+        Initialize FRED client with API keys, series registry, fetch scheduler and API URL
+
+        With several keys (api_keys or config.FRED_API_KEYS) the scheduler rate
+        limits each key separately and spreads fetches across them.
+        """
+        self.registry = registry or SeriesRegistry.from_config()
+        self.api_keys = list(api_keys or ([api_key] if api_key else config.FRED_API_KEYS))
+        if not self.api_keys or 'YOUR_API_KEY_HERE' in self.api_keys:
             raise ValueError(
                 "Please set your FRED API key in config.py or .env file. "
                 "Get your free API key at: https://fred.stlouisfed.org/docs/api/api_key.html"
             )
-        self.fred = Fred(api_key=self.api_key)
+        self.api_key = self.api_keys[0]
+        self.base_url = (base_url or config.FRED_API_BASE_URL).rstrip('/')
+        self._session = None
+        self.scheduler = scheduler or FetchScheduler(keys=self.api_keys)
+        self.breaker = breaker or CircuitBreaker()
         self._cache = {}
         self._cache_time = {}
+        self._stale = {}
+        self._quality = {}
+        self._inflight = {}
+        self._params = {}
+        self._revalidating = set()
+        self._listeners = []
+        self._fingerprints = {}
+        self._data_version = ((), None)
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.stats = {'cache_hits': 0, 'cache_misses': 0, 'stale_served': 0}
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session, created on first request"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Create a keep-alive HTTP session with a connection pool sized for the fetch workers"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=config.FRED_HTTP_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        return session
+
+    def _request(self, path: str, **params) -> Dict:
+        """Call a FRED REST endpoint and return the decoded JSON body"""
+        params = {k: v for k, v in params.items() if v is not None}
+        params.update(api_key=self.scheduler.current_key() or self.api_key, file_type='json')
+        response = self.session.get(f"{self.base_url}/{path}", params=params,
+                                    timeout=config.FRED_HTTP_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _parse_observations(observations: List[Dict]) -> pd.Series:
+        """Convert FRED observation records to a float Series ('.' marks a missing value)"""
+        dates = np.array([o['date'] for o in observations], dtype='datetime64[ns]')
+        values = np.array([o['value'] for o in observations], dtype=object)
+        values[values == '.'] = 'nan'
+        return pd.Series(values.astype(np.float64), index=pd.DatetimeIndex(dates))
 
     def _is_cache_valid(self, series_id: str) -> bool:
         """Check if cached data is still valid"""
@@ -34,47 +152,282 @@ class FREDClient:
         elapsed = (datetime.now() - self._cache_time[series_id]).total_seconds()
         return elapsed < config.CACHE_DURATION
 
+    @contextmanager
+    def background_priority(self):
+        """Fetch at PRIORITY_BACKGROUND from the current thread unless a call says otherwise"""
+        self._local.priority = PRIORITY_BACKGROUND
+        try:
+            yield
+        finally:
+            self._local.priority = None
+
     def get_series(self, series_id: str, observation_start: str = None,
-                   observation_end: str = None) -> pd.Series:
+                   observation_end: str = None, priority: int = None) -> pd.Series:
         """
         Fetch a data series from FRED
 
+        Upstream requests go through the rate-limited scheduler, and concurrent
+        requests for the same series share one fetch. If the fetch fails or times
+        out, or the circuit breaker is open, the last cached copy is returned
+        instead (see stale_as_of) while any fetch completes in the background.
+        With the breaker open and no cached copy, CircuitOpenError is raised
+        without queueing a fetch.
+
         Args:
             series_id: FRED series identifier
             observation_start: Start date (YYYY-MM-DD)
             observation_end: End date (YYYY-MM-DD)
+            priority: Scheduler priority (PRIORITY_USER, the default, or
+                PRIORITY_BACKGROUND, the default inside background_priority())
 
         Returns:
             Pandas Series with the data
         """
         cache_key = f"{series_id}_{observation_start}_{observation_end}"
+        if priority is None:
+            priority = getattr(self._local, 'priority', None) or PRIORITY_USER
 
         if self._is_cache_valid(cache_key):
             logger.info(f"Using cached data for {series_id}")
+            self._count('cache_hits')
             return self._cache[cache_key]
+        self._count('cache_misses')
+
+        if not self.breaker.allows_request():
+            if cache_key in self._cache:
+                return self._serve_stale(series_id, cache_key, "circuit open")
+            # Don't queue behind the rate limit only for the breaker to refuse the call
+            raise CircuitOpenError(f"FRED API circuit is open; {series_id} is not cached")
+        if cache_key in self._revalidating and cache_key in self._cache:
+            # A background refresh is already on its way; don't make the request wait on it
+            return self._serve_stale(series_id, cache_key, "refresh in progress")
 
+        future = self._submit_fetch(series_id, observation_start, observation_end,
+                                    cache_key, priority)
+
+        # With a stale copy to fall back on, don't hold the request for long
+        timeout = config.FETCH_STALE_TIMEOUT if cache_key in self._cache else config.FETCH_TIMEOUT
         try:
-            logger.info(f"Fetching {series_id} from FRED API")
-            data = self.fred.get_series(
-                series_id,
-                observation_start=observation_start,
-                observation_end=observation_end
-            )
-            self._cache[cache_key] = data
-            self._cache_time[cache_key] = datetime.now()
-            return data
+            return future.result(timeout=timeout)
         except Exception as e:
+            if cache_key in self._cache:
+                return self._serve_stale(series_id, cache_key, str(e) or type(e).__name__)
             logger.error(f"Error fetching {series_id}: {str(e)}")
             raise
 
+    def _submit_fetch(self, series_id: str, observation_start: str, observation_end: str,
+                      cache_key: str, priority: int):
+        """Queue a fetch for a series, or join the one already in flight"""
+        with self._lock:
+            future = self._inflight.get(cache_key)
+            if future is None:
+                future = self.scheduler.submit(
+                    self._fetch_series, series_id, observation_start, observation_end,
+                    cache_key, priority=priority
+                )
+                self._inflight[cache_key] = future
+                future.add_done_callback(lambda f: self._finish_fetch(cache_key, f))
+            return future
+
+    def _fetch_series(self, series_id: str, observation_start: str,
+                      observation_end: str, cache_key: str) -> pd.Series:
+        """Fetch a series from the FRED API and store it in the cache"""
+        logger.info(f"Fetching {series_id} from FRED API")
+        payload = self.breaker.call(
+            self._request,
+            'series/observations',
+            series_id=series_id,
+            observation_start=observation_start,
+            observation_end=observation_end
+        )
+        data = self._parse_observations(payload.get('observations', []))
+        quality = check_series(series_id, data)
+        with self._lock:
+            self._cache[cache_key] = data
+            self._quality[cache_key] = quality
+            self._cache_time[cache_key] = datetime.now()
+            self._params[cache_key] = (series_id, observation_start, observation_end)
+            self._stale.pop(cache_key, None)
+        self._notify(series_id)
+        return data
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """
+        Call a function whenever new data for a series lands in the cache
+
+        Callbacks run on the fetching thread with the series ID and must be
+        quick; hand real work off to another thread.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, series_id: str):
+        for callback in list(self._listeners):
+            try:
+                callback(series_id)
+            except Exception as e:
+                logger.error(f"Cache listener failed for {series_id}: {str(e)}")
+
+    def _serve_stale(self, series_id: str, cache_key: str, reason: str) -> pd.Series:
+        """Return the last good copy of a series and mark it as stale"""
+        logger.warning(f"Serving stale {series_id} ({reason})")
+        self._count('stale_served')
+        self._stale[cache_key] = self._cache_time[cache_key]
+        return self._cache[cache_key]
+
+    def stale_as_of(self) -> Optional[str]:
+        """Fetch time of the oldest cached series currently served stale, or None if all fresh"""
+        stale = list(self._stale.values())
+        return min(stale).isoformat() if stale else None
+
+    def _finish_fetch(self, cache_key: str, future):
+        """Forget a completed in-flight fetch"""
+        with self._lock:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+                self._revalidating.discard(cache_key)
+
+    def cache_entries(self) -> List[Dict]:
+        """
+        Get every cached series with the parameters it was fetched with
+
+        Returns:
+            List of dictionaries with cache_key, series_id, observation_start,
+            observation_end, fetched_at (datetime) and data (pd.Series)
+        """
+        with self._lock:
+            return [
+                {
+                    'cache_key': key,
+                    'series_id': series_id,
+                    'observation_start': start,
+                    'observation_end': end,
+                    'fetched_at': self._cache_time[key],
+                    'data': self._cache[key]
+                }
+                for key, (series_id, start, end) in self._params.items()
+            ]
+
+    def restore_cache(self, entries: Iterable[Dict]) -> int:
+        """
+        Load previously saved series into an empty cache slot (existing entries win)
+
+        Args:
+            entries: Dictionaries in the format returned by cache_entries()
+
+        Returns:
+            Number of series restored
+        """
+        restored = set()
+        entries = [entry for entry in entries if entry['cache_key'] not in self._cache]
+        checks = [check_series(entry['series_id'], entry['data']) for entry in entries]
+        with self._lock:
+            for entry, quality in zip(entries, checks):
+                key = entry['cache_key']
+                if key in self._cache:
+                    continue
+                self._cache[key] = entry['data']
+                self._quality[key] = quality
+                self._cache_time[key] = entry['fetched_at']
+                self._params[key] = (entry['series_id'], entry['observation_start'],
+                                     entry['observation_end'])
+                restored.add(key)
+        for series_id in {self._params[key][0] for key in restored}:
+            self._notify(series_id)
+        return len(restored)
+
+    def refresh(self, cache_keys: Iterable[str] = None, priority: int = PRIORITY_BACKGROUND,
+                expired_only: bool = True) -> int:
+        """
+        Refetch cached series in the background
+
+        Until each refresh completes, requests for the series are answered from
+        the cached copy (reported through stale_as_of) instead of waiting.
+
+        Args:
+            cache_keys: Cache keys to refresh (default every cached series)
+            priority: Scheduler priority for the refetches
+            expired_only: Skip series whose cached copy is still within CACHE_DURATION
+
+        Returns:
+            Number of refreshes queued
+        """
+        with self._lock:
+            keys = list(self._params) if cache_keys is None else list(cache_keys)
+            keys = [k for k in keys if k in self._params
+                    and not (expired_only and self._is_cache_valid(k))]
+            for key in keys:
+                self._revalidating.add(key)
+                self._submit_fetch(*self._params[key], key, priority)
+        if keys:
+            logger.info(f"Queued background refresh of {len(keys)} cached series")
+        return len(keys)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_metrics(self) -> Dict:
+        """Get cache counters and fetch scheduler queue metrics"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['cached_series'] = len(self._cache)
+            stats['inflight_fetches'] = len(self._inflight)
+        return {
+            'cache': stats,
+            'scheduler': self.scheduler.metrics(),
+            'circuit_breaker': self.breaker.metrics(),
+            'stale_as_of': self.stale_as_of()
+        }
+
+    def data_version(self) -> str:
+        """
+        Fingerprint of all cached observations
+
+        It changes only when the data does (a refetch returning the same
+        observations keeps it) and is the same in every process holding the
+        same data, so it can be used as an HTTP validator behind a load balancer.
+        """
+        with self._lock:
+            entries = sorted(self._cache.items(), key=lambda item: item[0])
+        # Memoized on the cached objects themselves, not their ids: a refreshed
+        # series can be allocated where a freed one was and reuse its id
+        objects = tuple(data for _, data in entries)
+        cached_objects, version = self._data_version
+        if len(cached_objects) == len(objects) and all(
+                a is b for a, b in zip(cached_objects, objects)):
+            return version
+        digest = hashlib.sha1()
+        for key, data in entries:
+            seen = self._fingerprints.get(key)
+            if seen is None or seen[0] is not data:
+                seen = self._fingerprints[key] = (data, hashlib.sha1(
+                    data.index.values.tobytes() + data.values.tobytes()).digest())
+            digest.update(key.encode())
+            digest.update(seen[1])
+        version = digest.hexdigest()[:16]
+        self._data_version = (objects, version)
+        return version
+
+    def get_data_quality(self) -> Dict[str, Dict]:
+        """
+        Data quality of every cached full-history series, checked when it was ingested
+
+        Returns:
+            Series ID -> report (see data_quality.assess), with staleness as of now
+        """
+        with self._lock:
+            checks = [quality for key, quality in self._quality.items()
+                      if self._params[key][1:] == (None, None)]
+        now = datetime.now()
+        return {quality.series_id: assess(quality, now) for quality in checks}
+
     def get_latest_value(self, series_id: str) -> Optional[float]:
-        """Get the most recent value for a series"""
+        """Get the most recent non-missing value for a series"""
         try:
             data = self.get_series(series_id)
-            if data is not None and len(data) > 0:
-                # Get the last non-null value
-                return float(data.dropna().iloc[-1])
-            return None
+            # Found once per ingest by the data quality checks
+            quality = self._quality.get(f"{series_id}_None_None") or check_series(series_id, data)
+            return quality.latest_value
         except Exception as e:
             logger.error(f"Error getting latest value for {series_id}: {str(e)}")
             return None
@@ -82,45 +435,60 @@ class FREDClient:
     def get_series_info(self, series_id: str) -> Dict:
         """Get metadata about a series"""
         try:
-            info = self.fred.get_series_info(series_id)
-            return info.to_dict() if hasattr(info, 'to_dict') else info
+            if not self.breaker.allows_request():
+                raise CircuitOpenError("FRED API circuit is open")
+            payload = self.scheduler.call(self.breaker.call, self._request, 'series',
+                                          series_id=series_id, timeout=config.FETCH_TIMEOUT)
+            return payload['seriess'][0]
         except Exception as e:
             logger.error(f"Error getting info for {series_id}: {str(e)}")
             return {}
 
     def get_recent_data(self, series_id: str, years: int = 2) -> pd.Series:
-        """Get recent data for a series"""
-        start_date = (datetime.now() - timedelta(days=365*years)).strftime('%Y-%m-%d')
-        return self.get_series(series_id, observation_start=start_date)
-
-    def get_all_indicators(self) -> Dict[str, float]:
-        """Fetch all configured economic indicators"""
-        indicators = {}
-        for name, series_id in config.FRED_SERIES.items():
-            try:
-                value = self.get_latest_value(series_id)
-                indicators[name] = value
-                logger.info(f"{name}: {value}")
-            except Exception as e:
-                logger.error(f"Failed to fetch {name}: {str(e)}")
-                indicators[name] = None
-        return indicators
+        """Get recent data for a series (sliced from the cached full history)"""
+        start_date = datetime.now() - timedelta(days=365*years)
+        data = self.get_series(series_id)
+        return data[data.index >= start_date]
+
+    def get_indicator(self, name: str) -> Optional[float]:
+        """Get the latest value of a registered series by name"""
+        try:
+            value = self.get_latest_value(self.registry.series_id(name))
+            logger.info(f"{name}: {value}")
+            return value
+        except Exception as e:
+            logger.error(f"Failed to fetch {name}: {str(e)}")
+            return None
+
+    def get_indicators(self, *consumers: str) -> LazyIndicators:
+        """
+        Get indicators declared for the given consumers without fetching them yet
+
+        Args:
+            consumers: Consumer tags from the registry (e.g. 'analyzer', 'dashboard')
+
+        Returns:
+            Mapping that fetches each series the first time it is read
+        """
+        return LazyIndicators(self, self.registry.names(*consumers))
+
+    def get_all_indicators(self, consumer: str = 'indicators') -> Dict[str, float]:
+        """Fetch all economic indicators declared for a consumer"""
+        return self.get_indicators(consumer).to_dict()
 
     def get_historical_data(self, series_name: str, period: str = '2Y') -> Dict:
         """
         Get historical data for a series
 
         Args:
-            series_name: Name of the series (from config.FRED_SERIES)
+            series_name: Name of a series declared in the registry
             period: Time period (1Y, 2Y, 5Y, 10Y)
 
         Returns:
-            Dictionary with dates and values
+            Dictionary with a DatetimeIndex and float array of values (NaN where
+            missing), encoded to date strings and nulls by the response encoder
         """
-        if series_name not in config.FRED_SERIES:
-            raise ValueError(f"Unknown series: {series_name}")
-
-        series_id = config.FRED_SERIES[series_name]
+        series_id = self.registry.series_id(series_name)
 
         # Parse period
         years = int(period[:-1]) if period.endswith('Y') else 2
@@ -128,8 +496,8 @@ class FREDClient:
 
         # Convert to dictionary format
         result = {
-            'dates': [d.strftime('%Y-%m-%d') for d in data.index],
-            'values': [float(v) if pd.notna(v) else None for v in data.values],
+            'dates': data.index,
+            'values': data.to_numpy(dtype=float),
             'series_name': series_name,
             'series_id': series_id
         }
@@ -138,20 +506,11 @@ class FREDClient:
     def get_rate_changes(self, series_id: str, months: int = 12) -> List[Dict]:
         """Calculate rate changes over time"""
         data = self.get_recent_data(series_id, years=months//12 + 1)
-        changes = []
-
-        for i in range(1, len(data)):
-            if pd.notna(data.iloc[i]) and pd.notna(data.iloc[i-1]):
-                change = data.iloc[i] - data.iloc[i-1]
-                if abs(change) >= config.RATE_CHANGE_THRESHOLD:
-                    changes.append({
-                        'date': data.index[i].strftime('%Y-%m-%d'),
-                        'value': float(data.iloc[i]),
-                        'change': float(change),
-                        'previous': float(data.iloc[i-1])
-                    })
-
-        return changes
+        return [
+            {'date': row.Index.strftime('%Y-%m-%d'), 'value': float(row.value),
+             'change': float(row.change), 'previous': float(row.previous)}
+            for row in rate_changes(data).itertuples()
+        ]
 
 
 if __name__ == "__main__":
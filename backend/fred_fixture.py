@@ -0,0 +1,225 @@
+"""
+FRED Fixture - Local stand-in for the FRED REST API serving deterministic synthetic data
+
+Run standalone and point the backend at it for offline development or load tests:
+
+    python fred_fixture.py --port 8765
+    FRED_API_BASE_URL=http://localhost:8765/fred FRED_API_KEY=offline python app.py
+
+It also accepts alert webhooks at /webhook (ALERT_WEBHOOK_URL=http://localhost:8765/webhook).
+"""
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+import argparse
+import gzip
+import json
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Starting level, monthly volatility and frequency of known series
+SERIES_PROFILES = {
+    'FEDFUNDS': (5.0, 0.15, 'MS'),
+    'DGS1MO': (4.6, 0.02, 'B'),
+    'DGS3MO': (4.7, 0.02, 'B'),
+    'DGS6MO': (4.9, 0.02, 'B'),
+    'DGS1': (5.1, 0.02, 'B'),
+    'DGS2': (5.5, 0.02, 'B'),
+    'DGS3': (5.7, 0.02, 'B'),
+    'DGS5': (5.8, 0.02, 'B'),
+    'DGS7': (5.9, 0.02, 'B'),
+    'DGS10': (6.0, 0.02, 'B'),
+    'DGS20': (6.3, 0.02, 'B'),
+    'DGS30': (6.4, 0.02, 'B'),
+    'T10Y2Y': (0.5, 0.02, 'B'),
+    'CPIAUCSL': (120.0, None, 'MS'),
+    'PCEPILFE': (60.0, None, 'MS'),
+    'UNRATE': (6.0, 0.15, 'MS'),
+    'GDPC1': (8000.0, None, 'QS'),
+    'M2SL': (3000.0, None, 'MS'),
+}
+DEFAULT_PROFILE = (100.0, 0.5, 'MS')
+HISTORY_START = '1985-01-01'
+
+
+def synthetic_series(series_id: str, end: str = None) -> pd.Series:
+    """
+    Generate a deterministic series for a FRED series ID
+
+    Rates follow a mean-reverting random walk; price levels (no volatility given)
+    grow at a noisy ~3% annual rate. Daily series have occasional missing values,
+    like FRED's holiday gaps.
+    """
+    if series_id == 'USREC':
+        return synthetic_recessions(end)
+    level, volatility, freq = SERIES_PROFILES.get(series_id, DEFAULT_PROFILE)
+    rng = np.random.default_rng(zlib.crc32(series_id.encode()))
+    index = pd.date_range(HISTORY_START, end or pd.Timestamp.today().normalize(), freq=freq)
+    n = len(index)
+
+    if volatility is None:
+        periods_per_year = {'MS': 12, 'QS': 4}.get(freq, 252)
+        growth = rng.normal(0.03 / periods_per_year, 0.002, n)
+        values = level * np.exp(np.cumsum(growth))
+    else:
+        step = volatility / (np.sqrt(21) if freq == 'B' else 1)
+        values = np.empty(n)
+        current = level
+        shocks = rng.normal(0, step, n)
+        for i in range(n):
+            current += shocks[i] + 0.002 * (level - current)
+            values[i] = current
+
+    series = pd.Series(np.round(values, 2), index=index)
+    if freq == 'B':
+        series[rng.random(n) < 0.02] = np.nan
+    return series
+
+
+def synthetic_recessions(end: str = None) -> pd.Series:
+    """
+    Generate a monthly 0/1 recession indicator like USREC
+
+    Recessions follow a flat or inverted synthetic 10Y-3M spread a year earlier,
+    so models fit on fixture data find the usual relationship.
+    """
+    spread = (synthetic_series('DGS10', end) - synthetic_series('DGS3MO', end)).resample('MS').mean()
+    rng = np.random.default_rng(zlib.crc32(b'USREC'))
+    score = -spread.shift(12).bfill() + rng.normal(0, 0.3, len(spread))
+    return (score > np.quantile(score, 0.88)).astype(float)
+
+
+class FixtureData:
+    """Cache of synthetic series keyed by series ID"""
+
+    def __init__(self):
+        self._series: Dict[str, pd.Series] = {}
+        self._lock = threading.Lock()
+
+    def get(self, series_id: str) -> pd.Series:
+        with self._lock:
+            if series_id not in self._series:
+                self._series[series_id] = synthetic_series(series_id)
+            return self._series[series_id]
+
+    def observations(self, series_id: str, start: str = None, end: str = None) -> Dict:
+        """Build an observations payload in FRED's JSON format"""
+        series = self.get(series_id).loc[start:end]
+        dates = series.index.strftime('%Y-%m-%d')
+        values = ['.' if np.isnan(v) else f'{v:.2f}' for v in series.values]
+        today = pd.Timestamp.today().strftime('%Y-%m-%d')
+        return {
+            'realtime_start': today,
+            'realtime_end': today,
+            'count': len(series),
+            'observations': [
+                {'realtime_start': today, 'realtime_end': today, 'date': d, 'value': v}
+                for d, v in zip(dates, values)
+            ],
+        }
+
+    def info(self, series_id: str) -> Dict:
+        """Build a series metadata payload in FRED's JSON format"""
+        series = self.get(series_id)
+        freq = SERIES_PROFILES.get(series_id, DEFAULT_PROFILE)[2]
+        return {'seriess': [{
+            'id': series_id,
+            'title': f'Synthetic {series_id}',
+            'observation_start': series.index[0].strftime('%Y-%m-%d'),
+            'observation_end': series.index[-1].strftime('%Y-%m-%d'),
+            'frequency_short': {'MS': 'M', 'QS': 'Q'}.get(freq, 'D'),
+            'units': 'Synthetic',
+        }]}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves /fred/series and /fred/series/observations, and records POSTs to /webhook"""
+
+    protocol_version = 'HTTP/1.1'
+    data = FixtureData()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        series_id = params.get('series_id')
+        self.server.request_count += 1
+        self.server.client_addresses.add(self.client_address)
+
+        if not params.get('api_key'):
+            return self._send(400, {'error_code': 400, 'error_message': 'Missing api_key'})
+        self.server.key_counts[params['api_key']] += 1
+        if params['api_key'] in self.server.exhausted_keys:
+            return self._send(429, {'error_code': 429, 'error_message': 'Too Many Requests'})
+        if not series_id:
+            return self._send(400, {'error_code': 400, 'error_message': 'Missing series_id'})
+
+        if url.path.endswith('/series/observations'):
+            payload = self.data.observations(
+                series_id, params.get('observation_start'), params.get('observation_end')
+            )
+        elif url.path.endswith('/series'):
+            payload = self.data.info(series_id)
+        else:
+            return self._send(404, {'error_code': 404, 'error_message': 'Not found'})
+        self._send(200, payload)
+
+    def do_POST(self):
+        # Stand-in for an alert webhook receiver
+        if urlparse(self.path).path != '/webhook':
+            return self._send(404, {'error_code': 404, 'error_message': 'Not found'})
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.webhooks.append(json.loads(body))
+        self._send(200, {'received': len(self.server.webhooks)})
+
+    def _send(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_fixture_server(host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Create the fixture server with request counters (add keys to exhausted_keys to get 429s)"""
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    server.daemon_threads = True
+    server.request_count = 0
+    server.key_counts = Counter()
+    server.exhausted_keys = set()
+    server.client_addresses = set()
+    server.webhooks = []
+    return server
+
+
+def start_fixture_server(host: str = '127.0.0.1', port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the fixture server on a background thread
+
+    Returns:
+        Tuple of (server, base URL to use as FRED_API_BASE_URL)
+    """
+    server = create_fixture_server(host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}/fred'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local stand-in for the FRED API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = create_fixture_server(args.host, args.port)
+    print(f"FRED fixture serving on http://{args.host}:{args.port}/fred")
+    server.serve_forever()
@@ -0,0 +1,36 @@
+"""
+Lazy Imports - Defers loading heavy dependencies until they are first used
+"""
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first attribute access instead of immediately
+
+    Modules using this should add `from __future__ import annotations` so type
+    hints like `pd.Series` don't trigger the import at definition time.
+
+    Args:
+        name: Fully qualified module name (e.g. 'pandas')
+
+    Returns:
+        The module, or a placeholder that loads it when an attribute is read
+    """
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ImportError(f"No module named '{name}'")
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
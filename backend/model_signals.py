@@ -0,0 +1,129 @@
+"""
+Model Signals - Curve fit, recession probability and Taylor-rule gap computed off the request path
+
+Together the models read about a dozen series beyond the headline indicators, so
+computing them inside a request made a cold /api/policy-stance wait on every one of
+those fetches. Here they are recomputed on a background thread, at background fetch
+priority, whenever new data lands (and every CACHE_DURATION so expired inputs get
+refetched). Requests read the latest results, which are None until the first
+computation finishes.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import logging
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSignals:
+    """Latest outputs of the term structure, recession and Taylor-rule models"""
+
+    def __init__(self, fred_client, term_structure=None, recession_model=None,
+                 taylor_rule=None, debounce: float = None, interval: float = None):
+        """
+        Initialize the signals
+
+        Args:
+            fred_client: FREDClient the models read from
+            term_structure: Optional TermStructure providing 'term_structure'
+            recession_model: Optional RecessionModel providing 'recession_probability'
+            taylor_rule: Optional TaylorRule providing 'policy_gap'
+            debounce: Seconds to wait for more data before recomputing
+                (default config.ALERT_DEBOUNCE)
+            interval: Seconds between recomputations without new data
+                (default config.CACHE_DURATION)
+        """
+        self.fred_client = fred_client
+        self.sources: Dict[str, Callable] = {}
+        if term_structure is not None:
+            self.sources['term_structure'] = term_structure.signals
+        if recession_model is not None:
+            self.sources['recession_probability'] = lambda: self._probability(recession_model)
+        if taylor_rule is not None:
+            self.sources['policy_gap'] = taylor_rule.policy_gap
+        self.debounce = config.ALERT_DEBOUNCE if debounce is None else debounce
+        self.interval = interval or config.CACHE_DURATION
+        self._values = {}
+        self._computed_at = None
+        self._elapsed_ms = None
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_source(self, name: str, compute: Callable):
+        """
+        Recompute another value on the same schedule (call before start)
+
+        Args:
+            name: Signal name for get()
+            compute: Callable returning the value; runs at background fetch priority
+        """
+        self.sources[name] = compute
+
+    @staticmethod
+    def _probability(recession_model) -> Optional[float]:
+        current = recession_model.current()
+        return current['probability'] if current else None
+
+    def get(self, name: str):
+        """Latest value of a signal, or None before it has been computed"""
+        return self._values.get(name)
+
+    def refresh(self) -> Dict:
+        """
+        Recompute every signal now (a failing model keeps its previous value)
+
+        Returns:
+            Dictionary of signal name -> value
+        """
+        started = time.perf_counter()
+        values = {}
+        with self.fred_client.background_priority():
+            for name, source in self.sources.items():
+                try:
+                    values[name] = source()
+                except Exception as e:
+                    logger.error(f"Error computing {name}: {str(e)}")
+                    values[name] = self._values.get(name)
+        with self._lock:
+            self._values = values
+            self._computed_at = datetime.now().isoformat()
+            self._elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Computed model signals in {self._elapsed_ms}ms")
+        return values
+
+    def status(self) -> Dict:
+        """When the signals were last computed and how long that took"""
+        with self._lock:
+            return {'computed_at': self._computed_at, 'elapsed_ms': self._elapsed_ms,
+                    'signals': sorted(self.sources)}
+
+    def _on_data(self, series_id: str):
+        self._pending.set()
+
+    def start(self):
+        """Compute now, then again on a background thread as new data lands"""
+        if self._thread is not None or not self.sources:
+            return
+        self._pending.set()
+        self.fred_client.add_listener(self._on_data)
+        self._thread = threading.Thread(target=self._run, name='model-signals', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current computation"""
+        self._stop.set()
+        self._pending.set()
+
+    def _run(self):
+        while True:
+            self._pending.wait(self.interval)
+            if self._stop.wait(self.debounce if self._pending.is_set() else 0):
+                return
+            self._pending.clear()
+            self.refresh()
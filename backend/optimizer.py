@@ -0,0 +1,206 @@
+"""
+Allocation Optimizer - Solves per-regime allocations from stance-labeled asset return history
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+
+from lazy_import import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+import config
+from profile_allocator import round_percentages
+
+logger = logging.getLogger(__name__)
+
+
+def _project(v: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Euclidean projection onto {sum(w) = 1, lower <= w <= upper} by bisection on the shift"""
+    lo, hi = (v - upper).min(), (v - lower).max()
+    for _ in range(60):
+        tau = (lo + hi) / 2
+        if np.clip(v - tau, lower, upper).sum() > 1:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(v - (lo + hi) / 2, lower, upper)
+
+
+class RegimeOptimizer:
+    """Mean-variance or risk-parity allocations estimated separately for each policy stance"""
+
+    def __init__(self, returns: pd.DataFrame, method: str = None, risk_aversion: float = None,
+                 min_weight: float = None, max_weight: float = None, shrinkage: float = None):
+        """
+        Initialize with asset return history
+
+        Args:
+            returns: Monthly returns (decimal) indexed by date, one column per asset class
+            method: 'mean_variance' or 'risk_parity' (default config.OPTIMIZER_METHOD)
+            risk_aversion: Mean-variance risk aversion (default config.OPTIMIZER_RISK_AVERSION)
+            min_weight: Lower bound per asset (default config.OPTIMIZER_MIN_WEIGHT)
+            max_weight: Upper bound per asset (default config.OPTIMIZER_MAX_WEIGHT)
+            shrinkage: Covariance shrinkage toward the diagonal (default config.OPTIMIZER_SHRINKAGE)
+        """
+        self.method = method or config.OPTIMIZER_METHOD
+        if self.method not in ('mean_variance', 'risk_parity'):
+            raise ValueError(f"Unknown optimization method: {self.method}")
+        self.risk_aversion = risk_aversion or config.OPTIMIZER_RISK_AVERSION
+        self.min_weight = config.OPTIMIZER_MIN_WEIGHT if min_weight is None else min_weight
+        self.max_weight = config.OPTIMIZER_MAX_WEIGHT if max_weight is None else max_weight
+        self.shrinkage = config.OPTIMIZER_SHRINKAGE if shrinkage is None else shrinkage
+
+        self.returns = returns.sort_index()
+        self.returns.index = pd.DatetimeIndex(self.returns.index).to_period('M')
+        self._regimes = pd.Series(index=self.returns.index, dtype=object)
+        self._labels_key = None
+        self._labels_version = 0
+        self._stats: Dict[Tuple, Tuple] = {}
+        self._solutions: Dict[Tuple, Tuple[str, np.ndarray]] = {}
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> 'RegimeOptimizer':
+        """Load returns from a CSV with a date column followed by one column per asset class"""
+        returns = pd.read_csv(path, index_col=0, parse_dates=True)
+        logger.info(f"Loaded {len(returns)} months of returns for {len(returns.columns)} assets")
+        return cls(returns, **kwargs)
+
+    @property
+    def labeled(self) -> bool:
+        """Whether update_labels has been called"""
+        return self._labels_key is not None
+
+    def update_labels(self, labels: pd.Series) -> bool:
+        """
+        Label return history with the stance in force at the start of each month
+
+        Args:
+            labels: Stance labels indexed by month (e.g. PolicyAnalyzer.stance_history())
+
+        Returns:
+            True if the labels changed since the last call
+        """
+        key = hashlib.sha1(
+            labels.index.values.tobytes() + '|'.join(labels.values).encode()
+        ).hexdigest()
+        if key == self._labels_key:
+            return False
+
+        # Returns in month t are attributed to the stance observed at the end of t-1;
+        # shifting by calendar month leaves the month after a gap in labels unlabeled
+        by_month = pd.Series(labels.values, index=labels.index.to_period('M').to_timestamp())
+        self._regimes = by_month.shift(1, freq='MS').to_period('M').reindex(self.returns.index)
+        self._labels_key = key
+        self._labels_version += 1
+        return True
+
+    def regime_statistics(self, regime: str,
+                          assets: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Estimate expected returns and shrunk covariance for one regime
+
+        Returns:
+            Tuple of (mean returns, covariance) or None if history is insufficient
+        """
+        # Labels may be updated from another thread; update_labels replaces the
+        # regimes before bumping the version, so these two are never mismatched the
+        # wrong way round (at worst fresh statistics are filed under the old version)
+        version, regimes = self._labels_version, self._regimes
+        cache_key = (regime, tuple(assets))
+        cached = self._stats.get(cache_key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        stats = None
+        if all(asset in self.returns.columns for asset in assets):
+            sample = self.returns.loc[regimes == regime, assets].dropna().values
+            if len(sample) >= config.OPTIMIZER_MIN_OBSERVATIONS:
+                mu = sample.mean(axis=0)
+                cov = np.atleast_2d(np.cov(sample, rowvar=False))
+                cov = (1 - self.shrinkage) * cov + self.shrinkage * np.diag(np.diag(cov))
+                stats = (mu, cov)
+        self._stats[cache_key] = (version, stats)
+        return stats
+
+    def optimize(self, regime: str, assets: List[str]) -> Optional[np.ndarray]:
+        """
+        Solve weights for a regime, reusing the cached solution when inputs are unchanged
+
+        Args:
+            regime: Stance label ('Hawkish', 'Neutral', 'Dovish')
+            assets: Asset classes to allocate across
+
+        Returns:
+            Weights summing to 1, or None if the regime cannot be estimated
+        """
+        stats = self.regime_statistics(regime, assets)
+        if stats is None:
+            return None
+
+        mu, cov = stats
+        input_key = hashlib.sha1(mu.tobytes() + cov.tobytes()).hexdigest()
+        cache_key = (regime, tuple(assets))
+        previous = self._solutions.get(cache_key)
+        if previous and previous[0] == input_key:
+            return previous[1]
+
+        k = len(assets)
+        lower = np.full(k, min(self.min_weight, 1 / k))
+        upper = np.full(k, max(self.max_weight, 1 / k))
+        if self.method == 'risk_parity':
+            weights = self._solve_risk_parity(cov, lower, upper)
+        else:
+            warm_start = previous[1] if previous else None
+            weights = self._solve_mean_variance(mu, cov, lower, upper, warm_start)
+
+        self._solutions[cache_key] = (input_key, weights)
+        logger.info(f"Solved {self.method} allocation for {regime} regime")
+        return weights
+
+    def allocation(self, regime: str, assets: List[str]) -> Optional[Dict[str, int]]:
+        """Get optimized whole-percentage allocation for a regime"""
+        weights = self.optimize(regime, assets)
+        if weights is None:
+            return None
+        percentages = round_percentages(weights[None, :])[0]
+        return dict(zip(assets, percentages.tolist()))
+
+    def _solve_mean_variance(self, mu: np.ndarray, cov: np.ndarray, lower: np.ndarray,
+                             upper: np.ndarray, warm_start: np.ndarray = None,
+                             max_iter: int = 500, tol: float = 1e-10) -> np.ndarray:
+        """Maximize mu'w - (risk_aversion / 2) w'Cw with projected gradient ascent"""
+        if warm_start is None:
+            # Closed-form budget-constrained solution as the starting point
+            inv = np.linalg.pinv(cov)
+            ones = np.ones(len(mu))
+            gamma = (ones @ inv @ mu - self.risk_aversion) / (ones @ inv @ ones)
+            warm_start = inv @ (mu - gamma) / self.risk_aversion
+
+        weights = _project(warm_start, lower, upper)
+        step = 1 / (self.risk_aversion * np.linalg.eigvalsh(cov)[-1])
+        for _ in range(max_iter):
+            gradient = mu - self.risk_aversion * cov @ weights
+            updated = _project(weights + step * gradient, lower, upper)
+            if np.abs(updated - weights).max() < tol:
+                return updated
+            weights = updated
+        return weights
+
+    def _solve_risk_parity(self, cov: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                           max_iter: int = 500, tol: float = 1e-10) -> np.ndarray:
+        """Equalize risk contributions by multiplicative fixed-point updates"""
+        weights = 1 / np.sqrt(np.diag(cov))
+        weights /= weights.sum()
+        target = 1 / len(weights)
+        for _ in range(max_iter):
+            contribution = weights * (cov @ weights)
+            contribution /= contribution.sum()
+            updated = weights * np.sqrt(target / contribution)
+            updated /= updated.sum()
+            if np.abs(updated - weights).max() < tol:
+                weights = updated
+                break
+            weights = updated
+        return _project(weights, lower, upper)
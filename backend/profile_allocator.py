@@ -0,0 +1,200 @@
+"""
+Profile Allocator - Adapts a stance allocation to many client risk profiles at once
+"""
+from __future__ import annotations
+from typing import Dict, List, Tuple
+import logging
+
+from lazy_import import lazy_import
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Relative risk of each asset class (0 = defensive, 1 = aggressive)
+ASSET_RISK = {
+    'Cash/Money Market': 0.0,
+    'Short-term Bonds (< 2yr)': 0.15,
+    'Intermediate Bonds (2-10yr)': 0.3,
+    'Long-term Bonds (10+ yr)': 0.4,
+    'Commodities/TIPS': 0.5,
+    'Alternative Assets': 0.6,
+    'Value Stocks': 0.7,
+    'REITs': 0.75,
+    'Broad Equity Index': 0.8,
+    'International Equity': 0.8,
+    'Growth Stocks': 0.9,
+    'Small-cap Equity': 1.0,
+}
+
+# Named risk tolerances mapped onto the 0-1 scale
+RISK_TOLERANCE_LEVELS = {
+    'conservative': 0.2,
+    'moderate': 0.5,
+    'aggressive': 0.8,
+}
+
+# How strongly a full tilt shifts weight between defensive and aggressive assets
+TILT_STRENGTH = 2.0
+# Horizon (years) at which no horizon adjustment is applied
+NEUTRAL_HORIZON_YEARS = 5
+# Passes of clip-and-redistribute used to satisfy min/max constraints
+CONSTRAINT_ITERATIONS = 20
+
+
+class ProfileBatch:
+    """Client profiles parsed into arrays for vectorized allocation"""
+
+    def __init__(self, ids: List, tilt: np.ndarray, lower: np.ndarray,
+                 upper: np.ndarray, errors: Dict[int, str]):
+        self.ids = ids
+        self.tilt = tilt
+        self.lower = lower
+        self.upper = upper
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _risk_score(tolerance) -> float:
+    """Convert a named or 1-10 numeric risk tolerance to the 0-1 scale"""
+    if isinstance(tolerance, str):
+        if tolerance.lower() not in RISK_TOLERANCE_LEVELS:
+            raise ValueError(f"Unknown risk tolerance: {tolerance}")
+        return RISK_TOLERANCE_LEVELS[tolerance.lower()]
+    value = float(tolerance)
+    if not np.isfinite(value) or not 1 <= value <= 10:
+        raise ValueError("Numeric risk tolerance must be between 1 and 10")
+    return (value - 1) / 9
+
+
+def _percent(value, asset: str) -> float:
+    """Convert a constraint percentage to a 0-1 weight, rejecting non-finite values"""
+    value = float(value)
+    if not np.isfinite(value):
+        raise ValueError(f"Constraint for {asset} must be a finite percentage")
+    return value / 100
+
+
+def parse_profiles(profiles: List[Dict], assets: List[str]) -> ProfileBatch:
+    """
+    Parse client profiles into tilt and bound arrays
+
+    Args:
+        profiles: Dictionaries with id, risk_tolerance, horizon_years and optional
+            constraints {'min': {asset: pct}, 'max': {asset: pct}, 'exclude': [asset]}
+        assets: Asset classes of the base allocation, in column order
+
+    Returns:
+        ProfileBatch; invalid profiles are recorded in errors and left unconstrained
+    """
+    n, k = len(profiles), len(assets)
+    column = {asset: j for j, asset in enumerate(assets)}
+    risk = np.full(n, 0.5)
+    horizon = np.full(n, float(NEUTRAL_HORIZON_YEARS))
+    lower = np.zeros((n, k))
+    upper = np.ones((n, k))
+    ids, errors = [], {}
+
+    for i, profile in enumerate(profiles):
+        ids.append(profile.get('id', i) if isinstance(profile, dict) else i)
+        try:
+            if not isinstance(profile, dict):
+                raise ValueError("Profile must be an object")
+            risk[i] = _risk_score(profile.get('risk_tolerance', 'moderate'))
+            horizon[i] = float(profile.get('horizon_years', NEUTRAL_HORIZON_YEARS))
+            if not np.isfinite(horizon[i]):
+                raise ValueError("horizon_years must be a finite number")
+
+            constraints = profile.get('constraints') or {}
+            if not isinstance(constraints, dict):
+                raise ValueError("constraints must be an object")
+            for asset, pct in (constraints.get('min') or {}).items():
+                lower[i, column[asset]] = _percent(pct, asset)
+            for asset, pct in (constraints.get('max') or {}).items():
+                upper[i, column[asset]] = _percent(pct, asset)
+            for asset in constraints.get('exclude') or []:
+                upper[i, column[asset]] = 0.0
+
+            if lower[i].sum() > 1 or upper[i].sum() < 1 or (lower[i] > upper[i]).any():
+                raise ValueError("Constraints cannot be satisfied")
+        except KeyError as e:
+            errors[i] = f"Unknown asset class in constraints: {e.args[0]}"
+        except (AttributeError, TypeError, ValueError) as e:
+            errors[i] = str(e)
+
+    if errors:
+        bad = list(errors)
+        risk[bad], horizon[bad] = 0.5, NEUTRAL_HORIZON_YEARS
+        lower[bad], upper[bad] = 0.0, 1.0
+
+    horizon_adjustment = np.clip((horizon - NEUTRAL_HORIZON_YEARS) / 10, -1, 1) * 0.5
+    tilt = np.clip(2 * (risk - 0.5) + horizon_adjustment, -1, 1)
+    return ProfileBatch(ids, tilt, lower, upper, errors)
+
+
+def _apply_bounds(weights: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Clip rows to bounds and redistribute the difference across unbound assets"""
+    for _ in range(CONSTRAINT_ITERATIONS):
+        weights = np.clip(weights, lower, upper)
+        gap = 1 - weights.sum(axis=1, keepdims=True)
+        if np.abs(gap).max() < 1e-9:
+            break
+        # Spread the gap in proportion to current weights of assets that can move,
+        # falling back to available room when those weights are all zero
+        room = np.where(gap > 0, upper - weights, weights - lower)
+        basis = np.where(room > 1e-12, np.where(gap > 0, weights, room), 0.0)
+        basis = np.where(basis.sum(axis=1, keepdims=True) > 0, basis, room)
+        total = basis.sum(axis=1, keepdims=True)
+        share = np.divide(basis, total, out=np.zeros_like(basis), where=total > 0)
+        weights = weights + gap * share
+    return weights
+
+
+def round_percentages(weights: np.ndarray, upper: np.ndarray = None) -> np.ndarray:
+    """
+    Round rows of weights to whole percentages summing to 100 (largest remainder)
+
+    Args:
+        weights: Rows of weights summing to 1
+        upper: Optional per-asset maximum weights; assets already at their maximum
+            whole percentage are never rounded up past it
+
+    Returns:
+        Integer percentage matrix
+    """
+    scaled = weights * 100
+    floors = np.floor(scaled + 1e-9)
+    shortfall = (100 - floors.sum(axis=1)).astype(int)
+    remainder = scaled - floors
+    if upper is not None:
+        # Rank capped assets after every asset that still has room for another point
+        capped = floors + 1 > np.floor(upper * 100 + 1e-9)
+        remainder = np.where(capped, remainder - 2, remainder)
+    order = np.argsort(-remainder, axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(weights.shape[1])[None, :], axis=1)
+    return (floors + (ranks < shortfall[:, None])).astype(int)
+
+
+def allocate(base_allocation: Dict[str, int],
+             batch: ProfileBatch) -> Tuple[List[str], np.ndarray]:
+    """
+    Tilt a base allocation toward or away from risk for every profile
+
+    Args:
+        base_allocation: Asset class -> percentage for the current stance
+        batch: Parsed profiles
+
+    Returns:
+        Tuple of (asset classes, integer percentage matrix with one row per profile)
+    """
+    assets = list(base_allocation)
+    base = np.array([base_allocation[a] for a in assets], dtype=float) / 100
+    asset_risk = np.array([ASSET_RISK.get(a, 0.5) for a in assets])
+    centered = asset_risk - base @ asset_risk
+
+    weights = base * np.exp(TILT_STRENGTH * batch.tilt[:, None] * centered)
+    weights /= weights.sum(axis=1, keepdims=True)
+    weights = _apply_bounds(weights, batch.lower, batch.upper)
+    return assets, round_percentages(weights, batch.upper)
@@ -0,0 +1,268 @@
+"""
+Profiling - cProfile for individual requests on demand, and an always-on sampling profiler
+"""
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import atexit
+import cProfile
+import hmac
+import io
+import itertools
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SORT_KEYS = ['cumulative', 'tottime', 'calls', 'ncalls', 'time']
+
+
+class RequestProfiles:
+    """Profiles of individual requests, kept in memory and optionally saved as .prof files"""
+
+    def __init__(self, history: int = None, directory: str = None):
+        """
+        Initialize an empty store
+
+        Args:
+            history: Profiles kept in memory (default config.PROFILE_HISTORY)
+            directory: Where to also save each profile for snakeviz/pstats
+                (default config.PROFILE_DIR; None keeps them in memory only)
+        """
+        self._profiles = deque(maxlen=history or config.PROFILE_HISTORY)
+        self.directory = config.PROFILE_DIR if directory is None else directory
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def start() -> cProfile.Profile:
+        """Start profiling the calling thread"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, path: str, status: int,
+               duration: float) -> int:
+        """
+        Stop a profiler and store what it recorded
+
+        Args:
+            profiler: Profiler from start(), on the same thread
+            method: HTTP method of the profiled request
+            path: Request path (with query string)
+            status: Response status code
+            duration: Seconds the request took
+
+        Returns:
+            Profile ID
+        """
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        with self._lock:
+            profile_id = next(self._ids)
+            self._profiles.append({
+                'id': profile_id,
+                'method': method,
+                'path': path,
+                'status': status,
+                'duration_ms': round(duration * 1000, 2),
+                'created_at': datetime.now().isoformat(),
+                'stats': stats
+            })
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                stats.dump_stats(os.path.join(self.directory, f'request-{os.getpid()}-{profile_id}.prof'))
+            except OSError as e:
+                logger.error(f"Could not save profile {profile_id}: {str(e)}")
+        logger.info(f"Profiled {method} {path} in {duration * 1000:.1f}ms (profile {profile_id})")
+        return profile_id
+
+    def list(self) -> List[Dict]:
+        """Stored profiles, newest first, without their stats"""
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != 'stats'} for p in reversed(self._profiles)]
+
+    def _get(self, profile_id: int) -> Dict:
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        raise KeyError(f"No profile {profile_id}")
+
+    def report(self, profile_id: int, sort: str = 'cumulative', limit: int = 40) -> str:
+        """
+        Text report of a stored profile, as printed by pstats
+
+        Args:
+            profile_id: ID from finish()
+            sort: pstats sort key ('cumulative', 'tottime', 'calls', ...)
+            limit: Functions listed
+
+        Returns:
+            Report text
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort: {sort} (choose from {', '.join(SORT_KEYS)})")
+        profile = self._get(profile_id)
+        out = io.StringIO()
+        stats = pstats.Stats(stream=out)
+        stats.add(profile['stats'])  # a copy, since strip_dirs() modifies it
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        header = (f"{profile['method']} {profile['path']} -> {profile['status']} "
+                  f"in {profile['duration_ms']}ms ({profile['created_at']})\n")
+        return header + out.getvalue()
+
+    def raw(self, profile_id: int) -> bytes:
+        """Profile in the .prof format read by pstats.Stats() and snakeviz"""
+        return marshal.dumps(self._get(profile_id)['stats'].stats)
+
+
+def _frame_label(code) -> str:
+    """module:function for backend code, otherwise package/module:function"""
+    path = code.co_filename
+    if path.startswith(BACKEND_DIR):
+        module = os.path.splitext(os.path.relpath(path, BACKEND_DIR))[0]
+    else:
+        parts = path.replace('\\', '/').split('/')
+        module = '/'.join(parts[-2:])[:-3] if path.endswith('.py') else path
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's stack at a fixed interval and aggregates collapsed stacks
+
+    Only samples of threads running code in the watched modules are kept, so
+    idle workers and the server loop don't drown out the application paths.
+    Stacks start at the outermost watched frame and are written in the
+    collapsed format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = None, modules: Iterable[str] = None, output: str = None):
+        """
+        Initialize a stopped profiler
+
+        Args:
+            interval: Seconds between samples (default config.PROFILER_SAMPLE_INTERVAL, or 0.01)
+            modules: Backend modules whose code paths are recorded
+                (default config.PROFILER_MODULES)
+            output: File the collapsed stacks are written to when stopped
+                (default sampling-<pid>.collapsed in config.PROFILE_DIR, if set)
+        """
+        self.interval = interval or config.PROFILER_SAMPLE_INTERVAL or 0.01
+        self.modules = set(modules or config.PROFILER_MODULES)
+        if output is None and config.PROFILE_DIR:
+            output = os.path.join(config.PROFILE_DIR, f'sampling-{os.getpid()}.collapsed')
+        self.output = output
+        self._files = {os.path.join(BACKEND_DIR, f'{module}.py') for module in self.modules}
+        self._labels = {}
+        self._stacks = Counter()
+        self._samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = None
+        self._busy = 0.0
+
+    def start(self):
+        """Start sampling on a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Sampling profiler started ({1 / self.interval:.0f} Hz, "
+                    f"modules: {', '.join(sorted(self.modules))})")
+
+    def stop(self):
+        """Stop sampling and save the collapsed stacks to the output file (stacks are kept)"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self.output:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+                with open(self.output, 'w') as f:
+                    f.write(self.collapsed())
+                logger.info(f"Saved sampled stacks to {self.output}")
+            except OSError as e:
+                logger.error(f"Could not save sampled stacks: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            self.sample()
+            self._busy += time.perf_counter() - started
+
+    def sample(self):
+        """Record the current stack of every other thread running inside a watched module"""
+        own = threading.get_ident()
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            codes = []
+            watched = None
+            while frame is not None:
+                code = frame.f_code
+                codes.append(code)
+                if code.co_filename in self._files:
+                    watched = len(codes)
+                frame = frame.f_back
+            if watched is not None:
+                stacks.append(';'.join(self._label(code) for code in reversed(codes[:watched])))
+        with self._lock:
+            self._stacks.update(stacks)
+            self._samples += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def collapsed(self) -> str:
+        """Aggregated stacks, one 'frame;frame;frame count' line each"""
+        with self._lock:
+            return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def reset(self):
+        """Drop the aggregated stacks"""
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
+
+    def status(self) -> Dict:
+        """Sampling settings, samples taken and the share of time spent sampling"""
+        running = self._thread is not None
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        with self._lock:
+            return {
+                'running': running,
+                'interval_s': self.interval,
+                'modules': sorted(self.modules),
+                'samples': self._samples,
+                'stacks': len(self._stacks),
+                'recorded': sum(self._stacks.values()),
+                'overhead': round(self._busy / elapsed, 4) if elapsed else None
+            }
+
+
+def token_valid(token: Optional[str]) -> bool:
+    """Check a request's token against config.PROFILING_TOKEN (profiling is off without one)"""
+    return bool(config.PROFILING_TOKEN and token
+                and hmac.compare_digest(token.encode(), config.PROFILING_TOKEN.encode()))
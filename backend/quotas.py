@@ -0,0 +1,176 @@
+"""
+Tenant Quotas - Per-tenant request rate limits on the API, so one noisy client can't starve the rest
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Mapping, Optional
+import hashlib
+import ipaddress
+import json
+import logging
+import threading
+
+from fetch_scheduler import TokenBucket
+import config
+
+logger = logging.getLogger(__name__)
+
+# IPv6 clients get a whole /64 each, so addresses within one share a bucket
+IPV6_PREFIX = 64
+
+
+def _digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def _load_json(path: str, what: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load {what} from {path}: {str(e)}")
+        return {}
+
+
+def client_address(remote_addr: Optional[str]) -> str:
+    """Tenant name for an unauthenticated client: its IPv4 address or IPv6 /64"""
+    try:
+        address = ipaddress.ip_address(remote_addr or '')
+    except ValueError:
+        return remote_addr or 'unknown'
+    if address.version == 6:
+        if address.ipv4_mapped is not None:
+            return str(address.ipv4_mapped)
+        return str(ipaddress.ip_network(f"{address}/{IPV6_PREFIX}", strict=False))
+    return str(address)
+
+
+class TenantQuotas:
+    """
+    Token bucket per tenant, created on first request
+
+    Tenants named by an API key or an override are always tracked; anonymous clients
+    are forgotten when idle longest, so they can't evict the named tenants' buckets.
+    """
+
+    def __init__(self, rate_per_minute: float = None, burst: float = None,
+                 overrides: Mapping[str, Mapping] = None, max_tracked: int = None,
+                 api_keys: Mapping[str, str] = None, trusted_proxies: Iterable[str] = None):
+        """
+        Initialize quotas
+
+        Args:
+            rate_per_minute: Requests per minute for each tenant
+                (default config.TENANT_RATE_LIMIT_PER_MINUTE)
+            burst: Requests allowed back-to-back (default config.TENANT_RATE_LIMIT_BURST)
+            overrides: Tenant -> {"rate_per_minute", "burst"} for tenants with their own limits
+            max_tracked: Anonymous clients tracked at once (default config.TENANT_MAX_TRACKED)
+            api_keys: Issued API key -> tenant name
+            trusted_proxies: Addresses whose tenant header is believed
+                (default config.TENANT_TRUSTED_PROXIES)
+        """
+        self.rate_per_minute = rate_per_minute or config.TENANT_RATE_LIMIT_PER_MINUTE
+        self.burst = burst or config.TENANT_RATE_LIMIT_BURST
+        self.overrides = {tenant: dict(limits) for tenant, limits in (overrides or {}).items()}
+        self.max_tracked = max_tracked or config.TENANT_MAX_TRACKED
+        self._key_tenants = {_digest(key): tenant for key, tenant in (api_keys or {}).items()}
+        self.trusted_proxies = set(config.TENANT_TRUSTED_PROXIES if trusted_proxies is None
+                                   else trusted_proxies)
+        self._named = set(self.overrides) | set(self._key_tenants.values())
+        self._named_buckets: Dict[str, TokenBucket] = {}
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'allowed': 0, 'rejected': 0}
+
+    @classmethod
+    def from_config(cls) -> Optional['TenantQuotas']:
+        """
+        Build quotas from config, or None when they are disabled
+
+        Returns:
+            TenantQuotas if TENANT_RATE_LIMIT_PER_MINUTE or TENANT_QUOTAS_FILE is set
+        """
+        overrides = {}
+        if config.TENANT_QUOTAS_FILE:
+            overrides = _load_json(config.TENANT_QUOTAS_FILE, 'tenant quotas')
+        if not config.TENANT_RATE_LIMIT_PER_MINUTE and not overrides:
+            return None
+        api_keys = {}
+        if config.TENANT_KEYS_FILE:
+            api_keys = _load_json(config.TENANT_KEYS_FILE, 'tenant API keys')
+        return cls(overrides=overrides, api_keys=api_keys)
+
+    def identify(self, api_key: Optional[str], tenant_header: Optional[str],
+                 remote_addr: Optional[str]) -> str:
+        """
+        Tenant making a request
+
+        Args:
+            api_key: Value of the API key header, if sent
+            tenant_header: Value of the tenant header, if sent
+            remote_addr: Address the request came from
+
+        Returns:
+            The tenant of an issued API key, else the tenant header when the request
+            comes from a trusted proxy, else the client address
+        """
+        if api_key:
+            tenant = self._key_tenants.get(_digest(api_key))
+            if tenant is not None:
+                return tenant
+        if tenant_header and remote_addr in self.trusted_proxies:
+            return tenant_header
+        return client_address(remote_addr)
+
+    def limits(self, tenant: str) -> Dict:
+        """Rate per minute and burst that apply to a tenant"""
+        limits = self.overrides.get(tenant, {})
+        return {'rate_per_minute': limits.get('rate_per_minute', self.rate_per_minute),
+                'burst': limits.get('burst', self.burst)}
+
+    def _bucket(self, tenant: str) -> Optional[TokenBucket]:
+        with self._lock:
+            if tenant in self._named_buckets:
+                return self._named_buckets[tenant]
+            bucket = self._buckets.get(tenant)
+            if bucket is not None:
+                self._buckets.move_to_end(tenant)
+                return bucket
+            limits = self.limits(tenant)
+            if not limits['rate_per_minute']:
+                return None  # No limit for this tenant
+            bucket = TokenBucket(limits['rate_per_minute'] / 60, limits['burst'])
+            if tenant in self._named:
+                self._named_buckets[tenant] = bucket
+                return bucket
+            self._buckets[tenant] = bucket
+            if len(self._buckets) > self.max_tracked:
+                self._buckets.popitem(last=False)
+            return bucket
+
+    def check(self, tenant: str) -> float:
+        """
+        Count a request against a tenant's quota
+
+        Args:
+            tenant: Tenant identifier
+
+        Returns:
+            0 if the request may proceed, otherwise seconds until it would be allowed
+        """
+        bucket = self._bucket(tenant)
+        wait = bucket.try_acquire() if bucket is not None else 0.0
+        with self._lock:
+            self.stats['allowed' if wait == 0 else 'rejected'] += 1
+        if wait:
+            logger.warning(f"Quota exceeded for tenant {tenant}")
+        return wait
+
+    def metrics(self) -> Dict:
+        """Get default limits, tenants tracked and request counters"""
+        with self._lock:
+            return {
+                'rate_per_minute': self.rate_per_minute,
+                'burst': self.burst,
+                'tenants_tracked': len(self._named_buckets) + len(self._buckets),
+                **self.stats
+            }
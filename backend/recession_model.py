@@ -0,0 +1,250 @@
+"""
+Recession Model - Logit of the NBER recession indicator (USREC) on lagged macro indicators
+
+Fit offline and save the coefficients for the API to load:
+
+    python recession_model.py --output models/recession.json
+    RECESSION_MODEL_FILE=models/recession.json python app.py
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import argparse
+import json
+import logging
+import math
+
+from lazy_import import lazy_import
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ['term_spread', 'unemployment_change']
+
+
+def fit_logit(X: np.ndarray, y: np.ndarray, max_iter: int = 50, tol: float = 1e-8,
+              ridge: float = 1e-6) -> Tuple[np.ndarray, int, bool]:
+    """
+    Fit a logistic regression by iteratively reweighted least squares (Newton's method)
+
+    Args:
+        X: (n, k) design matrix including an intercept column
+        y: (n,) 0/1 outcomes
+        max_iter: Maximum Newton steps
+        tol: Stop when no coefficient moves more than this
+        ridge: Small L2 penalty keeping the Hessian invertible under separation
+
+    Returns:
+        Tuple of (coefficients, iterations, converged)
+    """
+    beta = np.zeros(X.shape[1])
+    penalty = ridge * np.eye(X.shape[1])
+    for iteration in range(1, max_iter + 1):
+        p = 1 / (1 + np.exp(-(X @ beta)))
+        weights = np.clip(p * (1 - p), 1e-10, None)
+        hessian = (X.T * weights) @ X + penalty
+        step = np.linalg.solve(hessian, X.T @ (y - p) - penalty @ beta)
+        beta = beta + step
+        if np.abs(step).max() < tol:
+            return beta, iteration, True
+    return beta, max_iter, False
+
+
+def _log_likelihood(p: np.ndarray, y: np.ndarray) -> float:
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return float(np.sum(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def recession_ahead(recessions: pd.Series, horizon: int) -> pd.Series:
+    """
+    Whether a recession month falls within the next `horizon` months
+
+    Args:
+        recessions: Monthly (MS) 0/1 recession indicator
+        horizon: Months ahead
+
+    Returns:
+        Series indexed like recessions: max of the indicator over months t+1..t+h,
+        NaN where the window runs past the data
+    """
+    window_max = recessions.rolling(horizon, min_periods=horizon).max()
+    return window_max.shift(-horizon, freq='MS').reindex(recessions.index)
+
+
+class RecessionModel:
+    """Probability of recession within a horizon, refit only when its inputs change"""
+
+    def __init__(self, fred_client, horizon: int = None, coefficients_file: str = None):
+        """
+        Initialize the model
+
+        Args:
+            fred_client: FREDClient used to load USREC and the indicators
+            horizon: Months ahead predicted (default config.RECESSION_HORIZON_MONTHS)
+            coefficients_file: JSON written by save(); when given the stored fit is
+                used as-is instead of refitting (default config.RECESSION_MODEL_FILE)
+        """
+        self.fred_client = fred_client
+        self.horizon = horizon or config.RECESSION_HORIZON_MONTHS
+        self._key = None
+        self._features = None
+        self._recessions = None
+        self._fit = None
+        self._fixed = False
+        self._history = None
+        self._current = None
+
+        coefficients_file = coefficients_file or config.RECESSION_MODEL_FILE
+        if coefficients_file:
+            self.load(coefficients_file)
+
+    def _load_data(self) -> Tuple[pd.DataFrame, pd.Series, tuple]:
+        """Monthly features and recession indicator, with a key identifying the inputs"""
+        registry = self.fred_client.registry
+        series = {
+            name: self.fred_client.get_series(registry.series_id(name))
+            for name in ('treasury_10y', 'treasury_3m', 'unemployment', 'recession')
+        }
+        key = tuple(id(data) for data in series.values())
+        if key == self._key:
+            return self._features, self._recessions, key
+
+        monthly = {name: data.resample('MS') for name, data in series.items()}
+        features = pd.DataFrame({
+            'term_spread': monthly['treasury_10y'].mean() - monthly['treasury_3m'].mean(),
+            'unemployment_change': monthly['unemployment'].last().diff(12),
+        })[FEATURES]
+        return features, monthly['recession'].last(), key
+
+    def _refresh(self):
+        """Reload inputs and refit (unless using stored coefficients) when they changed"""
+        features, recessions, key = self._load_data()
+        if key == self._key and self._fit is not None:
+            return
+        self._features, self._recessions, self._key = features, recessions, key
+        self._history = None
+        self._current = None
+        if not self._fixed:
+            self._fit = self._estimate(features, recessions)
+
+    def _estimate(self, features: pd.DataFrame, recessions: pd.Series) -> Dict:
+        """Fit the logit of recession within `horizon` months on current features"""
+        target = recession_ahead(recessions, self.horizon).rename('target')
+        data = features.join(target, how='inner').dropna()
+        if len(data) < 24 or data['target'].nunique() < 2:
+            raise ValueError("Not enough recession history to fit the model")
+
+        X = np.column_stack([np.ones(len(data)), data[FEATURES].values])
+        y = data['target'].values
+        beta, iterations, converged = fit_logit(X, y)
+        if not converged:
+            logger.warning(f"Recession model did not converge in {iterations} iterations")
+
+        log_likelihood = _log_likelihood(1 / (1 + np.exp(-(X @ beta))), y)
+        null_log_likelihood = _log_likelihood(np.full(len(y), y.mean()), y)
+        logger.info(f"Fitted recession model on {len(y)} months")
+        return {
+            'coefficients': dict(zip(['intercept'] + FEATURES, beta.tolist())),
+            'horizon_months': self.horizon,
+            'observations': int(len(y)),
+            'log_likelihood': log_likelihood,
+            'pseudo_r2': 1 - log_likelihood / null_log_likelihood,
+            'iterations': iterations,
+            'converged': converged,
+            'trained_through': data.index[-1].strftime('%Y-%m-%d'),
+            'fitted_at': datetime.now().isoformat()
+        }
+
+    def fit(self) -> Dict:
+        """
+        Get the current fit, refitting first if the input data changed
+
+        Returns:
+            Dictionary with coefficients, horizon and fit statistics
+        """
+        self._refresh()
+        return self._fit
+
+    def score(self, term_spread: float, unemployment_change: float) -> float:
+        """Recession probability for one set of indicator values (no data access)"""
+        c = self._fit['coefficients']
+        z = (c['intercept'] + c['term_spread'] * term_spread
+             + c['unemployment_change'] * unemployment_change)
+        return 1 / (1 + math.exp(-z))
+
+    def current(self) -> Optional[Dict]:
+        """
+        Probability of recession within the horizon from the latest indicators
+
+        Returns:
+            Dictionary with probability, the feature month and feature values,
+            or None if no month has every feature
+        """
+        self._refresh()
+        if self._current is None:
+            latest = self._features.dropna()
+            if latest.empty:
+                return None
+            row = latest.iloc[-1]
+            self._current = {
+                'probability': self.score(*(float(row[f]) for f in FEATURES)),
+                'as_of': latest.index[-1].strftime('%Y-%m-%d'),
+                'horizon_months': self.horizon,
+                'features': {f: float(row[f]) for f in FEATURES}
+            }
+        return self._current
+
+    def history(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Probability for every month, computed in one vectorized pass and cached
+
+        Returns:
+            DataFrame indexed by feature month with the probability of recession
+            within `horizon` months and the recession indicator for that month
+        """
+        self._refresh()
+        if self._history is None:
+            features = self._features.dropna()
+            c = self._fit['coefficients']
+            z = c['intercept'] + features.values @ np.array([c[f] for f in FEATURES])
+            self._history = pd.DataFrame({
+                'probability': 1 / (1 + np.exp(-z)),
+                'recession': self._recessions.reindex(features.index)
+            }, index=features.index)
+        return self._history.loc[start:end]
+
+    def save(self, path: str):
+        """Write the current fit to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.fit(), f, indent=2)
+        logger.info(f"Saved recession model to {path}")
+
+    def load(self, path: str):
+        """Use a fit saved by save() instead of refitting on data changes"""
+        with open(path) as f:
+            fit = json.load(f)
+        if set(fit['coefficients']) != {'intercept', *FEATURES}:
+            raise ValueError(f"Recession model file {path} has unexpected coefficients")
+        self._fit = fit
+        self.horizon = fit['horizon_months']
+        self._fixed = True
+        logger.info(f"Loaded recession model from {path}")
+
+
+if __name__ == "__main__":
+    from fred_client import FREDClient
+
+    parser = argparse.ArgumentParser(description='Fit the recession probability model')
+    parser.add_argument('--output', help='Write coefficients to this JSON file')
+    parser.add_argument('--horizon', type=int, help='Months ahead to predict')
+    args = parser.parse_args()
+
+    model = RecessionModel(FREDClient(), horizon=args.horizon)
+    fit = model.fit()
+    print(json.dumps(fit, indent=2))
+    print(f"Current probability: {model.current()['probability']:.1%}")
+    if args.output:
+        model.save(args.output)
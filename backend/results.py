@@ -0,0 +1,169 @@
+"""
+Analysis Results - Immutable, slotted result types returned by the analyzer and advisor
+"""
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Mapping, Optional, Tuple
+
+
+def result(cls):
+    """
+    Make a frozen dataclass with __slots__ (dataclass(slots=True) needs Python 3.10)
+
+    Slotted instances carry no per-instance __dict__, so the many small results
+    built per request stay compact.
+    """
+    cls = dataclass(frozen=True)(cls)
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items()
+                 if k not in names and k not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+class Result:
+    """Base for analysis results: serializable with to_dict(), immutable once built"""
+
+    __slots__ = ()
+
+    # Fields left out of to_dict() when None (keeps the JSON shape clients expect)
+    OMIT_IF_NONE = frozenset()
+
+    def to_dict(self) -> Dict:
+        """Shallow dictionary of the fields, for JSON encoding"""
+        return {
+            name: value for name in self.__slots__
+            for value in (getattr(self, name),)
+            if value is not None or name not in self.OMIT_IF_NONE
+        }
+
+    def __reduce__(self):
+        # Frozen slotted instances can't be restored attribute by attribute
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+
+@result
+class StanceAnalysis(Result):
+    """Current policy stance and the signals behind it"""
+    stance: str
+    color: str
+    description: str
+    confidence: int
+    hawkish_signals: int
+    dovish_signals: int
+    rate_momentum: float
+    analysis_date: str
+    policy_gap: Optional[float] = None
+
+    OMIT_IF_NONE = frozenset({'policy_gap'})
+
+
+@result
+class YieldCurveAnalysis(Result):
+    """Shape of the 10Y-2Y curve and the recession risk it implies"""
+    status: str
+    description: str
+    recession_risk: str
+    spread: Optional[float] = None
+    term_structure: Optional[Mapping] = None
+    recession_probability: Optional[float] = None
+
+    OMIT_IF_NONE = frozenset({'spread', 'term_structure', 'recession_probability'})
+
+
+@result
+class InflationPressure(Result):
+    """Inflation relative to the Fed's target"""
+    status: str
+    description: str
+    current_rate: Optional[float] = None
+    target: Optional[float] = None
+    distance_from_target: Optional[float] = None
+    color: Optional[str] = None
+
+    OMIT_IF_NONE = frozenset({'current_rate', 'target', 'distance_from_target', 'color'})
+
+
+@result
+class RateTrajectory(Result):
+    """Direction of recent Fed funds rate changes"""
+    recent_changes: Tuple[Dict, ...]
+    trajectory: str
+    total_change: float
+    num_changes: Optional[int] = None
+
+    OMIT_IF_NONE = frozenset({'num_changes'})
+
+
+@result
+class Recommendation(Result):
+    """Portfolio strategy for a policy stance"""
+    strategy_name: str
+    risk_level: str
+    timeframe: str
+    allocation: Mapping[str, int]
+    key_actions: Tuple[str, ...]
+    rationale: str
+    risks: Tuple[str, ...]
+    opportunities: Tuple[str, ...]
+    allocation_method: Optional[str] = None
+
+    OMIT_IF_NONE = frozenset({'allocation_method'})
+
+    @classmethod
+    def from_content(cls, content: Mapping) -> 'Recommendation':
+        """Build from a strategy content entry"""
+        return cls(**content)
+
+    def with_allocation(self, allocation: Mapping[str, int], method: str) -> 'Recommendation':
+        """Copy with a different allocation and the method that produced it"""
+        return replace(self, allocation=allocation, allocation_method=method)
+
+
+@result
+class AlertEvent(Result):
+    """A transition detected in the indicators (stance flip, inversion, rate move, ...)"""
+    kind: str
+    date: str
+    current: str
+    message: str
+    previous: Optional[str] = None
+    value: Optional[float] = None
+    detected_at: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'AlertEvent':
+        """Rebuild from to_dict() output, e.g. a line of the event log"""
+        return cls(**data)
+
+
+@result
+class SeriesQuality(Result):
+    """Data quality checks of one series, run when it is ingested"""
+    series_id: str
+    frequency: str
+    observations: int
+    missing_values: int
+    gap_count: int
+    missing_periods: int
+    gaps: Tuple[Dict, ...]
+    outlier_count: int
+    outliers: Tuple[Dict, ...]
+    unordered: int
+    flags: Tuple[str, ...]
+    latest_date: Optional[str]
+    latest_value: Optional[float]
+    checked_at: str
+
+
+# Shared instances for results that don't depend on the data
+STANCE_LABELS = {
+    'Hawkish': ('red', 'Tightening policy to combat inflation'),
+    'Dovish': ('green', 'Accommodative policy to support growth'),
+    'Neutral': ('yellow', 'Balanced approach, monitoring data'),
+}
+YIELD_CURVE_UNKNOWN = YieldCurveAnalysis('Unknown', 'Data unavailable', 'Unknown')
+INFLATION_UNKNOWN = InflationPressure('Unknown', 'Data unavailable')
+TRAJECTORY_STABLE = RateTrajectory((), 'Stable', 0)
+TRAJECTORY_UNKNOWN = RateTrajectory((), 'Unknown', 0)
@@ -0,0 +1,181 @@
+"""
+Response Serialization - Content-negotiated encoding and compression of API payloads
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict
+import gzip
+import json
+
+from flask import Response, request
+from flask.json.provider import JSONProvider
+
+import config
+from lazy_import import lazy_import
+from results import Result
+
+np = lazy_import('numpy')
+
+# orjson is in requirements.txt, with the stdlib encoder as a slower fallback;
+# msgpack and brotli are optional extras (gzip always works)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def _default(obj: Any) -> Any:
+    """Encode types the encoders don't handle natively"""
+    if isinstance(obj, Result):
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    kind = getattr(getattr(obj, 'dtype', None), 'kind', None)
+    if kind == 'M' and getattr(obj, 'ndim', 0) > 0:
+        return _iso_dates(obj)
+    if kind == 'f' and getattr(obj, 'ndim', 0) > 0:
+        # orjson writes NaN as null; do the same for the stdlib and MessagePack encoders
+        values = np.asarray(obj)
+        return np.where(np.isnan(values), None, values.astype(object)).tolist()
+    if hasattr(obj, 'tolist'):  # NumPy arrays and scalars
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _iso_dates(values) -> list:
+    """
+    Encode a datetime64 array or DatetimeIndex in one vectorized pass
+
+    Returns:
+        YYYY-MM-DD strings when every value is a midnight (daily and monthly series),
+        ISO timestamps otherwise, with None for NaT
+    """
+    values = np.asarray(values, dtype='datetime64[ns]')
+    missing = np.isnat(values)
+    daily = (values == values.astype('datetime64[D]'))[~missing].all()
+    text = np.datetime_as_string(values, unit='D' if daily else 's').astype(object)
+    text[missing] = None
+    return text.tolist()
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SERIALIZE_NUMPY
+                       | orjson.OPT_NON_STR_KEYS)
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize a payload to UTF-8 JSON"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize a payload to UTF-8 JSON"""
+        return _encoder.encode(obj).encode()
+
+    loads = json.loads
+
+
+def msgpack_dumps(obj: Any) -> bytes:
+    """Serialize a payload to MessagePack"""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+# Response encoders by media type, in order of preference for clients accepting */*
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {JSON_MIMETYPE: dumps}
+if msgpack is not None:
+    ENCODERS[MSGPACK_MIMETYPE] = msgpack_dumps
+    ENCODERS['application/x-msgpack'] = msgpack_dumps
+
+
+def register_encoder(mimetype: str, encoder: Callable[[Any], bytes]):
+    """Make a response format available to clients that request it via Accept"""
+    ENCODERS[mimetype] = encoder
+
+
+def negotiate() -> str:
+    """Pick the response media type for the current request's Accept header"""
+    return request.accept_mimetypes.best_match(list(ENCODERS), default=JSON_MIMETYPE)
+
+
+class ResponseJSONProvider(JSONProvider):
+    """
+    Flask JSON provider that encodes result objects directly
+
+    jsonify() responses are encoded in the format the client's Accept header
+    prefers among ENCODERS (JSON unless MessagePack is asked for).
+    """
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs) -> Any:
+        return loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        mimetype = negotiate()
+        response = self._app.response_class(ENCODERS[mimetype](obj), mimetype=mimetype)
+        response.vary.add('Accept')
+        return response
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress large responses with brotli or gzip, as the client accepts
+
+    Register with app.after_request. Streamed, already-encoded and small
+    responses (under config.COMPRESSION_MIN_SIZE bytes) are left as they are.
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < config.COMPRESSION_MIN_SIZE:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        body, encoding = brotli.compress(body, quality=config.BROTLI_QUALITY), 'br'
+    elif accepted['gzip']:
+        body, encoding = gzip.compress(body, compresslevel=config.GZIP_LEVEL), 'gzip'
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def conditional(etag: str, cache_control: str, build: Callable[[], Response]) -> Response:
+    """
+    Response validated by an ETag, answered with 304 Not Modified when the client's copy matches
+
+    The body is only built when it will be sent. ETags are weak since
+    compression changes the bytes but not the content.
+
+    Args:
+        etag: Version of the resource
+        cache_control: Cache-Control header value
+        build: Function returning the full response
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,126 @@
+"""
+Series Registry - Declares which FRED series the application knows about and who reads them
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SeriesSpec:
+    """A FRED series declared in the registry"""
+    name: str
+    series_id: str
+    consumers: Tuple[str, ...] = ()
+    description: str = ''
+
+
+class SeriesRegistry:
+    """Lookup of declared series by name and by consumer"""
+
+    def __init__(self, specs: List[SeriesSpec] = None):
+        """Initialize the registry with an optional list of series specs"""
+        self._specs: Dict[str, SeriesSpec] = {}
+        self._by_consumer: Dict[str, List[str]] = {}
+        for spec in specs or []:
+            self.register(spec)
+
+    @classmethod
+    def from_config(cls, path: str = None) -> 'SeriesRegistry':
+        """
+        Build the registry from config.FRED_SERIES plus an optional series file
+
+        Args:
+            path: JSON file with extra series (defaults to config.FRED_SERIES_FILE)
+
+        Returns:
+            Populated SeriesRegistry
+        """
+        registry = cls()
+        for name, series_id in config.FRED_SERIES.items():
+            consumers = config.SERIES_CONSUMERS.get(name, ['indicators'])
+            registry.register(SeriesSpec(name, series_id, tuple(consumers)))
+
+        path = path or config.FRED_SERIES_FILE
+        if path:
+            registry.load_file(path)
+        return registry
+
+    def load_file(self, path: str) -> int:
+        """
+        Register series declared in a JSON file
+
+        Args:
+            path: File containing a list of {name, series_id, consumers, description}
+
+        Returns:
+            Number of series registered
+        """
+        with open(path) as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            self.register(SeriesSpec(
+                name=entry['name'],
+                series_id=entry['series_id'],
+                consumers=tuple(entry.get('consumers', [])),
+                description=entry.get('description', '')
+            ))
+        logger.info(f"Registered {len(entries)} series from {path}")
+        return len(entries)
+
+    def register(self, spec: SeriesSpec):
+        """Add or replace a series declaration"""
+        if spec.name in self._specs:
+            self._unindex(self._specs[spec.name])
+        self._specs[spec.name] = spec
+        for consumer in spec.consumers:
+            self._by_consumer.setdefault(consumer, []).append(spec.name)
+
+    def _unindex(self, spec: SeriesSpec):
+        """Remove a series from the consumer index"""
+        for consumer in spec.consumers:
+            self._by_consumer[consumer].remove(spec.name)
+
+    def get(self, name: str) -> Optional[SeriesSpec]:
+        """Get the spec for a series name, or None if undeclared"""
+        return self._specs.get(name)
+
+    def series_id(self, name: str) -> str:
+        """Get the FRED series ID for a series name"""
+        spec = self._specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown series: {name}")
+        return spec.series_id
+
+    def names(self, *consumers: str) -> List[str]:
+        """
+        List series names, optionally restricted to the given consumers
+
+        Args:
+            consumers: Consumer tags (e.g. 'analyzer', 'dashboard'); none means all series
+
+        Returns:
+            Series names in declaration order
+        """
+        if not consumers:
+            return list(self._specs)
+
+        wanted = set()
+        for consumer in consumers:
+            wanted.update(self._by_consumer.get(consumer, []))
+        return [name for name in self._specs if name in wanted]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[SeriesSpec]:
+        return iter(self._specs.values())
+
+    def __len__(self) -> int:
+        return len(self._specs)
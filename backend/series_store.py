@@ -0,0 +1,423 @@
+"""
+Series Store - Local SQLite copy of the cached FRED observations for ad hoc, read-only SQL
+
+    python series_store.py build                        # from the cache snapshot
+    python series_store.py build --fetch                # fetch every registry series first
+    python series_store.py tables
+    python series_store.py query "SELECT date, t10.value - t2.value AS spread
+                                  FROM treasury_10y t10 JOIN treasury_2y t2 USING (date)
+                                  ORDER BY date DESC LIMIT 5"
+
+Observations live in one table clustered by (series_id, date), so each series is
+stored contiguously in date order and a series scan or date range is a single
+b-tree range read. Every registry series also gets a view named after it
+(date, value) and a monthly view (month, mean, last), so queries can join,
+resample and use window functions across series by name. The database is
+rebuilt in the background when cached data changes, and written to a temporary
+file that is renamed into place, so queries never see a partial build. Queries
+open the file read-only and never touch the app's cache or the FRED API.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, Iterable, List
+import argparse
+import atexit
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from lazy_import import lazy_import
+from data_quality import infer_frequency
+import config
+
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE observations (
+    series_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (series_id, date)
+) WITHOUT ROWID;
+CREATE TABLE monthly (
+    series_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    mean REAL,
+    last REAL,
+    PRIMARY KEY (series_id, month)
+) WITHOUT ROWID;
+CREATE TABLE series (
+    name TEXT PRIMARY KEY,
+    series_id TEXT NOT NULL,
+    frequency TEXT,
+    first_date TEXT,
+    last_date TEXT,
+    observations INTEGER,
+    fetched_at TEXT
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Names usable as view names without quoting surprises
+_VIEW_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Statements a read-only query may prepare
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                    getattr(sqlite3, 'SQLITE_RECURSIVE', 33)}
+# Functions that only manufacture large values; nothing in the schema needs them
+_DENIED_FUNCTIONS = {'randomblob', 'zeroblob', 'load_extension'}
+# Longest string or BLOB a query may build, in bytes (enforced on Python 3.11+)
+MAX_VALUE_LENGTH = 1_000_000
+
+
+def _latest_entries(entries: Iterable[Dict]) -> Dict[str, Dict]:
+    """The longest cached copy of each series (cache entries differ by date range)"""
+    latest = {}
+    for entry in entries:
+        current = latest.get(entry['series_id'])
+        if current is None or len(entry['data']) > len(current['data']):
+            latest[entry['series_id']] = entry
+    return latest
+
+
+def _iso_dates(index) -> List[str]:
+    return list(pd.DatetimeIndex(index).strftime('%Y-%m-%d'))
+
+
+def _rows(values) -> list:
+    """Float values with None for missing observations"""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def build_database(path: str, entries: Iterable[Dict], registry, version: str = None) -> int:
+    """
+    Write cached series to a new SQLite database and move it into place
+
+    Args:
+        path: Database file
+        entries: Series in FREDClient.cache_entries() format
+        registry: SeriesRegistry naming the series (unnamed series are stored by ID only)
+        version: Data version the database was built from, kept in the meta table
+
+    Returns:
+        Number of observations written
+    """
+    latest = _latest_entries(entries)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    _remove_temp(temp_path)
+
+    written = 0
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(SCHEMA)
+        for series_id, entry in sorted(latest.items()):
+            data = entry['data'].sort_index()
+            connection.executemany(
+                'INSERT INTO observations VALUES (?, ?, ?)',
+                zip([series_id] * len(data), _iso_dates(data.index), _rows(data.values))
+            )
+            months = data.resample('MS').agg(['mean', 'last'])
+            connection.executemany(
+                'INSERT INTO monthly VALUES (?, ?, ?, ?)',
+                zip([series_id] * len(months), _iso_dates(months.index),
+                    _rows(months['mean'].values), _rows(months['last'].values))
+            )
+            written += len(data)
+
+        for spec in registry:
+            entry = latest.get(spec.series_id)
+            if entry is None or not _VIEW_NAME.match(spec.name):
+                continue
+            dates = entry['data'].index
+            quoted_id = spec.series_id.replace("'", "''")
+            connection.execute(
+                'INSERT INTO series VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (spec.name, spec.series_id, infer_frequency(dates.values),
+                 dates.min().strftime('%Y-%m-%d') if len(dates) else None,
+                 dates.max().strftime('%Y-%m-%d') if len(dates) else None,
+                 len(dates), entry['fetched_at'].isoformat())
+            )
+            connection.execute(f"CREATE VIEW {spec.name} AS SELECT date, value FROM observations "
+                               f"WHERE series_id = '{quoted_id}'")
+            connection.execute(f"CREATE VIEW {spec.name}_monthly AS SELECT month, mean, last "
+                               f"FROM monthly WHERE series_id = '{quoted_id}'")
+
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('data_version', version),
+            ('built_at', datetime.now().isoformat())
+        ])
+        connection.commit()
+        connection.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        connection.close()
+        _remove_temp(temp_path)
+        raise
+    logger.info(f"Built series store with {written} observations of {len(latest)} series at {path}")
+    return written
+
+
+def _remove_temp(temp_path: str):
+    """Delete a partly built database and its rollback journal"""
+    for leftover in (temp_path, f"{temp_path}-journal"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def _authorize(action, arg1, arg2, *args):
+    if action == sqlite3.SQLITE_FUNCTION and (arg2 or '').lower() in _DENIED_FUNCTIONS:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class SeriesStore:
+    """Read-only SQL over a database built from the client cache, rebuilt when the data changes"""
+
+    def __init__(self, fred_client=None, path: str = None, debounce: float = None):
+        """
+        Initialize the store
+
+        Args:
+            fred_client: FREDClient whose cache is stored (only needed for building)
+            path: Database file (default config.QUERY_DB_FILE)
+            debounce: Seconds to wait for more data before rebuilding
+                (default config.QUERY_DB_DEBOUNCE)
+        """
+        self.fred_client = fred_client
+        self.path = path or config.QUERY_DB_FILE
+        self.debounce = config.QUERY_DB_DEBOUNCE if debounce is None else debounce
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database read-only; only SELECT statements are authorized"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Series store not built yet: {self.path}")
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        connection.set_authorizer(_authorize)
+        if hasattr(connection, 'setlimit'):
+            connection.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, MAX_VALUE_LENGTH)
+        return connection
+
+    def built_version(self) -> str:
+        """Data version of the current database, or None if it isn't built"""
+        try:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                row = connection.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+            finally:
+                connection.close()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    def sync(self) -> bool:
+        """
+        Rebuild the database if the client's data changed since it was built
+
+        Returns:
+            True if the database was rebuilt
+        """
+        with self._lock:
+            if self._stop.is_set():
+                return False
+            try:
+                version = self.fred_client.data_version()
+                entries = self.fred_client.cache_entries()
+                if not entries or version == self.built_version():
+                    return False
+                build_database(self.path, entries, self.fred_client.registry, version)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to build series store: {str(e)}")
+                return False
+
+    def query(self, sql: str, params: Iterable = (), max_rows: int = None,
+              timeout: float = None) -> Dict:
+        """
+        Run one read-only SQL statement
+
+        Args:
+            sql: A single SELECT (or WITH ... SELECT) statement
+            params: Values for ? placeholders
+            max_rows: Rows returned, at least 1 (default config.QUERY_MAX_ROWS); more
+                are dropped and the result is marked truncated
+            timeout: Seconds the query may run (default config.QUERY_TIMEOUT)
+
+        Returns:
+            Dictionary with columns, rows, row_count, truncated, elapsed_ms and data_version
+
+        Raises:
+            ValueError: Invalid, unauthorized or interrupted query, or one returning BLOBs
+            FileNotFoundError: The database hasn't been built
+        """
+        max_rows = config.QUERY_MAX_ROWS if max_rows is None else max_rows
+        if isinstance(max_rows, bool) or not isinstance(max_rows, int) or max_rows < 1:
+            raise ValueError("max_rows must be a positive integer")
+        timeout = timeout or config.QUERY_TIMEOUT
+        started = time.perf_counter()
+        deadline = started + timeout
+        connection = self._connect()
+        try:
+            version = connection.execute(
+                "SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+            connection.set_progress_handler(lambda: time.perf_counter() > deadline, 10000)
+            cursor = connection.execute(sql, tuple(params))
+            rows = cursor.fetchmany(max_rows + 1)
+            columns = [column[0] for column in cursor.description or []]
+        except sqlite3.OperationalError as e:
+            if str(e) == 'interrupted':
+                raise ValueError(f"Query exceeded the {timeout}s time limit")
+            raise ValueError(str(e))
+        except sqlite3.Error as e:
+            raise ValueError(str(e))
+        finally:
+            connection.close()
+        if any(isinstance(value, bytes) for row in rows for value in row):
+            raise ValueError("Query returned BLOB values, which can't be sent as JSON; "
+                             "select hex(...) instead")
+        return {
+            'columns': columns,
+            'rows': rows[:max_rows],
+            'row_count': min(len(rows), max_rows),
+            'truncated': len(rows) > max_rows,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'data_version': version[0] if version else None
+        }
+
+    def tables(self) -> Dict:
+        """Tables and views available to queries, and the stored series"""
+        connection = self._connect()
+        try:
+            schema = connection.execute(
+                "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY name"
+            ).fetchall()
+            series = connection.execute(
+                "SELECT name, series_id, frequency, first_date, last_date, observations, fetched_at "
+                "FROM series ORDER BY name"
+            ).fetchall()
+            meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            connection.close()
+        columns = ['name', 'series_id', 'frequency', 'first_date', 'last_date',
+                   'observations', 'fetched_at']
+        return {
+            'tables': [name for kind, name in schema if kind == 'table'],
+            'views': [name for kind, name in schema if kind == 'view'],
+            'series': [dict(zip(columns, row)) for row in series],
+            **meta
+        }
+
+    def _on_data(self, series_id: str):
+        self._pending.set()
+
+    def start(self):
+        """Build now if the cache has data, then rebuild on a background thread as new data lands"""
+        if self._thread is not None:
+            return
+        self._pending.set()
+        self.fred_client.add_listener(self._on_data)
+        self._thread = threading.Thread(target=self._run, name='series-store', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop rebuilding, waiting for a build in progress so its temp file is cleaned up"""
+        self._stop.set()
+        self._pending.set()
+        with self._lock:
+            pass
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            if self._stop.wait(self.debounce):
+                return
+            self._pending.clear()
+            self.sync()
+
+
+def _print_table(columns: List[str], rows: List[tuple]):
+    cells = [[('' if v is None else f'{v:.4f}' if isinstance(v, float) else str(v)) for v in row]
+             for row in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in cells:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the local store of FRED observations')
+    parser.add_argument('--db', default=None, help='Database file (default: QUERY_DB_FILE)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Build the database from cached observations')
+    build.add_argument('--snapshot', default=None, help='Snapshot file (default: SNAPSHOT_FILE)')
+    build.add_argument('--fetch', action='store_true',
+                       help='Fetch every registry series from FRED instead of reading the snapshot')
+    commands.add_parser('tables', help='List tables, views and stored series')
+    run = commands.add_parser('query', help='Run a read-only SQL query')
+    run.add_argument('sql', help='SQL statement (- reads it from stdin)')
+    run.add_argument('--format', choices=['table', 'csv', 'json'], default='table')
+    run.add_argument('--max-rows', type=int, default=None, help='Rows returned (default: QUERY_MAX_ROWS)')
+    run.add_argument('--timeout', type=float, default=60.0, help='Seconds the query may run')
+    args = parser.parse_args()
+
+    path = args.db or config.QUERY_DB_FILE
+    if not path:
+        parser.error("QUERY_DB_FILE is disabled; pass --db")
+    store = SeriesStore(path=path)
+
+    if args.command == 'build':
+        from fred_client import FREDClient
+        from snapshot import load_snapshot
+
+        started = time.perf_counter()
+        client = FREDClient()
+        if args.fetch:
+            for spec in client.registry:
+                client.get_series(spec.series_id)
+        else:
+            snapshot_path = args.snapshot or config.SNAPSHOT_FILE
+            if not snapshot_path or not os.path.exists(snapshot_path):
+                parser.error(f"No snapshot at {snapshot_path}; run the app first or pass --fetch")
+            client.restore_cache(load_snapshot(snapshot_path)['series'])
+        count = build_database(path, client.cache_entries(), client.registry, client.data_version())
+        print(f"Stored {count} observations in {path} in {time.perf_counter() - started:.1f}s",
+              file=sys.stderr)
+        return
+
+    try:
+        if args.command == 'tables':
+            print(json.dumps(store.tables(), indent=2))
+            return
+        sql = sys.stdin.read() if args.sql == '-' else args.sql
+        result = store.query(sql, max_rows=args.max_rows, timeout=args.timeout)
+    except (ValueError, FileNotFoundError) as e:
+        parser.exit(1, f"Error: {str(e)}\n")
+
+    if args.format == 'json':
+        print(json.dumps([dict(zip(result['columns'], row)) for row in result['rows']]))
+    elif args.format == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(result['columns'])
+        writer.writerows(result['rows'])
+    else:
+        _print_table(result['columns'], result['rows'])
+    note = ' (truncated)' if result['truncated'] else ''
+    print(f"{result['row_count']} rows{note} in {result['elapsed_ms']}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Cache Snapshot - Saves FRED cache and analytics state to disk and restores it on startup
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, List, Tuple
+import atexit
+import json
+import logging
+import os
+import struct
+import threading
+
+from lazy_import import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+import config
+from analytics import RollingSeries
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, header length (uint64 LE), JSON header, then the raw arrays.
+# Every array starts on an ALIGNMENT boundary so it can be viewed straight out of
+# a memory map without copying.
+MAGIC = b'FREDSNAP'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sQ')
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _pack(arrays: List[Tuple[str, np.ndarray]]) -> Tuple[Dict, List[Tuple[int, bytes]]]:
+    """Lay out arrays back to back, returning their index and (offset, bytes) chunks"""
+    index, chunks, offset = {}, [], 0
+    for key, array in arrays:
+        array = np.ascontiguousarray(array)
+        if array.dtype.kind == 'M':
+            array = array.astype('datetime64[ns]')
+        index[key] = {'dtype': array.dtype.str, 'offset': offset, 'length': len(array)}
+        chunks.append((offset, array.tobytes()))
+        offset = _aligned(offset + array.nbytes)
+    return index, chunks
+
+
+def save_snapshot(path: str, fred_client, analytics=None) -> int:
+    """
+    Write the client's cached series (and computed analytics) to a snapshot file
+
+    The file is written to a temporary name and renamed into place, so readers
+    never see a partial snapshot.
+
+    Args:
+        path: Snapshot file path
+        fred_client: FREDClient whose cache is saved
+        analytics: Optional AnalyticsEngine whose computed statistics are saved
+
+    Returns:
+        Number of bytes written
+    """
+    arrays, series_entries, analytics_entries = [], [], []
+    cached = {}
+    for i, entry in enumerate(fred_client.cache_entries()):
+        data = entry['data']
+        cached[id(data)] = entry['cache_key']
+        arrays.append((f's{i}.dates', data.index.values))
+        arrays.append((f's{i}.values', data.values.astype(np.float64)))
+        series_entries.append({
+            'array': f's{i}',
+            'cache_key': entry['cache_key'],
+            'series_id': entry['series_id'],
+            'observation_start': entry['observation_start'],
+            'observation_end': entry['observation_end'],
+            'fetched_at': entry['fetched_at'].isoformat()
+        })
+
+    for i, (series, source) in enumerate(analytics.tracked() if analytics else []):
+        # Statistics are only useful alongside the exact data they were computed from
+        if id(source) not in cached:
+            continue
+        columns = series.arrays
+        arrays.extend((f'a{i}.{col}', values) for col, values in columns.items())
+        analytics_entries.append({
+            'array': f'a{i}',
+            'name': series.name,
+            'kind': series.kind,
+            'params': series.params,
+            'columns': [col for col in columns if col not in ('dates', 'values')],
+            'source': cached[id(source)]
+        })
+
+    index, chunks = _pack(arrays)
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'series': series_entries,
+        'analytics': analytics_entries,
+        'arrays': index
+    }).encode()
+    data_start = _aligned(_PREFIX.size + len(header))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        for offset, chunk in chunks:
+            f.seek(data_start + offset)
+            f.write(chunk)
+    os.replace(temp_path, path)
+    size = os.path.getsize(path)
+    logger.info(f"Saved snapshot of {len(series_entries)} series to {path} ({size} bytes)")
+    return size
+
+
+def load_snapshot(path: str) -> Dict:
+    """
+    Read a snapshot file, memory-mapping its arrays
+
+    Args:
+        path: Snapshot file path
+
+    Returns:
+        Dictionary with created_at, 'series' entries in FREDClient.cache_entries()
+        format and 'analytics' entries holding the saved arrays
+    """
+    with open(path, 'rb') as f:
+        magic, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a cache snapshot: {path}")
+        header = json.loads(f.read(header_size))
+    if header['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['format_version']}")
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    data_start = _aligned(_PREFIX.size + header_size)
+
+    def array(key: str) -> np.ndarray:
+        spec = header['arrays'][key]
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        return buffer[start:start + spec['length'] * dtype.itemsize].view(dtype)
+
+    series = [
+        {
+            'cache_key': entry['cache_key'],
+            'series_id': entry['series_id'],
+            'observation_start': entry['observation_start'],
+            'observation_end': entry['observation_end'],
+            'fetched_at': datetime.fromisoformat(entry['fetched_at']),
+            'data': pd.Series(array(f"{entry['array']}.values"),
+                              index=pd.DatetimeIndex(array(f"{entry['array']}.dates")))
+        }
+        for entry in header['series']
+    ]
+    analytics = [
+        {
+            **{k: entry[k] for k in ('name', 'kind', 'params', 'source')},
+            'dates': array(f"{entry['array']}.dates"),
+            'values': array(f"{entry['array']}.values"),
+            'stats': {col: array(f"{entry['array']}.{col}") for col in entry['columns']}
+        }
+        for entry in header['analytics']
+    ]
+    return {
+        'created_at': datetime.fromisoformat(header['created_at']),
+        'series': series,
+        'analytics': analytics
+    }
+
+
+class CacheSnapshotter:
+    """Restores the cache at startup and saves it periodically and at exit"""
+
+    def __init__(self, fred_client, analytics=None, path: str = None,
+                 interval: float = None, max_age: float = None):
+        """
+        Initialize the snapshotter
+
+        Args:
+            fred_client: FREDClient whose cache is saved and restored
+            analytics: Optional AnalyticsEngine saved and restored alongside it
+            path: Snapshot file (default config.SNAPSHOT_FILE)
+            interval: Seconds between periodic saves (default config.SNAPSHOT_INTERVAL)
+            max_age: Oldest snapshot, in seconds, worth restoring (default config.SNAPSHOT_MAX_AGE)
+        """
+        self.fred_client = fred_client
+        self.analytics = analytics
+        self.path = path or config.SNAPSHOT_FILE
+        self.interval = interval or config.SNAPSHOT_INTERVAL
+        self.max_age = max_age or config.SNAPSHOT_MAX_AGE
+        self._saved_state = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _state(self) -> tuple:
+        """Cheap fingerprint of the cache, used to skip saves when nothing changed"""
+        return tuple(sorted(
+            (entry['cache_key'], entry['fetched_at']) for entry in self.fred_client.cache_entries()
+        ))
+
+    def restore(self) -> int:
+        """
+        Load the snapshot into the client cache and queue a background freshness check
+
+        Returns:
+            Number of series restored
+        """
+        if not os.path.exists(self.path):
+            logger.info(f"No cache snapshot at {self.path}, starting cold")
+            return 0
+        try:
+            started = datetime.now()
+            snapshot = load_snapshot(self.path)
+            age = (started - snapshot['created_at']).total_seconds()
+            if age > self.max_age:
+                logger.info(f"Cache snapshot is {age:.0f}s old, ignoring it")
+                return 0
+
+            restored = self.fred_client.restore_cache(snapshot['series'])
+            if self.analytics is not None:
+                self._restore_analytics(snapshot)
+            self._saved_state = self._state()
+            elapsed = (datetime.now() - started).total_seconds() * 1000
+            logger.info(f"Restored {restored} series from snapshot in {elapsed:.1f}ms")
+
+            self.fred_client.refresh()
+            return restored
+        except Exception as e:
+            logger.error(f"Failed to restore cache snapshot: {str(e)}")
+            return 0
+
+    def _restore_analytics(self, snapshot: Dict):
+        """Install saved statistics whose source data and settings are still current"""
+        cached = {entry['cache_key']: entry['data'] for entry in self.fred_client.cache_entries()}
+        for entry in snapshot['analytics']:
+            source = cached.get(entry['source'])
+            try:
+                series = RollingSeries.restore(entry['name'], entry['kind'], entry['dates'],
+                                               entry['values'], entry['stats'])
+                if source is None or series.params != entry['params']:
+                    continue
+                self.analytics.restore(series, source)
+            except Exception as e:
+                logger.warning(f"Skipping saved analytics for {entry['name']}: {str(e)}")
+
+    def save(self) -> bool:
+        """
+        Write a snapshot if the cache changed since the last save or restore
+
+        Returns:
+            True if a snapshot was written
+        """
+        with self._lock:
+            try:
+                state = self._state()
+                if not state or state == self._saved_state:
+                    return False
+                save_snapshot(self.path, self.fred_client, self.analytics)
+                self._saved_state = state
+                return True
+            except Exception as e:
+                logger.error(f"Failed to save cache snapshot: {str(e)}")
+                return False
+
+    def start(self):
+        """Save periodically on a background thread and once more at interpreter exit"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='cache-snapshot', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop periodic saves and write a final snapshot"""
+        self._stop.set()
+        self.save()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
@@ -0,0 +1,110 @@
+"""
+Strategy Table - Immutable recommendation, outlook and scenario content keyed by regime
+"""
+from typing import Dict, List
+import hashlib
+import json
+import logging
+
+import config
+from results import Recommendation
+
+logger = logging.getLogger(__name__)
+
+
+class FrozenDict(dict):
+    """Dictionary that rejects modification, so shared content can't be altered per request"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Strategy content is read-only; copy it before modifying")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self):
+        return id(self)
+
+    def __reduce__(self):
+        # Pickle rebuilds dicts item by item, which __setitem__ rejects; reports
+        # carrying this content cross process boundaries in batch generation
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class StrategyTable:
+    """Precomputed content for each regime, looked up in O(1) by stance"""
+
+    DEFAULT_REGIME = 'Neutral'
+
+    def __init__(self, content: Dict):
+        """
+        Initialize from parsed content
+
+        Args:
+            content: {'default': {...}, 'regimes': {regime: {recommendation,
+                asset_class_outlook, scenarios}}}; regimes inherit missing keys from default
+
+        The version attribute is a hash of the content, so clients can cache it indefinitely.
+        """
+        default = content.get('default', {})
+        self.version = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()[:16]
+        self._regimes = FrozenDict(
+            (regime, freeze({**default, **entry}))
+            for regime, entry in content['regimes'].items()
+        )
+        if self.DEFAULT_REGIME not in self._regimes:
+            raise ValueError(f"Strategy content must define the {self.DEFAULT_REGIME} regime")
+        try:
+            self._recommendations = FrozenDict(
+                (regime, Recommendation.from_content(entry['recommendation']))
+                for regime, entry in self._regimes.items()
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid recommendation in strategy content: {str(e)}")
+
+    @classmethod
+    def load(cls, path: str = None) -> 'StrategyTable':
+        """Load the table from a JSON file (default config.STRATEGY_CONTENT_FILE)"""
+        path = path or config.STRATEGY_CONTENT_FILE
+        with open(path, encoding='utf-8') as f:
+            table = cls(json.load(f))
+        logger.info(f"Loaded strategy content for {len(table.regimes)} regimes from {path}")
+        return table
+
+    @property
+    def regimes(self) -> List[str]:
+        """Regime keys defined in the table"""
+        return list(self._regimes)
+
+    def resolve(self, regime: str) -> str:
+        """Regime whose content applies to a stance (the default regime if it has none)"""
+        return regime if regime in self._regimes else self.DEFAULT_REGIME
+
+    def export(self) -> FrozenDict:
+        """All content keyed by regime, for clients that cache it (see version)"""
+        return self._regimes
+
+    def get(self, regime: str) -> FrozenDict:
+        """Get all content for a regime, falling back to the default regime"""
+        return self._regimes.get(regime) or self._regimes[self.DEFAULT_REGIME]
+
+    def recommendation(self, regime: str) -> Recommendation:
+        """Get the portfolio recommendation for a regime (one shared instance per regime)"""
+        return (self._recommendations.get(regime)
+                or self._recommendations[self.DEFAULT_REGIME])
+
+    def asset_class_outlook(self, regime: str) -> FrozenDict:
+        """Get the asset class outlook for a regime"""
+        return self.get(regime)['asset_class_outlook']
+
+    def scenarios(self, regime: str) -> tuple:
+        """Get the alternative scenarios for a regime"""
+        return self.get(regime)['scenarios']
@@ -0,0 +1,188 @@
+"""
+Taylor Rule - Rule-implied policy rate and the Fed funds policy gap for every month in history
+"""
+from __future__ import annotations
+from typing import Dict, Optional
+import logging
+
+from lazy_import import lazy_import
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+INFLATION_MEASURES = ['cpi', 'core_pce']
+
+
+def implied_rate(inflation, unemployment, neutral_rate: float = None,
+                 natural_unemployment: float = None, inflation_weight: float = None,
+                 unemployment_weight: float = None):
+    """
+    Taylor-rule policy rate for scalars or aligned NumPy arrays
+
+        rate = r* + inflation + a * (inflation - target) + b * (u* - unemployment)
+
+    Args:
+        inflation: YoY inflation
+        unemployment: Unemployment rate
+        neutral_rate: Real neutral rate r* (default config.TAYLOR_NEUTRAL_RATE)
+        natural_unemployment: Natural unemployment rate u*
+            (default config.TAYLOR_NATURAL_UNEMPLOYMENT)
+        inflation_weight: a (default config.TAYLOR_INFLATION_WEIGHT)
+        unemployment_weight: b (default config.TAYLOR_UNEMPLOYMENT_WEIGHT)
+
+    Returns:
+        Implied nominal policy rate (NaN where an input is missing)
+    """
+    neutral_rate = config.TAYLOR_NEUTRAL_RATE if neutral_rate is None else neutral_rate
+    if natural_unemployment is None:
+        natural_unemployment = config.TAYLOR_NATURAL_UNEMPLOYMENT
+    if inflation_weight is None:
+        inflation_weight = config.TAYLOR_INFLATION_WEIGHT
+    if unemployment_weight is None:
+        unemployment_weight = config.TAYLOR_UNEMPLOYMENT_WEIGHT
+
+    inflation = np.asarray(inflation, dtype=float)
+    unemployment = np.asarray(unemployment, dtype=float)
+    return (neutral_rate + inflation
+            + inflation_weight * (inflation - config.INFLATION_TARGET)
+            + unemployment_weight * (natural_unemployment - unemployment))
+
+
+class TaylorRule:
+    """Taylor-rule implied rates and policy gap over history, cached per data version"""
+
+    def __init__(self, fred_client, analytics, inflation_measure: str = None, **assumptions):
+        """
+        Initialize the rule
+
+        Args:
+            fred_client: FREDClient used to load the Fed funds and unemployment rates
+            analytics: AnalyticsEngine providing YoY inflation
+            inflation_measure: 'cpi' or 'core_pce' for the policy gap
+                (default config.TAYLOR_INFLATION_MEASURE)
+            **assumptions: Overrides for implied_rate() (neutral_rate,
+                natural_unemployment, inflation_weight, unemployment_weight)
+        """
+        self.fred_client = fred_client
+        self.analytics = analytics
+        self.inflation_measure = inflation_measure or config.TAYLOR_INFLATION_MEASURE
+        if self.inflation_measure not in INFLATION_MEASURES:
+            raise ValueError(f"Unknown inflation measure: {self.inflation_measure}")
+        self.assumptions = {
+            'neutral_rate': config.TAYLOR_NEUTRAL_RATE,
+            'natural_unemployment': config.TAYLOR_NATURAL_UNEMPLOYMENT,
+            'inflation_weight': config.TAYLOR_INFLATION_WEIGHT,
+            'unemployment_weight': config.TAYLOR_UNEMPLOYMENT_WEIGHT,
+            **assumptions
+        }
+        self.version = 0  # Incremented whenever the inputs change
+        self._key = None
+        self._panel = None
+        self._history = None
+        self._current = None
+
+    def _load_panel(self) -> pd.DataFrame:
+        """Monthly Fed funds, unemployment and inflation, rebuilt only when an input changed"""
+        registry = self.fred_client.registry
+        fed_funds = self.fred_client.get_series(registry.series_id('fed_funds_rate'))
+        unemployment = self.fred_client.get_series(registry.series_id('unemployment'))
+        inflation = {measure: self.analytics.get(measure) for measure in INFLATION_MEASURES}
+
+        key = (id(fed_funds), id(unemployment),
+               *(series.version for series in inflation.values()))
+        if key == self._key:
+            return self._panel
+
+        panel = pd.DataFrame({
+            'fed_funds': fed_funds.resample('MS').mean(),
+            'unemployment': unemployment.resample('MS').last(),
+            **{f'inflation_{measure}': series.to_frame()['yoy'].resample('MS').last()
+               for measure, series in inflation.items()}
+        }).dropna(subset=['fed_funds', 'unemployment'])
+
+        self._panel, self._key = panel, key
+        self.version += 1
+        self._history = None
+        self._current = None
+        return panel
+
+    def evaluate(self, panel: pd.DataFrame, **assumptions) -> pd.DataFrame:
+        """
+        Apply the rule to a monthly panel in one vectorized pass
+
+        Args:
+            panel: Frame with fed_funds, unemployment and inflation_<measure> columns
+            **assumptions: Overrides of this rule's assumptions
+
+        Returns:
+            Frame with the inputs, unemployment gap, implied rate per inflation
+            measure and the policy gap (Fed funds minus the implied rate for
+            the configured measure; positive means tighter than the rule)
+        """
+        assumptions = {**self.assumptions, **assumptions}
+        frame = panel.copy()
+        frame['unemployment_gap'] = frame['unemployment'] - assumptions['natural_unemployment']
+        for measure in INFLATION_MEASURES:
+            frame[f'implied_{measure}'] = implied_rate(
+                frame[f'inflation_{measure}'].values, frame['unemployment'].values, **assumptions
+            )
+        frame['implied_rate'] = frame[f'implied_{self.inflation_measure}']
+        frame['policy_gap'] = frame['fed_funds'] - frame['implied_rate']
+        return frame
+
+    def history(self, start=None, end=None, **assumptions) -> pd.DataFrame:
+        """
+        Implied rates and policy gap for every month
+
+        With the default assumptions the result is cached until an input
+        series changes; overrides are evaluated on the cached inputs.
+
+        Returns:
+            DataFrame indexed by month start (see evaluate())
+        """
+        panel = self._load_panel()
+        if assumptions:
+            return self.evaluate(panel, **assumptions).loc[start:end]
+        if self._history is None:
+            self._history = self.evaluate(panel)
+            logger.info(f"Computed Taylor rule for {len(panel)} months")
+        return self._history.loc[start:end]
+
+    def current(self) -> Optional[Dict]:
+        """
+        Latest month with both the Fed funds rate and the implied rate
+
+        Returns:
+            Dictionary with date, Fed funds rate, implied rate per measure, policy
+            gap, unemployment gap and assumptions, or None if unavailable
+        """
+        history = self.history()
+        if self._current is None:
+            latest = history.dropna(subset=['policy_gap'])
+            if latest.empty:
+                return None
+            row = latest.iloc[-1]
+
+            def value(x):
+                return None if pd.isna(x) else round(float(x), 4)
+
+            self._current = {
+                'date': latest.index[-1].strftime('%Y-%m-%d'),
+                'fed_funds_rate': value(row['fed_funds']),
+                'implied_rate': value(row['implied_rate']),
+                'policy_gap': value(row['policy_gap']),
+                'inflation_measure': self.inflation_measure,
+                'implied_rates': {m: value(row[f'implied_{m}']) for m in INFLATION_MEASURES},
+                'inflation': {m: value(row[f'inflation_{m}']) for m in INFLATION_MEASURES},
+                'unemployment_gap': value(row['unemployment_gap']),
+                'assumptions': dict(self.assumptions)
+            }
+        return self._current
+
+    def policy_gap(self) -> Optional[float]:
+        """Current policy gap in percentage points, or None if unavailable"""
+        current = self.current()
+        return current['policy_gap'] if current else None
@@ -0,0 +1,257 @@
+"""
+Term Structure - Daily Treasury curve fits (Nelson-Siegel) and inversion history
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional
+import logging
+
+from lazy_import import lazy_import
+import config
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+FACTORS = ['level', 'slope', 'curvature']
+
+
+def nelson_siegel_loadings(maturities: np.ndarray, decay: float) -> np.ndarray:
+    """
+    Nelson-Siegel factor loadings for each maturity
+
+    Args:
+        maturities: Maturities in years
+        decay: Decay parameter (per year)
+
+    Returns:
+        (len(maturities), 3) matrix of level, slope and curvature loadings
+    """
+    x = decay * np.asarray(maturities, dtype=float)
+    slope = (1 - np.exp(-x)) / x
+    return np.column_stack([np.ones_like(x), slope, slope - np.exp(-x)])
+
+
+def fit_nelson_siegel(yields: np.ndarray, loadings: np.ndarray,
+                      min_observed: int = None) -> np.ndarray:
+    """
+    Fit Nelson-Siegel betas to every row of a yield panel by least squares
+
+    With the decay fixed the model is linear, so days sharing the same set of
+    observed maturities are solved together with one pseudo-inverse.
+
+    Args:
+        yields: (days, maturities) yields with NaN for missing observations
+        loadings: (maturities, 3) factor loadings
+        min_observed: Observed maturities required to fit a day (default
+            config.TERM_STRUCTURE_MIN_MATURITIES)
+
+    Returns:
+        (days, 3) betas, NaN for days with too few observations
+    """
+    min_observed = min_observed or config.TERM_STRUCTURE_MIN_MATURITIES
+    observed = ~np.isnan(yields)
+    betas = np.full((len(yields), loadings.shape[1]), np.nan)
+
+    # Encode each day's observed maturities as a bitmask and solve per pattern
+    patterns = observed @ (1 << np.arange(yields.shape[1], dtype=np.int64))
+    for pattern in np.unique(patterns):
+        rows = patterns == pattern
+        columns = observed[np.argmax(rows)]
+        if columns.sum() < min_observed:
+            continue
+        betas[rows] = yields[np.ix_(rows, columns)] @ np.linalg.pinv(loadings[columns]).T
+    return betas
+
+
+def inversion_episodes(spread: pd.Series) -> pd.DataFrame:
+    """
+    Find contiguous runs of a negative spread
+
+    Args:
+        spread: Spread indexed by date (NaN days are skipped)
+
+    Returns:
+        DataFrame with start, end, days (calendar) and min_spread per episode
+    """
+    spread = spread.dropna()
+    inverted = spread.values < 0
+    edges = np.diff(np.concatenate([[False], inverted, [False]]).astype(np.int8))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    dates = spread.index
+    return pd.DataFrame({
+        'start': dates[starts],
+        'end': dates[ends],
+        'days': (dates[ends] - dates[starts]).days + 1,
+        'min_spread': [spread.values[s:e + 1].min() for s, e in zip(starts, ends)],
+    })
+
+
+class TermStructure:
+    """Nelson-Siegel fits of the Treasury curve for every day in history, cached per data version"""
+
+    def __init__(self, fred_client, maturities: Dict[str, float] = None, decay: float = None):
+        """
+        Initialize the term structure
+
+        Args:
+            fred_client: FREDClient used to load yields
+            maturities: Series name -> maturity in years (default config.TREASURY_CURVE)
+            decay: Nelson-Siegel decay per year (default config.NELSON_SIEGEL_DECAY)
+        """
+        self.fred_client = fred_client
+        self.maturities = dict(maturities or config.TREASURY_CURVE)
+        self.decay = decay or config.NELSON_SIEGEL_DECAY
+        self._names = sorted(self.maturities, key=self.maturities.get)
+        self._tenors = np.array([self.maturities[name] for name in self._names])
+        self._loadings = nelson_siegel_loadings(self._tenors, self.decay)
+        self._key = None
+        self._panel = None
+        self._fits = None
+        self._signals = None
+
+    def _load(self) -> Dict[str, pd.Series]:
+        """Get each maturity's series from the client, skipping unavailable ones"""
+        registry = self.fred_client.registry
+        series = {}
+        for name in self._names:
+            try:
+                series[name] = self.fred_client.get_series(registry.series_id(name))
+            except Exception as e:
+                logger.error(f"Term structure missing {name}: {str(e)}")
+        return series
+
+    def fits(self) -> pd.DataFrame:
+        """
+        Get the daily curve fits, refitting only when any input series changed
+
+        Returns:
+            DataFrame indexed by date with level, slope and curvature factors,
+            fit rmse, maturities used, and observed 10Y-3M and 10Y-2Y spreads
+        """
+        series = self._load()
+        key = tuple((name, id(data)) for name, data in series.items())
+        if key == self._key:
+            return self._fits
+        if not series:
+            raise ValueError("No Treasury yields available for the term structure")
+
+        panel = pd.DataFrame(series).reindex(columns=self._names).dropna(how='all')
+        yields = panel.values
+        betas = fit_nelson_siegel(yields, self._loadings)
+        fitted = betas @ self._loadings.T
+        with np.errstate(invalid='ignore'):
+            rmse = np.sqrt(np.nanmean((fitted - yields) ** 2, axis=1))
+
+        def spread(long: str, short: str) -> np.ndarray:
+            if long in panel and short in panel:
+                return (panel[long] - panel[short]).values
+            return np.full(len(panel), np.nan)
+
+        fits = pd.DataFrame({
+            'level': betas[:, 0],
+            # Nelson-Siegel's slope beta is short minus long; report long minus short
+            'slope': -betas[:, 1],
+            'curvature': betas[:, 2],
+            'rmse': np.where(np.isnan(betas[:, 0]), np.nan, rmse),
+            'maturities_used': (~np.isnan(yields)).sum(axis=1),
+            'spread_10y3m': spread('treasury_10y', 'treasury_3m'),
+            'spread_10y2y': spread('treasury_10y', 'treasury_2y'),
+        }, index=panel.index)
+
+        self._panel, self._fits, self._key = panel, fits, key
+        self._signals = None
+        logger.info(f"Fitted term structure for {len(fits)} days across {len(series)} maturities")
+        return fits
+
+    def curve(self, date=None, points: int = 31) -> Optional[Dict]:
+        """
+        Get the observed and fitted curve for one day
+
+        Args:
+            date: Date (defaults to the latest fitted day); the last day on or before it is used
+            points: Number of maturities on the fitted curve grid
+
+        Returns:
+            Dictionary with date, factors, observed yields by maturity and the
+            fitted curve, or None if no fit is available
+        """
+        fits = self.fits().dropna(subset=['level'])
+        if date is not None:
+            fits = fits.loc[:pd.Timestamp(date)]
+        if fits.empty:
+            return None
+
+        day = fits.index[-1]
+        row = fits.iloc[-1]
+        betas = np.array([row['level'], -row['slope'], row['curvature']])
+        grid = np.linspace(self._tenors.min(), self._tenors.max(), points)
+        observed = self._panel.loc[day]
+        return {
+            'date': day.strftime('%Y-%m-%d'),
+            'factors': {factor: float(row[factor]) for factor in FACTORS},
+            'rmse': float(row['rmse']),
+            'observed': [
+                {'series_name': name, 'maturity': float(self.maturities[name]),
+                 'yield': float(observed[name])}
+                for name in self._names if pd.notna(observed.get(name))
+            ],
+            'fitted': {
+                'maturities': grid.round(4).tolist(),
+                'yields': (nelson_siegel_loadings(grid, self.decay) @ betas).round(4).tolist()
+            }
+        }
+
+    def inversions(self, spread: str = 'spread_10y3m') -> pd.DataFrame:
+        """Inversion episodes of an observed spread ('spread_10y3m' or 'spread_10y2y')"""
+        return inversion_episodes(self.fits()[spread])
+
+    def signals(self) -> Optional[Dict]:
+        """
+        Current curve factors and inversion state for recession-risk assessment
+
+        Returns:
+            Dictionary with date, factors, spreads, whether the 10Y-3M spread is
+            inverted and for how many days, or None if unavailable (cached
+            with the fits)
+        """
+        fits = self.fits()
+        if self._signals is not None:
+            return self._signals
+        latest = fits.dropna(subset=['level'])
+        if latest.empty:
+            return None
+        row = latest.iloc[-1]
+
+        episodes = self.inversions('spread_10y3m')
+        spread = fits['spread_10y3m'].dropna()
+        inverted = bool(len(spread)) and spread.iloc[-1] < 0
+        inverted_days = int(episodes['days'].iloc[-1]) if inverted and len(episodes) else 0
+
+        def value(x):
+            return None if pd.isna(x) else float(x)
+
+        self._signals = {
+            'date': latest.index[-1].strftime('%Y-%m-%d'),
+            'level': value(row['level']),
+            'slope': value(row['slope']),
+            'curvature': value(row['curvature']),
+            'spread_10y3m': value(spread.iloc[-1]) if len(spread) else None,
+            'spread_10y2y': value(row['spread_10y2y']),
+            'inverted_10y3m': inverted,
+            'inversion_days': inverted_days,
+            'inversion_episodes': len(episodes)
+        }
+        return self._signals
+
+    def history(self, start=None, end=None) -> pd.DataFrame:
+        """Get factor and spread history, optionally limited to a date range"""
+        return self.fits().loc[start:end]
+
+    def episodes(self, spread: str = 'spread_10y3m') -> List[Dict]:
+        """Inversion episodes as JSON-ready dictionaries"""
+        return [
+            {'start': e.start.strftime('%Y-%m-%d'), 'end': e.end.strftime('%Y-%m-%d'),
+             'days': int(e.days), 'min_spread': float(e.min_spread)}
+            for e in self.inversions(spread).itertuples()
+        ]
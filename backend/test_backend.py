@@ -116,6 +116,1165 @@ def test_advisor():
         return False
 
 
+def test_strategy_table():
+    """Test the strategy table serves the content the per-stance advisor methods built"""
+    print("Testing strategy table...")
+    import pickle
+    from portfolio_advisor import PortfolioAdvisor
+    from results import StanceAnalysis
+    from strategy_table import StrategyTable
+
+    # Allocations and outlook scores of the former _hawkish/_dovish/_neutral_strategy
+    # and get_asset_class_outlook branches
+    expected = {
+        'Hawkish': ('Defensive Positioning', 'Moderate-High',
+                    {'Cash/Money Market': 20, 'Short-term Bonds (< 2yr)': 30, 'Value Stocks': 25,
+                     'Commodities/TIPS': 15, 'International Equity': 10},
+                    {'Equities': 5, 'Fixed Income': 6, 'Cash': 8, 'Commodities': 6, 'REITs': 3}),
+        'Dovish': ('Growth-Oriented Positioning', 'Moderate',
+                   {'Growth Stocks': 35, 'Long-term Bonds (10+ yr)': 25, 'REITs': 15,
+                    'Small-cap Equity': 15, 'Cash/Money Market': 10},
+                   {'Equities': 8, 'Fixed Income': 7, 'Cash': 4, 'Commodities': 5, 'REITs': 7}),
+        'Neutral': ('Balanced Diversification', 'Moderate',
+                    {'Broad Equity Index': 35, 'Intermediate Bonds (2-10yr)': 30, 'Value Stocks': 15,
+                     'Cash/Money Market': 10, 'Alternative Assets': 10},
+                    {'Equities': 6, 'Fixed Income': 6, 'Cash': 5, 'Commodities': 5, 'REITs': 6}),
+    }
+    scenarios = [('Accelerated Rate Hikes', 'Low-Moderate'), ('Economic Recession', 'Moderate'),
+                 ('Soft Landing Success', 'Moderate-High')]
+
+    table = StrategyTable.load()
+    advisor = PortfolioAdvisor(analyzer=None, content=table)
+    for stance, (name, risk, allocation, scores) in expected.items():
+        analysis = StanceAnalysis(stance, '', '', 0, 0, 0, 0.0, '')
+        recommendation = advisor.get_recommendation({}, analysis)
+        assert (recommendation.strategy_name, recommendation.risk_level) == (name, risk), stance
+        assert dict(recommendation.allocation) == allocation, f"{stance}: {recommendation.allocation}"
+        assert len(recommendation.key_actions) == 5 and recommendation.rationale, stance
+        outlook = advisor.get_asset_class_outlook({}, analysis)
+        assert {k: v['score'] for k, v in outlook.items()} == scores, f"{stance}: {outlook}"
+        assert [(s['scenario'], s['probability'])
+                for s in advisor.get_scenario_analysis({}, analysis)] == scenarios, stance
+        assert advisor.get_recommendation({}, analysis) is recommendation, "Content should be shared"
+
+    assert table.get('Unknown') is table.get('Neutral'), "Unknown regimes fall back to Neutral"
+    assert StrategyTable.load().version == table.version, "Version should be a content hash"
+    try:
+        table.get('Hawkish')['asset_class_outlook']['Cash']['score'] = 0
+        raise AssertionError("Shared content should be read-only")
+    except TypeError:
+        pass
+    assert pickle.loads(pickle.dumps(table.export())) == table.export(), "Content should pickle"
+    print("✓ Table content matches the former per-stance strategies, shared and read-only\n")
+
+
+def test_result_objects():
+    """Test result objects serialize to the dict shape the endpoints returned before"""
+    print("Testing result objects...")
+    import dataclasses
+    import json
+    import pickle
+    from results import AlertEvent, Recommendation, StanceAnalysis, TRAJECTORY_STABLE
+    from serialization import _default, dumps, loads
+
+    stance = StanceAnalysis('Hawkish', 'red', 'Tightening', 67, 2, 0, 0.5, '2024-01-01')
+    assert 'policy_gap' not in stance.to_dict(), "None in OMIT_IF_NONE should be left out"
+    assert stance.to_dict() == {'stance': 'Hawkish', 'color': 'red', 'description': 'Tightening',
+                                'confidence': 67, 'hawkish_signals': 2, 'dovish_signals': 0,
+                                'rate_momentum': 0.5, 'analysis_date': '2024-01-01'}
+    gap = dataclasses.replace(stance, policy_gap=0.0)
+    assert gap.to_dict()['policy_gap'] == 0.0, "Falsy values must not be omitted"
+    event = AlertEvent('stance', '2024-01-01', 'Hawkish', 'Stance changed')
+    assert event.to_dict()['previous'] is None, "Fields outside OMIT_IF_NONE keep their None"
+    assert TRAJECTORY_STABLE.to_dict() == {'recent_changes': (), 'trajectory': 'Stable',
+                                           'total_change': 0}
+
+    payload = {'stance': stance, 'events': [event]}
+    assert loads(dumps(payload)) == json.loads(json.dumps(payload, default=_default)), \
+        "Fast and stdlib encoders should agree"
+    assert loads(dumps(stance)) == stance.to_dict()
+
+    assert not hasattr(stance, '__dict__'), "Results should be slotted"
+    try:
+        stance.stance = 'Dovish'
+        raise AssertionError("Results should be immutable")
+    except dataclasses.FrozenInstanceError:
+        pass
+    assert pickle.loads(pickle.dumps(gap)) == gap
+    recommendation = Recommendation('Name', 'Low', 'Short', {'Cash': 100}, (), '', (), ())
+    optimized = recommendation.with_allocation({'Cash': 90, 'Bonds': 10}, 'risk_parity')
+    assert 'allocation_method' not in recommendation.to_dict()
+    assert optimized.to_dict()['allocation_method'] == 'risk_parity'
+    assert recommendation.allocation == {'Cash': 100}, "Shared instance should be unchanged"
+    print("✓ Optional fields omitted when None; both encoders agree; results immutable\n")
+
+
+def test_series_registry():
+    """Test series registry and lazy indicator loading (no API key needed)"""
+    print("Testing series registry...")
+    from fred_client import FREDClient
+
+    client = FREDClient(api_key='offline')
+    client.get_latest_value = lambda series_id: 1.0
+    fetched = []
+    original = client.get_indicator
+    client.get_indicator = lambda name: fetched.append(name) or original(name)
+
+    assert client.registry.series_id('cpi') == 'CPIAUCSL'
+    assert 'gdp' not in client.registry.names('analyzer')
+
+    indicators = client.get_indicators('analyzer')
+    assert not fetched, "Indicators should not be fetched until read"
+    indicators.get('cpi')
+    indicators.get('gdp')
+    assert fetched == ['cpi'], f"Unexpected fetches: {fetched}"
+    print("✓ Registry resolves series and fetches lazily\n")
+
+
+def fixture_app(**settings):
+    """Build the Flask app against the local FRED stand-in, without snapshot/alert/query files"""
+    import config
+    from app import EXTENSION_KEY, create_app
+    from fred_client import FREDClient
+    from fred_fixture import start_fixture_server
+
+    server, base_url = start_fixture_server()
+    settings = {'SNAPSHOT_FILE': '', 'ALERT_LOG_FILE': '', 'QUERY_DB_FILE': '', **settings}
+    saved = {name: getattr(config, name) for name in settings}
+    try:
+        for name, value in settings.items():
+            setattr(config, name, value)
+        flask_app = create_app(FREDClient(api_key='offline', base_url=base_url))
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+    for name in ('alerts', 'model_signals'):
+        flask_app.extensions[EXTENSION_KEY][name].stop()
+    return flask_app, server
+
+
+def test_profile_allocator():
+    """Test profile allocations honour constraints and invalid profiles are reported"""
+    print("Testing profile allocator...")
+    import json
+    import numpy as np
+    import profile_allocator
+
+    base = {'Cash/Money Market': 10, 'Intermediate Bonds (2-10yr)': 30,
+            'Broad Equity Index': 40, 'Growth Stocks': 20}
+    profiles = [
+        {'id': 'a', 'risk_tolerance': 'aggressive', 'horizon_years': 20,
+         'constraints': {'max': {'Growth Stocks': 30.5}}},
+        {'id': 'b', 'risk_tolerance': 2, 'constraints': {'min': {'Cash/Money Market': 25},
+                                                          'exclude': ['Growth Stocks']}},
+        {'id': 'nan', 'horizon_years': 'nan'},
+        {'id': 'inf', 'risk_tolerance': float('inf')},
+        {'id': 'bad', 'constraints': {'max': {'Gold': 10}}},
+        'not a profile',
+    ]
+    batch = profile_allocator.parse_profiles(profiles, list(base))
+    assets, pct = profile_allocator.allocate(base, batch)
+
+    assert sorted(batch.errors) == [2, 3, 4, 5], f"Errors: {batch.errors}"
+    assert batch.errors[5] == 'Profile must be an object', batch.errors[5]
+    assert np.isfinite(batch.tilt).all(), "Invalid profiles must not poison the tilt"
+    assert (pct.sum(axis=1) == 100).all() and (pct >= 0).all(), f"Bad rows: {pct}"
+    assert (pct <= np.floor(batch.upper * 100 + 1e-9)).all(), f"Above a maximum: {pct}"
+    assert (pct >= np.ceil(batch.lower * 100 - 1e-9)).all(), f"Below a minimum: {pct}"
+    growth = assets.index('Growth Stocks')
+    assert pct[0, growth] == 30 and pct[1, growth] == 0, f"Got {pct[:2]}"
+
+    flask_app, server = fixture_app()
+    try:
+        client = flask_app.test_client()
+        requested = [{'id': 'ok', 'risk_tolerance': 7}] + profiles[2:]
+        response = client.post('/api/portfolio-recommendation/batch', json={'profiles': requested})
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert response.status_code == 200 and len(rows) == len(requested), response.status_code
+        assert sum(rows[0]['allocation'].values()) == 100, f"Got {rows[0]}"
+        assert all(row['error'] for row in rows[1:]), f"Got {rows[1:]}"
+        assert rows[4] == {'id': 4, 'error': 'Profile must be an object'}, rows[4]
+        for body in ([1, 2], {'profiles': 'x'}):
+            response = client.post('/api/portfolio-recommendation/batch', json=body)
+            assert response.status_code == 400, f"{body} gave {response.status_code}"
+    finally:
+        server.shutdown()
+    print("✓ Constraints held after rounding; invalid profiles reported per row\n")
+
+
+def test_optimizer():
+    """Test regime labeling, both solvers' optimality conditions and solution caching"""
+    print("Testing regime optimizer...")
+    import numpy as np
+    import pandas as pd
+    from optimizer import RegimeOptimizer
+    from portfolio_advisor import PortfolioAdvisor
+    from results import StanceAnalysis
+    from strategy_table import StrategyTable
+
+    rng = np.random.default_rng(0)
+    months = pd.date_range('2000-01-01', periods=120, freq='MS')
+    assets = ['Bonds', 'Stocks', 'Cash']
+    returns = pd.DataFrame(rng.normal([0.004, 0.008, 0.002], [0.01, 0.04, 0.002], (120, 3)),
+                           index=months, columns=assets)
+    labels = pd.Series('Neutral', index=months.drop(months[50]))
+
+    mv = RegimeOptimizer(returns, method='mean_variance', risk_aversion=4,
+                         min_weight=0.05, max_weight=0.8, shrinkage=0.1)
+    assert mv.update_labels(labels) and not mv.update_labels(labels), "Unchanged labels re-applied"
+    assert pd.isna(mv._regimes.iloc[0]) and mv._regimes.iloc[1] == 'Neutral'
+    assert pd.isna(mv._regimes.iloc[51]), "Month after a gap took a stale label"
+
+    weights = mv.optimize('Neutral', assets)
+    mu, cov = mv.regime_statistics('Neutral', assets)
+    assert abs(weights.sum() - 1) < 1e-9 and (weights >= 0.05 - 1e-9).all() and (weights <= 0.8 + 1e-9).all()
+    # KKT: the gradient is equal across assets strictly inside the bounds
+    gradient = mu - 4 * cov @ weights
+    free = (weights > 0.05 + 1e-6) & (weights < 0.8 - 1e-6)
+    assert free.any() and np.ptp(gradient[free]) < 1e-6, f"Not optimal: {weights}, {gradient}"
+    for trial in rng.dirichlet(np.ones(3), 200) * 0.85 + 0.05:
+        trial /= trial.sum()
+        if (trial <= 0.8).all():
+            assert mu @ trial - 2 * trial @ cov @ trial <= mu @ weights - 2 * weights @ cov @ weights + 1e-12
+
+    assert mv.optimize('Neutral', assets) is weights, "Unchanged inputs should reuse the solution"
+    assert mv.optimize('Hawkish', assets) is None, "Unlabeled regime should not be estimated"
+    mv.update_labels(labels.iloc[:-1])  # the last label only covers a month without returns
+    assert mv.optimize('Neutral', assets) is weights, "Same statistics should reuse the solution"
+    mv.update_labels(labels.iloc[:-10])
+    assert mv.optimize('Neutral', assets) is not weights, "New statistics should re-solve"
+
+    class Analyzer:
+        calls = 0
+
+        def stance_history(self):
+            Analyzer.calls += 1
+            return pd.Series('Neutral', index=months)
+
+    table = StrategyTable.load()
+    neutral_assets = list(table.recommendation('Neutral').allocation)
+    neutral_returns = pd.DataFrame(rng.normal(0.005, 0.02, (120, len(neutral_assets))),
+                                   index=months, columns=neutral_assets)
+    advisor = PortfolioAdvisor(Analyzer(), RegimeOptimizer(neutral_returns), table)
+    stance = StanceAnalysis('Neutral', '', '', 0, 0, 0, 0.0, '')
+    for _ in range(3):
+        recommendation = advisor.get_recommendation({}, stance)
+    assert recommendation.allocation_method == 'mean_variance', "Optimized allocation expected"
+    assert Analyzer.calls == 1, f"Stance history rebuilt {Analyzer.calls} times on the request path"
+    assert not advisor.update_regime_labels() and Analyzer.calls == 2, "Background relabel"
+
+    rp = RegimeOptimizer(returns, method='risk_parity', min_weight=0, max_weight=1, shrinkage=0)
+    rp.update_labels(labels)
+    weights = rp.optimize('Neutral', assets)
+    cov = rp.regime_statistics('Neutral', assets)[1]
+    contribution = weights * (cov @ weights)
+    assert np.allclose(contribution, contribution.mean(), rtol=1e-6), f"Unequal risk: {contribution}"
+    assert sum(rp.allocation('Neutral', assets).values()) == 100
+    print("✓ Labels shift by calendar month; solutions optimal and cached until inputs change\n")
+
+
+def test_response_encoding():
+    """Test array-valued route payloads round-trip to the same dates and values"""
+    print("Testing response encoding...")
+    import json
+    import math
+    import numpy as np
+    import pandas as pd
+    from app import EXTENSION_KEY
+    from serialization import JSON_MIMETYPE, MSGPACK_MIMETYPE, _default, msgpack
+
+    frame = pd.Series([1.5, np.nan], index=pd.DatetimeIndex(['2024-01-01', '2024-02-01']))
+    payload = {'dates': frame.index, 'values': frame.to_numpy()}
+    expected = {'dates': ['2024-01-01', '2024-02-01'], 'values': [1.5, None]}
+    assert json.loads(json.dumps(payload, default=_default)) == expected, "stdlib fallback differs"
+
+    flask_app, server = fixture_app()
+    try:
+        client = flask_app.test_client()
+        fred_client = flask_app.extensions[EXTENSION_KEY]['fred_client']
+        data = client.get('/api/historical/treasury_10y?period=1Y').get_json()['data']
+        series = fred_client.get_recent_data('DGS10', years=1)
+        assert data['dates'] == [d.strftime('%Y-%m-%d') for d in series.index], "Dates differ"
+        assert data['values'] == [None if math.isnan(v) else v for v in series], "Values differ"
+        assert None in data['values'], "Missing observations should encode as null"
+
+        history = client.get('/api/dashboard/history').get_json()
+        assert history['start'] == min(s['dates'][0] for s in history['series'].values())
+        recent = client.get(f"/api/dashboard/history?since={data['dates'][-1]}").get_json()
+        for name, update in recent['series'].items():
+            assert update['dates'] and update['dates'][0] >= recent['from'], f"{name}: {update}"
+            assert update['dates'] == history['series'][name]['dates'][-len(update['dates']):]
+
+        accepts = [JSON_MIMETYPE] + ([MSGPACK_MIMETYPE] if msgpack is not None else [])
+        for accept in accepts:
+            response = client.get('/api/term-structure/history', headers={'Accept': accept})
+            assert response.status_code == 200, f"{accept} gave {response.status_code}"
+            assert response.mimetype == accept, f"Asked for {accept}, got {response.mimetype}"
+        if msgpack is None:
+            print("⚠ msgpack not installed, MessagePack responses not checked")
+    finally:
+        server.shutdown()
+    print("✓ Dates and NaN values encode the same as the list-building routes did\n")
+
+
+def test_rolling_analytics():
+    """Test that incremental analytics updates match a full recompute"""
+    print("Testing rolling analytics...")
+    import numpy as np
+    import threading
+    import time
+    import pandas as pd
+    from analytics import AnalyticsEngine, RollingSeries
+    from series_registry import SeriesRegistry
+
+    dates = pd.date_range('1990-01-01', periods=300, freq='MS')
+    cpi = pd.Series(np.linspace(100, 200, 300), index=dates)
+
+    for kind in ['rate', 'price_index', 'spread']:
+        full = RollingSeries('test', kind)
+        full.update(cpi)
+        incremental = RollingSeries('test', kind)
+        incremental.update(cpi.iloc[:250])
+        assert incremental.update(cpi) == 50
+        assert np.allclose(full.to_frame().values, incremental.to_frame().values,
+                           equal_nan=True), f"{kind} statistics differ"
+
+    inflation = RollingSeries('cpi', 'price_index')
+    inflation.update(cpi.drop(dates[-13]))
+    assert inflation.at()['yoy'] is None, "Missing year-ago month should not shift rows"
+    inflation.update(cpi)
+    expected = (cpi.iloc[-1] / cpi.iloc[-13] - 1) * 100
+    assert abs(inflation.at()['yoy'] - expected) < 1e-9
+
+    # Request, alert and model-signal threads read and update the same series
+    class SlowSeries(RollingSeries):
+        updates = 0
+
+        def update(self, data):
+            SlowSeries.updates += 1
+            return super().update(data)
+
+        def _compute(self, start):
+            time.sleep(0.05)  # widen the gap between appending dates and their statistics
+            super()._compute(start)
+
+    class Client:
+        registry = SeriesRegistry.from_config()
+
+        def get_series(self, series_id):
+            return cpi
+
+    engine = AnalyticsEngine(Client(), {'cpi': 'price_index'})
+    slow = SlowSeries('cpi', 'price_index')
+    engine.restore(slow, None)
+    threads = [threading.Thread(target=engine.get, args=('cpi',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while not len(slow):
+        time.sleep(0.001)
+    frame = slow.to_frame()
+    for thread in threads:
+        thread.join()
+    assert len(frame) == len(cpi), "A read during an update should wait for the statistics"
+    assert SlowSeries.updates == 1, f"Data folded in {SlowSeries.updates} times"
+    print("✓ Incremental analytics match full history, also under concurrent updates\n")
+
+
+def test_fetch_scheduler():
+    """Test the scheduler rate limits, retries transient errors and serves user fetches first"""
+    print("Testing fetch scheduler...")
+    import threading
+    import time
+    from fetch_scheduler import FetchScheduler, TokenBucket, PRIORITY_BACKGROUND
+
+    bucket = TokenBucket(rate=1, capacity=2)
+    assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0, "Burst should be allowed"
+    assert 0 < bucket.try_acquire() <= 1, "Empty bucket should report the wait for a token"
+
+    scheduler = FetchScheduler(rate_per_minute=6000, burst=100, workers=1,
+                               max_retries=3, backoff_base=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return 'ok'
+
+    assert scheduler.call(flaky, timeout=5) == 'ok' and len(attempts) == 3
+    try:
+        scheduler.call(lambda: int('x'), timeout=5)
+        raise AssertionError("Non-transient errors should be raised")
+    except ValueError:
+        pass
+    metrics = scheduler.metrics()
+    assert (metrics['retries'], metrics['completed'], metrics['failed']) == (2, 1, 1), metrics
+
+    release, order = threading.Event(), []
+    blocker = scheduler.submit(release.wait, 5)
+    while not blocker.running():
+        time.sleep(0.001)
+    background = [scheduler.submit(order.append, f'bg{i}', priority=PRIORITY_BACKGROUND)
+                  for i in range(2)]
+    user = scheduler.submit(order.append, 'user')
+    depth = scheduler.metrics()['queue_depth_by_priority']
+    release.set()
+    for future in [blocker, user, *background]:
+        future.result(timeout=5)
+    assert depth == {'user': 1, 'background': 2}, f"Queue depth: {depth}"
+    assert order == ['user', 'bg0', 'bg1'], f"User fetch should jump the queue: {order}"
+    print("✓ Bursts limited, transient errors retried, user fetches served first\n")
+
+
+def test_circuit_breaker():
+    """Test the breaker fails fast while open and degraded responses stay well-formed"""
+    print("Testing circuit breaker...")
+    import time
+    from analyzer import summarize
+    from app import EXTENSION_KEY
+    from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN
+
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ConnectionError("down")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    for _ in range(2):
+        try:
+            breaker.call(failing)
+        except ConnectionError:
+            pass
+    assert breaker.state == OPEN and not breaker.allows_request()
+    try:
+        breaker.call(failing)
+        raise AssertionError("Open circuit should fail fast")
+    except CircuitOpenError:
+        pass
+    assert len(calls) == 2, "Open circuit must not call upstream"
+    time.sleep(0.06)
+    assert breaker.call(lambda: 'up') == 'up' and breaker.state == CLOSED, "Probe should close it"
+    try:
+        breaker.call(lambda: int('x'))
+    except ValueError:
+        pass
+    assert breaker.metrics()['consecutive_failures'] == 0, "Bad requests aren't upstream failures"
+
+    assert 'N/A' in summarize('Neutral', None, None), "Missing values should not crash the summary"
+
+    flask_app, server = fixture_app()
+    try:
+        client = flask_app.test_client()
+        fred_client = flask_app.extensions[EXTENSION_KEY]['fred_client']
+        assert client.get('/api/historical/treasury_10y?period=1Y').status_code == 200
+        server.shutdown()
+        for _ in range(fred_client.breaker.failure_threshold):
+            fred_client.breaker._record_failure(ConnectionError("down"))
+        for key in list(fred_client._cache_time):
+            fred_client._cache_time[key] = fred_client._cache_time[key].replace(year=2000)
+
+        started = time.perf_counter()
+        response = client.get('/api/historical/treasury_10y?period=1Y')
+        assert response.status_code == 200, "Cached series should be served while open"
+        assert response.get_json()['stale_as_of'].startswith('2000-'), response.get_json()
+        response = client.get('/api/historical/treasury_2y?period=5Y')
+        assert response.status_code == 503 and response.headers['Retry-After'], response.status_code
+        assert time.perf_counter() - started < 1, "Open circuit should not wait on timeouts"
+
+        # Nothing cached: refused before queueing behind the rate limit
+        submitted = fred_client.scheduler.metrics()
+        try:
+            fred_client.get_series('GDPC1')
+            raise AssertionError("Uncached series should fail fast while open")
+        except CircuitOpenError:
+            pass
+        metrics = fred_client.scheduler.metrics()
+        assert metrics['completed'] + metrics['failed'] + metrics['queue_depth'] == \
+            submitted['completed'] + submitted['failed'] + submitted['queue_depth'], \
+            "No fetch should be submitted while the circuit is open"
+    finally:
+        server.shutdown()
+    print("✓ Circuit opened, probed and closed; stale data served and 503 for uncached series\n")
+
+
+def test_fixture_fetch():
+    """Test fetching through the pooled HTTP session against the local FRED stand-in"""
+    print("Testing FRED fetch against local fixture...")
+    import numpy as np
+    from fred_client import FREDClient
+    from fred_fixture import start_fixture_server
+
+    server, base_url = start_fixture_server()
+    try:
+        client = FREDClient(api_key='offline', base_url=base_url)
+        data = client.get_series('DGS10')
+        assert data.dtype == np.float64 and data.isna().any(), "Missing values should be NaN"
+        client.get_series('FEDFUNDS')
+        client.get_series('DGS10')
+        assert server.request_count == 2, "Second DGS10 read should hit the cache"
+        assert len(server.client_addresses) == 1, "Requests should reuse one connection"
+    finally:
+        server.shutdown()
+    print(f"✓ Parsed {len(data)} observations over a keep-alive connection\n")
+
+
+def test_api_key_pool():
+    """Test fetches are spread across API keys and steer around a rate-limited key"""
+    print("Testing API key pool...")
+    from fred_client import FREDClient
+    from fetch_scheduler import FetchScheduler
+    from fred_fixture import start_fixture_server
+
+    server, base_url = start_fixture_server()
+    keys = ['key-a', 'key-b', 'key-c']
+    scheduler = FetchScheduler(keys=keys, key_selection='round_robin', backoff_base=0.01)
+    client = FREDClient(api_keys=keys, base_url=base_url, scheduler=scheduler)
+    for series_id in ['FEDFUNDS', 'DGS10', 'DGS2', 'UNRATE', 'CPIAUCSL', 'M2SL']:
+        client.get_series(series_id)
+    assert dict(server.key_counts) == {key: 2 for key in keys}, \
+        f"Uneven key use: {dict(server.key_counts)}"
+
+    server.exhausted_keys.add('key-a')
+    for series_id in ['GDPC1', 'T10Y2Y', 'PCEPILFE']:
+        client.get_series(series_id)
+    key_metrics = client.get_metrics()['scheduler']['keys']
+    assert key_metrics[0]['rate_limited'] >= 1, "429 should be counted against key-a"
+    server.shutdown()
+    print(f"✓ Fetches spread over {len(keys)} keys, retried around a 429\n")
+
+
+def test_tenant_quotas():
+    """Test quotas key on API keys or trusted proxies and can't be dodged with a header"""
+    print("Testing tenant quotas...")
+    from app import EXTENSION_KEY
+    from quotas import TenantQuotas
+
+    quotas = TenantQuotas(rate_per_minute=1, burst=2, max_tracked=2,
+                          api_keys={'issued-key': 'reporting'}, trusted_proxies=['10.0.0.1'])
+    assert quotas.identify('issued-key', 'other', '1.2.3.4') == 'reporting'
+    assert quotas.identify('guessed-key', 'other', '1.2.3.4') == '1.2.3.4'
+    assert quotas.identify(None, 'other', '1.2.3.4') == '1.2.3.4', "Untrusted header was believed"
+    assert quotas.identify(None, 'other', '10.0.0.1') == 'other', "Trusted proxy header ignored"
+    assert quotas.identify(None, None, '2001:db8::1') == quotas.identify(None, None, '2001:db8::2')
+
+    assert [quotas.check('reporting') for _ in range(3)][:2] == [0, 0]
+    assert quotas.check('reporting') > 0, "Third request in the burst should wait"
+    for address in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+        quotas.check(address)
+    assert quotas.check('reporting') > 0, "Anonymous clients must not evict a named tenant"
+    assert quotas.metrics()['tenants_tracked'] == 3, quotas.metrics()
+
+    flask_app, server = fixture_app()
+    try:
+        flask_app.extensions[EXTENSION_KEY]['quotas'] = TenantQuotas(
+            rate_per_minute=1, burst=2, api_keys={'issued-key': 'reporting'}, trusted_proxies=[])
+        client = flask_app.test_client()
+        codes = [client.get('/api/metrics', headers={'X-Tenant-ID': f'rotating-{i}'}).status_code
+                 for i in range(3)]
+        assert codes == [200, 200, 429], f"Rotating X-Tenant-ID escaped the quota: {codes}"
+        response = client.get('/api/metrics', headers={'X-Tenant-ID': 'another'})
+        assert response.status_code == 429 and int(response.headers['Retry-After']) > 0
+        assert client.get('/api/metrics', headers={'X-API-Key': 'issued-key'}).status_code == 200
+        assert client.get('/').status_code == 200, "Health checks are exempt"
+    finally:
+        server.shutdown()
+    print("✓ Header rotation stays in the client's bucket; named tenants are never evicted\n")
+
+
+def test_data_quality():
+    """Test ingest-time checks find gaps, outliers and stale data"""
+    print("Testing data quality checks...")
+    from datetime import datetime, timedelta
+    from data_quality import assess, check_series
+    from fred_fixture import synthetic_series
+
+    clean = check_series('CPIAUCSL', synthetic_series('CPIAUCSL'))
+    assert clean.frequency == 'M' and not clean.flags, f"Clean series flagged: {clean.flags}"
+
+    data = synthetic_series('CPIAUCSL')
+    data = data.drop(data.index[-6:-4])
+    data.iloc[-1] *= 10
+    quality = check_series('CPIAUCSL', data)
+    assert quality.gap_count == 1 and quality.missing_periods == 2, f"Gaps: {quality.gaps}"
+    assert quality.outliers[-1]['date'] == quality.latest_date, "Spike should be an outlier"
+    assert set(quality.flags) == {'gaps', 'outliers'}, f"Unexpected flags: {quality.flags}"
+
+    daily = check_series('DGS10', synthetic_series('DGS10'))
+    assert daily.frequency == 'D' and daily.gap_count == 0, "Holidays are missing values, not gaps"
+    report = assess(daily, datetime.fromisoformat(daily.latest_date) + timedelta(days=30))
+    assert report['stale'] and 'stale' in report['flags'], "Month-old daily data should be stale"
+    print(f"✓ Found {quality.missing_periods} missing months and a {quality.outliers[-1]['change']:.0f} spike\n")
+
+
+def test_cache_snapshot():
+    """Test saving the cache and analytics to a snapshot and restoring them in a new client"""
+    print("Testing cache snapshot and restore...")
+    import os
+    import tempfile
+    from analytics import AnalyticsEngine
+    from fred_client import FREDClient
+    from fred_fixture import start_fixture_server
+    from snapshot import CacheSnapshotter
+
+    server, base_url = start_fixture_server()
+    try:
+        path = os.path.join(tempfile.mkdtemp(), 'cache.snapshot')
+        client = FREDClient(api_key='offline', base_url=base_url)
+        analytics = AnalyticsEngine(client)
+        expected = analytics.snapshot()
+        assert CacheSnapshotter(client, analytics, path=path).save(), "Snapshot should be written"
+
+        requests_before = server.request_count
+        restored_client = FREDClient(api_key='offline', base_url=base_url)
+        restored_analytics = AnalyticsEngine(restored_client)
+        restored = CacheSnapshotter(restored_client, restored_analytics, path=path).restore()
+        assert restored == len(client.cache_entries()), "Every cached series should be restored"
+        assert restored_analytics.snapshot() == expected, "Restored analytics should match"
+        assert server.request_count == requests_before, "Restore should not refetch fresh data"
+    finally:
+        server.shutdown()
+    print(f"✓ Restored {restored} series without upstream requests\n")
+
+
+def test_term_structure():
+    """Test Nelson-Siegel fits recover known factors despite missing maturities"""
+    print("Testing term structure fits...")
+    import numpy as np
+    import pandas as pd
+    from term_structure import fit_nelson_siegel, inversion_episodes, nelson_siegel_loadings
+
+    loadings = nelson_siegel_loadings(np.array([0.25, 1, 2, 5, 10, 30]), 0.7308)
+    betas = np.array([[5.0, -1.0, 0.5], [4.0, 1.5, -0.5], [3.0, 0.0, 0.0]])
+    yields = betas @ loadings.T
+    yields[1, [0, 4]] = np.nan
+    yields[2, :3] = np.nan  # Too few maturities left to fit
+    fitted = fit_nelson_siegel(yields, loadings)
+    assert np.allclose(fitted[:2], betas[:2]), "Fits should recover the factors"
+    assert np.isnan(fitted[2]).all(), "Days with too few maturities should not be fit"
+
+    spread = pd.Series([0.5, -0.1, -0.3, 0.2, -0.1],
+                       index=pd.date_range('2024-01-01', periods=5))
+    episodes = inversion_episodes(spread)
+    assert list(episodes['days']) == [2, 1], f"Unexpected episodes: {episodes}"
+    print("✓ Curve factors and inversion episodes computed correctly\n")
+
+
+def test_model_signals():
+    """Test requests read model outputs computed in the background instead of fetching them"""
+    print("Testing background model signals...")
+    from app import EXTENSION_KEY
+    from fetch_scheduler import PRIORITY_BACKGROUND
+
+    flask_app, server = fixture_app()
+    try:
+        components = flask_app.extensions[EXTENSION_KEY]
+        signals, client = components['model_signals'], flask_app.test_client()
+        analysis = client.get('/api/policy-stance').get_json()
+        cold_requests = server.request_count
+        assert analysis['policy_stance'].get('policy_gap') is None, "Cold signals should be None"
+        assert analysis['yield_curve'].get('recession_probability') is None
+        assert cold_requests <= 6, f"Cold request fetched {cold_requests} series"
+
+        scheduler = components['fred_client'].scheduler
+        submit, priorities = scheduler.submit, []
+        scheduler.submit = lambda *args, **kwargs: (priorities.append(kwargs['priority'])
+                                                    or submit(*args, **kwargs))
+        signals.refresh()
+        scheduler.submit = submit
+        assert priorities and set(priorities) == {PRIORITY_BACKGROUND}, f"Priorities: {priorities}"
+
+        analysis = client.get('/api/policy-stance').get_json()
+        gap = components['taylor_rule'].policy_gap()
+        assert analysis['policy_stance']['policy_gap'] == gap, f"Got {analysis['policy_stance']}"
+        assert analysis['yield_curve']['term_structure'] is not None
+        assert server.request_count == cold_requests + len(priorities), "Warm request fetched"
+    finally:
+        server.shutdown()
+    print(f"✓ Cold request made {cold_requests} upstream calls; models refreshed in the background\n")
+
+
+def test_recession_model():
+    """Test the logit fit recovers known coefficients and the target spans the horizon"""
+    print("Testing recession model fit...")
+    import numpy as np
+    import pandas as pd
+    from recession_model import fit_logit, recession_ahead
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([np.ones(5000), rng.normal(size=(5000, 2))])
+    true_beta = np.array([-1.0, 2.0, -0.5])
+    y = (rng.random(5000) < 1 / (1 + np.exp(-(X @ true_beta)))).astype(float)
+    beta, iterations, converged = fit_logit(X, y)
+    assert converged, f"Fit did not converge in {iterations} iterations"
+    assert np.allclose(beta, true_beta, atol=0.15), f"Unexpected coefficients: {beta}"
+
+    months = pd.date_range('2020-01-01', periods=8, freq='MS')
+    usrec = pd.Series([0, 0, 0, 0, 1, 0, 0, 0], index=months, dtype=float)
+    target = recession_ahead(usrec, 3)
+    assert target.iloc[:5].tolist() == [0, 1, 1, 1, 0], f"Got {target.tolist()}"
+    assert target.iloc[5:].isna().all(), "Windows past the data should be NaN"
+    print(f"✓ Logit coefficients recovered in {iterations} iterations; target spans the horizon\n")
+
+
+def test_taylor_rule():
+    """Test the Taylor-rule rate matches the textbook formula"""
+    print("Testing Taylor rule...")
+    import numpy as np
+    from taylor_rule import implied_rate
+
+    # 2% real rate + 3% inflation + 0.5 * 1% excess inflation + 1.0 * 0.5% slack
+    rate = implied_rate(3.0, 4.5, neutral_rate=2.0, natural_unemployment=5.0,
+                        inflation_weight=0.5, unemployment_weight=1.0)
+    assert np.isclose(rate, 6.0), f"Unexpected rate: {rate}"
+
+    rates = implied_rate(np.array([2.0, np.nan]), np.array([4.0, 4.0]), neutral_rate=1.0,
+                         natural_unemployment=4.0)
+    assert np.isclose(rates[0], 3.0) and np.isnan(rates[1]), f"Unexpected rates: {rates}"
+    print("✓ Implied policy rates computed correctly\n")
+
+
+def test_alert_detection():
+    """Test transitions are detected once and evaluation resumes from the last date"""
+    print("Testing alert detection...")
+    import pandas as pd
+    from alerts import AlertSink, TransitionDetector
+    from results import AlertEvent
+
+    class SpreadDetector(TransitionDetector):
+        def __init__(self, spread):
+            super().__init__()
+            self.spread = spread
+
+        def labels(self, start):
+            spread = self.spread.loc[start:]
+            return pd.DataFrame({'label': ['Inverted' if v < 0 else 'Normal' for v in spread],
+                                 'value': spread.values}, index=spread.index)
+
+        def event(self, date, previous, current, value):
+            return AlertEvent('curve', date, current, f"{previous} -> {current}", previous)
+
+    dates = pd.date_range('2024-01-01', periods=6)
+    detector = SpreadDetector(pd.Series([0.5, -0.1, -0.2, 0.3, 0.4, 0.2], index=dates))
+    events = detector.evaluate()
+    assert [e.date for e in events] == ['2024-01-02', '2024-01-04'], f"Got {events}"
+    assert detector.evaluate() == [], "Re-evaluating unchanged data should find nothing"
+
+    detector.spread = pd.concat([detector.spread,
+                                 pd.Series([-0.5], index=[pd.Timestamp('2024-01-07')])])
+    events = detector.evaluate()
+    assert [(e.date, e.previous) for e in events] == [('2024-01-07', 'Normal')], f"Got {events}"
+
+    resumed = SpreadDetector(detector.spread)
+    resumed.restore(detector.state())
+    assert resumed.evaluate() == [], "A restored detector should resume where it left off"
+
+    class Incomplete(TransitionDetector):
+        def labels(self, start):
+            return pd.DataFrame()
+
+    for abstract in (Incomplete, AlertSink):
+        try:
+            abstract()
+            raise AssertionError(f"{abstract.__name__} should not be instantiable")
+        except TypeError:
+            pass
+    print("✓ Transitions detected incrementally\n")
+
+
+def test_batch_reports():
+    """Test as-of reports use the last observation on or before each date"""
+    print("Testing batch reports...")
+    import pandas as pd
+    import json
+    import os
+    import tempfile
+    from batch_reports import ReportPanel, ReportWriter, build_reports, generate
+    from strategy_table import StrategyTable
+
+    months = pd.date_range('2023-01-01', periods=3, freq='MS')
+    panel = ReportPanel({
+        'fed_funds_rate': pd.Series([5.0, 5.25, 5.5], index=months),
+        'unemployment': pd.Series([3.5, 3.6, 3.7], index=months),
+        'yield_curve': pd.Series([-0.5, -0.4, -0.3], index=months),
+        'inflation': pd.Series([6.0, 5.5, 5.0], index=months),
+        'rate_momentum': pd.Series([1.0, 0.75, 0.5], index=months),
+    })
+    dates = pd.DatetimeIndex(['2022-12-15', '2023-02-20'])
+    reports = build_reports(panel.at(dates), panel.indicators, StrategyTable.load())
+
+    assert reports[0]['indicators']['fed_funds_rate'] is None, "No data before the first observation"
+    assert reports[1]['indicators']['fed_funds_rate'] == 5.25, f"Got {reports[1]['indicators']}"
+    assert reports[1]['policy_stance'] == 'Hawkish', f"Got {reports[1]['policy_stance']}"
+    assert reports[1]['yield_curve_status'] == 'Inverted'
+
+    path = os.path.join(tempfile.mkdtemp(), 'reports.jsonl')
+    dates = pd.date_range('2022-06-01', periods=30, freq='W-FRI')
+    written = generate(panel, dates, path, fmt='jsonl', workers=2, chunk_size=4)
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    assert written == len(rows) == 30, f"Wrote {written}, read {len(rows)}"
+    assert [r['as_of'] for r in rows] == [d.strftime('%Y-%m-%d') for d in dates], "Out of order"
+    try:
+        ReportWriter(path, [])
+        raise AssertionError("ReportWriter should be abstract")
+    except TypeError:
+        pass
+    print("✓ Reports built from point-in-time values and written in order from a bounded pool\n")
+
+
+def test_what_if():
+    """Test grid evaluation matches the stance rules point by point"""
+    print("Testing what-if analysis...")
+    from analyzer import classify_stance, stance_signals
+    import what_if
+
+    baseline = {'rate_momentum': 0.0, 'inflation': 2.5, 'unemployment': 4.5,
+                'yield_curve': 0.5, 'policy_gap': None}
+    grid = {'inflation': {'start': 0, 'stop': 6, 'step': 0.5}, 'rate_momentum': [-0.5, 0, 0.5]}
+    result = what_if.evaluate(baseline, shifts={'unemployment': -1.0}, grid=grid)
+    assert result['shape'] == [13, 3], f"Unexpected shape: {result['shape']}"
+
+    for i, inflation in enumerate(result['axes']['inflation']):
+        for j, momentum in enumerate(result['axes']['rate_momentum']):
+            hawkish, dovish = stance_signals(momentum, inflation, 3.5, 0.5)
+            expected = str(classify_stance(hawkish, dovish))
+            assert what_if.STANCES[result['stance'][i, j]] == expected, \
+                f"Mismatch at inflation={inflation}, momentum={momentum}"
+
+    oversized = [{'inflation': {'start': 0, 'stop': 5, 'num': 100_000_000}},
+                 {'inflation': {'start': 0, 'stop': 1e300, 'step': 1}},
+                 {'inflation': {'start': 0, 'stop': 'inf', 'step': 1}}]
+    for spec in oversized:
+        try:
+            what_if.evaluate(baseline, grid=spec)
+            raise AssertionError(f"Accepted grid {spec}")
+        except ValueError:
+            pass
+    for overrides, shifts in [({'inflation': float('nan')}, None), ({'inflation': '3.5'}, None),
+                              ({'inflation': None}, None), (None, {'yield_curve': True}),
+                              (None, {'unemployment': float('inf')})]:
+        try:
+            what_if.evaluate(baseline, overrides, shifts)
+            raise AssertionError(f"Accepted overrides {overrides}, shifts {shifts}")
+        except ValueError:
+            pass
+    scenario = what_if.evaluate(baseline, {'inflation': 3}, {'inflation': 0.5})['scenario']
+    assert scenario['inflation'] == 3.5 and isinstance(scenario['inflation'], float)
+
+    flask_app, server = fixture_app()
+    try:
+        response = flask_app.test_client().post('/api/what-if',
+                                                json={'overrides': {'inflation': '3.5'}})
+        assert response.status_code == 400, f"String override gave {response.status_code}"
+    finally:
+        server.shutdown()
+    print("✓ Stance surface matches point-by-point analysis; oversized grids and bad inputs rejected\n")
+
+
+def test_profiling():
+    """Test request profiles and sampled stacks record the code that ran"""
+    print("Testing profiling hooks...")
+    import threading
+    import time
+    from profiling import RequestProfiles, SamplingProfiler
+
+    def busy_backend_work(stop):
+        while not stop.is_set():
+            sum(range(1000))
+
+    profiles = RequestProfiles(history=2, directory='')
+    done = threading.Event()
+    done.set()
+    profiler = profiles.start()
+    busy_backend_work(done)
+    profile_id = profiles.finish(profiler, 'GET', '/api/test', 200, 0.01)
+    assert 'busy_backend_work' in profiles.report(profile_id), "Profile should list the call"
+
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_backend_work, args=(stop,))
+    worker.start()
+    sampler = SamplingProfiler(interval=0.001, modules=['test_backend'], output='')
+    for _ in range(20):
+        sampler.sample()
+        time.sleep(0.001)
+    stop.set()
+    worker.join()
+    stacks = sampler.collapsed()
+    assert 'test_backend:busy_backend_work' in stacks, f"Worker not sampled: {stacks[:200]}"
+    assert 'test_profiling' not in stacks, "The sampling thread itself should be skipped"
+    print(f"✓ Profiled a call and sampled {sampler.status()['recorded']} worker stacks\n")
+
+
+def test_correlations():
+    """Test lead-lag detection, Granger tests and option limits on synthetic series"""
+    print("Testing cross-series correlations...")
+    import numpy as np
+    import threading
+    from correlations import (
+        CrossSeriesAnalytics, check_options, cross_correlation, f_survival, granger,
+        pairwise_correlation
+    )
+    from fred_client import FREDClient
+    from fred_fixture import start_fixture_server
+
+    rng = np.random.default_rng(7)
+    driver = rng.standard_normal(300)
+    follower = np.roll(driver, 3) + 0.3 * rng.standard_normal(300)
+    values = np.column_stack([driver, follower])[3:]
+
+    corr, counts = pairwise_correlation(values, values)
+    expected = np.corrcoef(values[:, 0], values[:, 1])[0, 1]
+    assert abs(corr[0, 1] - expected) < 1e-9 and counts[0, 1] == len(values)
+    lead_lag = cross_correlation(values, max_lag=6)
+    best_lag = int(np.argmax(lead_lag[:, 0, 1])) - 6
+    assert best_lag == 3, f"Driver should lead by 3 months, found {best_lag}"
+    f_stat, p_value = granger(values, lags=4)
+    assert p_value[0, 1] < 1e-6 and p_value[1, 0] > 0.01, f"Granger p-values: {p_value}"
+    critical = float(f_survival(3.4928, 2, 20))
+    assert abs(critical - 0.05) < 1e-4, f"F(2, 20) critical value gave p={critical}"
+
+    for windows, max_lag, lags, length in [([0], 12, 6, 300), ([60], -1, 6, 300),
+                                           ([60], 12, 300, 300), ([60], 290, 6, 300),
+                                           ([60], 12, 6, 20), ([60] * 10, 12, 6, 300)]:
+        try:
+            check_options(windows, max_lag, lags, length)
+            raise AssertionError(f"Accepted window {windows}, max_lag {max_lag}, lags {lags}")
+        except ValueError:
+            pass
+    check_options([60], 24, 6, 300)
+
+    server, base_url = start_fixture_server()
+    try:
+        client = FREDClient(api_key='offline', base_url=base_url)
+        analytics = CrossSeriesAnalytics(client)
+        names = ['fed_funds_rate', 'treasury_10y', 'unemployment']
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(analytics.summary(names)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 4, "Concurrent summaries should all succeed"
+        summary = analytics.summary(names)
+        assert analytics.summary(names) is summary, "Unchanged data should reuse results"
+
+        key = next(k for k in client._cache if k.startswith(client.registry.series_id('unemployment')))
+        revised = client._cache[key] * 2
+        client._cache[key] = revised
+        assert analytics.summary(names) is not summary, "New data version should recompute"
+    finally:
+        server.shutdown()
+    print(f"✓ Driver leads by {best_lag} months, Granger p={p_value[0, 1]:.2g} "
+          f"(reverse {p_value[1, 0]:.2f}); out-of-range options rejected\n")
+
+
+def test_data_version():
+    """Test the data version is shared by clients with the same data and moves when it changes"""
+    print("Testing dashboard data version...")
+    from app import EXTENSION_KEY
+    from fred_client import FREDClient
+    from fred_fixture import start_fixture_server
+
+    server, base_url = start_fixture_server()
+    try:
+        client = FREDClient(api_key='offline', base_url=base_url)
+        other = FREDClient(api_key='offline', base_url=base_url)
+        for c in (client, other):
+            c.get_series('DFF')
+            c.get_series('DGS10')
+        version = client.data_version()
+        assert other.data_version() == version, "Clients with the same data should agree"
+
+        key = next(iter(other._cache))
+        revised = other._cache[key].copy()
+        revised.iloc[-1] += 0.25
+        other._cache[key] = revised
+        assert other.data_version() != version, "A revised observation should change the version"
+    finally:
+        server.shutdown()
+
+    flask_app, server = fixture_app()
+    try:
+        client = flask_app.test_client()
+        fred_client = flask_app.extensions[EXTENSION_KEY]['fred_client']
+        response = client.get('/api/dashboard/current')  # cold cache: fetches while answering
+        current = response.get_json()
+        assert current['data_version'] == fred_client.data_version(), \
+            "Version should describe the data the response was built from"
+        assert response.headers['ETag'].startswith(f'W/"{current["data_version"]}-')
+        response = client.get('/api/dashboard/current',
+                              headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304, f"Unchanged data gave {response.status_code}"
+    finally:
+        server.shutdown()
+    print(f"✓ Data version {version} matches across clients and tracks revisions\n")
+
+
+def test_dashboard_history_merge():
+    """Test the frontend's cached-history merge reproduces a full history fetch"""
+    print("Testing dashboard history merge...")
+    import json
+    import os
+    import shutil
+    import subprocess
+
+    node = shutil.which('node')
+    if node is None:
+        print("⚠ Skipped: node is needed to run the frontend code\n")
+        return None
+
+    # Runs frontend/app.js in a sandbox and calls fetchHistory(cached), answering
+    # fetches from canned responses so the URL it builds is checked too
+    runner = """
+        const fs = require('fs');
+        const vm = require('vm');
+        const input = JSON.parse(fs.readFileSync(0, 'utf8'));
+        const context = vm.createContext({
+            console,
+            document: { addEventListener() {} },
+            localStorage: { getItem() { return null; }, setItem() {} },
+            fetch: async url => {
+                if (!(url in input.responses)) throw new Error('Unexpected request ' + url);
+                return { json: async () => input.responses[url] };
+            },
+        });
+        vm.runInContext(fs.readFileSync(input.script, 'utf8'), context);
+        context.cached = input.cached;
+        vm.runInContext('fetchHistory(cached)', context)
+            .then(merged => process.stdout.write(JSON.stringify(merged)))
+            .catch(error => { console.error(error.message); process.exit(1); });
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'app.js')
+    url = 'http://localhost:5001/api/dashboard/history'
+
+    def fetch_history(cached, responses):
+        result = subprocess.run([node, '-e', runner], capture_output=True, text=True, input=json.dumps(
+            {'script': script, 'cached': cached, 'responses': responses}))
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout)
+
+    flask_app, server = fixture_app()
+    try:
+        client = flask_app.test_client()
+        full = client.get('/api/dashboard/history').get_json()
+
+        # A cache from before the latest observations, with a point since dropped from the window
+        cached = json.loads(json.dumps(full))
+        for trim, data in enumerate(cached['series'].values(), start=1):
+            del data['dates'][-trim:], data['values'][-trim:]
+        first = next(iter(cached['series'].values()))
+        first['dates'].insert(0, '1900-01-01')
+        first['values'].insert(0, 1.0)
+        since = min(data['dates'][-1] for data in cached['series'].values())
+        delta = client.get(f'/api/dashboard/history?since={since}').get_json()
+
+        merged = fetch_history(cached, {f'{url}?since={since}': delta})
+        assert merged['series'] == full['series'], "Merged history differs from a full fetch"
+
+        first['dates'], first['values'] = [], []
+        merged = fetch_history(cached, {url: full})
+        assert merged == full, "An empty cached series should trigger a full fetch"
+    finally:
+        server.shutdown()
+    print(f"✓ Cache merged with the history since {since} matches a full fetch\n")
+
+
+def test_series_store():
+    """Test SQL over stored observations joins series by name and rejects writes and BLOBs"""
+    print("Testing series store queries...")
+    import os
+    import tempfile
+    from fred_client import FREDClient
+    from fred_fixture import start_fixture_server
+    from app import EXTENSION_KEY
+    import pandas as pd
+    from series_store import SeriesStore, build_database
+
+    server, base_url = start_fixture_server()
+    client = FREDClient(api_key='offline', base_url=base_url)
+    ten_year, two_year = client.get_series('DGS10'), client.get_series('DGS2')
+    path = os.path.join(tempfile.mkdtemp(), 'observations.db')
+    build_database(path, client.cache_entries(), client.registry, client.data_version())
+    server.shutdown()
+
+    store = SeriesStore(path=path)
+    result = store.query(
+        "SELECT date, t10.value - t2.value AS spread FROM treasury_10y t10 "
+        "JOIN treasury_2y t2 USING (date) WHERE t10.value IS NOT NULL "
+        "AND t2.value IS NOT NULL ORDER BY date DESC LIMIT 1"
+    )
+    date, spread = result['rows'][0]
+    expected = ten_year[date] - two_year[date]
+    assert abs(spread - expected) < 1e-9, f"Spread {spread} should be {expected}"
+    assert result['data_version'] == client.data_version(), "Store should record its data version"
+
+    rejected = ["DELETE FROM observations", "ATTACH DATABASE 'x.db' AS x",
+                "SELECT randomblob(4)", "SELECT zeroblob(1000000000)", "SELECT X'00'",
+                "SELECT replace(printf('%.*c', 900000, 'x'), 'x', 'xx')"]
+    for statement in rejected:
+        try:
+            store.query(statement)
+            raise AssertionError(f"Store accepted {statement}")
+        except ValueError:
+            pass
+    for max_rows in (0, -5, 1.5):
+        try:
+            store.query("SELECT 1", max_rows=max_rows)
+            raise AssertionError(f"Store accepted max_rows={max_rows}")
+        except ValueError:
+            pass
+
+    entries = client.cache_entries()
+    entries[-1] = {**entries[-1], 'data': pd.Series([1.0], index=[0])}  # can't be resampled
+    try:
+        build_database(path, entries, client.registry, 'broken')
+        raise AssertionError("Build with bad data should fail")
+    except TypeError:
+        pass
+    leftovers = [name for name in os.listdir(os.path.dirname(path)) if name != 'observations.db']
+    assert not leftovers, f"Failed build left {leftovers}"
+    assert store.built_version() == client.data_version(), "Failed build replaced the database"
+    stopped = SeriesStore(client, path=os.path.join(os.path.dirname(path), 'stopped.db'))
+    stopped.stop()
+    assert not stopped.sync() and not os.path.exists(stopped.path), "Stopped store rebuilt"
+
+    flask_app, server = fixture_app()
+    try:
+        flask_app.extensions[EXTENSION_KEY]['series_store'] = store
+        client = flask_app.test_client()
+        response = client.post('/api/query', json={'sql': "SELECT hex(X'00')", 'max_rows': 1})
+        assert response.get_json()['rows'] == [['00']], response.get_json()
+        for body in ([1, 2], {'sql': 'SELECT 1', 'max_rows': -5}, {'sql': 'SELECT randomblob(4)'}):
+            response = client.post('/api/query', json=body)
+            assert response.status_code == 400, f"{body} gave {response.status_code}"
+    finally:
+        server.shutdown()
+    print(f"✓ Joined series by name ({date} spread {spread:.2f}); rejected writes and BLOBs\n")
+
+
+def test_startup():
+    """Test importing the app and CLI modules leaves heavy dependencies unloaded"""
+    print("Testing startup imports...")
+    import os
+    import subprocess
+    from bench_startup import _environment
+
+    script = (
+        "import sys, app, analyzer, fred_client, portfolio_advisor; "
+        "assert app._default_app is None, 'app built at import'; "
+        "print(' '.join(sorted({m.split('.')[0] for m in sys.modules "
+        "if m.startswith(('pandas.', 'numpy.', 'requests.'))})))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            env=_environment(), cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '', f"Loaded at import: {result.stdout.strip()}"
+
+    print("✓ No app built and pandas, numpy and requests unloaded at import\n")
+
+
 def test_flask_app():
     """Test Flask app"""
     print("Testing Flask app...")
@@ -133,6 +1292,15 @@ def test_flask_app():
         return False
 
 
+def run(test) -> bool:
+    """Run one test: it fails by raising (assert style) or by returning False"""
+    try:
+        return test() is not False
+    except Exception as e:
+        print(f"✗ {test.__name__} failed: {str(e)}\n")
+        return False
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -141,12 +1309,39 @@ def main():
     print()
 
     results = {
-        'Imports': test_imports(),
-        'Configuration': test_configuration(),
-        'FRED Client': test_fred_client(),
-        'Policy Analyzer': test_analyzer(),
-        'Portfolio Advisor': test_advisor(),
-        'Flask App': test_flask_app()
+        'Imports': run(test_imports),
+        'Configuration': run(test_configuration),
+        'FRED Client': run(test_fred_client),
+        'Policy Analyzer': run(test_analyzer),
+        'Portfolio Advisor': run(test_advisor),
+        'Strategy Table': run(test_strategy_table),
+        'Result Objects': run(test_result_objects),
+        'Series Registry': run(test_series_registry),
+        'Rolling Analytics': run(test_rolling_analytics),
+        'Profile Allocator': run(test_profile_allocator),
+        'Regime Optimizer': run(test_optimizer),
+        'Response Encoding': run(test_response_encoding),
+        'Fetch Scheduler': run(test_fetch_scheduler),
+        'Circuit Breaker': run(test_circuit_breaker),
+        'Fixture Fetch': run(test_fixture_fetch),
+        'API Key Pool': run(test_api_key_pool),
+        'Tenant Quotas': run(test_tenant_quotas),
+        'Data Quality': run(test_data_quality),
+        'Cache Snapshot': run(test_cache_snapshot),
+        'Term Structure': run(test_term_structure),
+        'Model Signals': run(test_model_signals),
+        'Recession Model': run(test_recession_model),
+        'Taylor Rule': run(test_taylor_rule),
+        'Alert Detection': run(test_alert_detection),
+        'Batch Reports': run(test_batch_reports),
+        'What-If Analysis': run(test_what_if),
+        'Profiling': run(test_profiling),
+        'Correlations': run(test_correlations),
+        'Data Version': run(test_data_version),
+        'Dashboard History Merge': run(test_dashboard_history_merge),
+        'Series Store': run(test_series_store),
+        'Startup Imports': run(test_startup),
+        'Flask App': run(test_flask_app)
     }
 
     print("=" * 60)
@@ -0,0 +1,187 @@
+"""
+What-If Analysis - Policy stance across hypothetical indicator values, evaluated in one vectorized pass
+"""
+from __future__ import annotations
+from typing import Dict, List, Mapping, Optional
+import logging
+import math
+import numbers
+
+from lazy_import import lazy_import
+from analyzer import classify_stance, stance_signals
+import config
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Inputs to stance_signals that can be overridden, shifted or varied on a grid
+INPUTS = ['rate_momentum', 'inflation', 'unemployment', 'yield_curve', 'policy_gap']
+
+# Stance labels in surface code order (code = position)
+STANCES = ['Dovish', 'Neutral', 'Hawkish']
+
+
+def _check_inputs(values: Mapping, what: str):
+    unknown = set(values) - set(INPUTS)
+    if unknown:
+        raise ValueError(f"Unknown {what} input(s): {', '.join(sorted(unknown))} "
+                         f"(choose from {', '.join(INPUTS)})")
+
+
+def _finite(value, what: str) -> float:
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{what} must be finite")
+    return value
+
+
+def _number(value, what: str) -> float:
+    """Check an override or shift is a finite number (strings and booleans are rejected)"""
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        raise ValueError(f"{what} must be a number")
+    return _finite(value, what)
+
+
+def axis_length(name: str, spec) -> int:
+    """
+    Number of values an axis spec describes, worked out without building the axis
+
+    Args:
+        name: Input name (for error messages)
+        spec: Axis spec (see parse_axis)
+
+    Returns:
+        Axis length
+    """
+    try:
+        if isinstance(spec, Mapping):
+            start, stop = _finite(spec['start'], 'start'), _finite(spec['stop'], 'stop')
+            if 'num' in spec:
+                num = _finite(spec['num'], 'num')
+                if num != int(num) or num < 1:
+                    raise ValueError("num must be a positive integer")
+                return int(num)
+            step = _finite(spec['step'], 'step')
+            if step <= 0:
+                raise ValueError("step must be positive")
+            # Same count as np.arange(start, stop + step / 2, step)
+            return max(0, math.ceil((stop + step / 2 - start) / step))
+        if isinstance(spec, (list, tuple)):
+            return len(spec)
+        raise TypeError("expected a list of values or {start, stop, step | num}")
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"Invalid grid for {name}: {str(e)}")
+
+
+def parse_axis(name: str, spec) -> np.ndarray:
+    """
+    Grid values for one input (check axis_length against a limit first)
+
+    Args:
+        name: Input name (for error messages)
+        spec: List of values, or {"start", "stop", "step"} (stop inclusive) or
+            {"start", "stop", "num"}
+
+    Returns:
+        1-D array of values
+    """
+    if axis_length(name, spec) == 0:
+        raise ValueError(f"Grid for {name} is empty")
+    try:
+        if isinstance(spec, Mapping):
+            start, stop = float(spec['start']), float(spec['stop'])
+            if 'num' in spec:
+                values = np.linspace(start, stop, int(float(spec['num'])))
+            else:
+                step = float(spec['step'])
+                # Half a step of slack so stop is included despite rounding
+                values = np.arange(start, stop + step / 2, step)
+        else:
+            values = np.asarray(spec, dtype=float).ravel()
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid grid for {name}: {str(e)}")
+    if not np.isfinite(values).all():
+        raise ValueError(f"Grid for {name} has non-finite values")
+    return values
+
+
+def evaluate(baseline: Mapping[str, Optional[float]], overrides: Mapping = None,
+             shifts: Mapping = None, grid: Mapping = None, max_points: int = None) -> Dict:
+    """
+    Evaluate the stance for a scenario or a grid of scenarios
+
+    Inputs start at the baseline, are replaced by overrides, then moved by
+    shifts. Grid axes replace an input with a range of values; their cartesian
+    product is evaluated at once.
+
+    Args:
+        baseline: Current inputs (PolicyAnalyzer.stance_inputs)
+        overrides: Input -> value to use instead of the baseline
+        shifts: Input -> amount added (after overrides), e.g. {"inflation": 1.0}
+        grid: Input -> axis spec (see parse_axis); shifts apply to grid values too
+        max_points: Largest grid allowed (default config.WHAT_IF_MAX_POINTS)
+
+    Returns:
+        Dictionary with the scenario inputs, grid axes and shape, and arrays
+        (shaped like the grid) of stance codes (index into STANCES), hawkish
+        and dovish signal counts and confidence
+    """
+    overrides, shifts, grid = overrides or {}, shifts or {}, grid or {}
+    for values, what in ((overrides, 'override'), (shifts, 'shift'), (grid, 'grid')):
+        _check_inputs(values, what)
+    overrides = {name: _number(value, f"Override for {name}") for name, value in overrides.items()}
+    shifts = {name: _number(value, f"Shift for {name}") for name, value in shifts.items()}
+    max_points = max_points or config.WHAT_IF_MAX_POINTS
+
+    scenario = {name: overrides.get(name, baseline.get(name)) for name in INPUTS}
+    for name, shift in shifts.items():
+        if scenario[name] is not None:
+            scenario[name] = scenario[name] + shift
+
+    # Size the grid before building any axis, so an oversized request allocates nothing
+    points = math.prod(axis_length(name, spec) for name, spec in grid.items())
+    if points > max_points:
+        size = f"{points}" if points < 10 ** 12 else f"{float(points):.3g}"
+        raise ValueError(f"Grid has {size} points; the limit is {max_points}")
+    axes = {name: parse_axis(name, spec) + shifts.get(name, 0.0)
+            for name, spec in grid.items()}
+    shape = tuple(len(values) for values in axes.values())
+
+    # Broadcast each axis along its own dimension instead of materializing a meshgrid
+    inputs = {}
+    for name in INPUTS:
+        if name in axes:
+            position = list(axes).index(name)
+            inputs[name] = axes[name].reshape([-1 if i == position else 1
+                                               for i in range(len(shape))])
+        else:
+            inputs[name] = scenario[name]
+    hawkish, dovish = (np.ascontiguousarray(np.broadcast_to(signals, shape))
+                       for signals in stance_signals(**inputs))
+    stances = classify_stance(hawkish, dovish)
+    codes = np.select([stances == 'Dovish', stances == 'Hawkish'], [0, 2], default=1)
+
+    return {
+        'scenario': {name: scenario[name] for name in INPUTS if name not in axes},
+        'axes': {name: values for name, values in axes.items()},
+        'shape': list(shape),
+        'stance': codes,
+        'hawkish_signals': hawkish,
+        'dovish_signals': dovish,
+        'confidence': np.abs(hawkish - dovish) * 10,
+    }
+
+
+def stance_shares(codes: np.ndarray) -> Dict[str, float]:
+    """Fraction of grid points with each stance"""
+    counts = np.bincount(np.ravel(codes), minlength=len(STANCES))
+    return {stance: float(count / counts.sum()) for stance, count in zip(STANCES, counts)}
+
+
+def breakpoints(axis: np.ndarray, codes: np.ndarray) -> List[Dict]:
+    """Axis values where the stance changes along a one-dimensional grid"""
+    changes = np.flatnonzero(np.diff(codes) != 0)
+    return [{'from': float(axis[i]), 'to': float(axis[i + 1]),
+             'previous': STANCES[codes[i]], 'stance': STANCES[codes[i + 1]]}
+            for i in changes]
@@ -1,6 +1,8 @@
 // FRED Portfolio Advisor - Frontend Application
 const API_BASE_URL = 'http://localhost:5001/api';
 
+const CACHE_PREFIX = 'fredDashboard';  // localStorage keys for static content, analysis and history
+
 let ratesChart = null;
 let dashboardData = null;
 
@@ -9,23 +11,141 @@ document.addEventListener('DOMContentLoaded', () => {
     loadDashboardData();
 });
 
-// Load all dashboard data
+// Load all dashboard data, showing the cached copy first on repeat visits
 async function loadDashboardData() {
-    try {
+    const cached = cachedDashboard();
+    if (cached) {
+        dashboardData = cached;
+        renderDashboard(cached);
+        showLoading(false);
+    } else {
         showLoading(true);
-        const response = await fetch(`${API_BASE_URL}/dashboard`);
-        const data = await response.json();
+    }
 
-        if (data.success) {
-            dashboardData = data;
-            renderDashboard(data);
-            showLoading(false);
-        } else {
-            showError('Failed to load data: ' + data.error);
-        }
+    try {
+        const data = await fetchDashboard();
+        dashboardData = data;
+        renderDashboard(data);
+        showLoading(false);
     } catch (error) {
         console.error('Error loading dashboard:', error);
-        showError('Unable to connect to API server. Make sure the backend is running on http://localhost:5001');
+        if (!cached) {
+            showError(error.apiError
+                ? 'Failed to load data: ' + error.message
+                : 'Unable to connect to API server. Make sure the backend is running on http://localhost:5001');
+        }
+    }
+}
+
+// Fetch current analysis, then only the strategy content and chart history that changed
+async function fetchDashboard() {
+    // no-cache revalidates with the stored ETag, so unchanged data costs a 304
+    const current = await fetchJson(`${API_BASE_URL}/dashboard/current`, { cache: 'no-cache' });
+
+    let staticContent = readCache('static');
+    if (!staticContent || staticContent.static_version !== current.static_version) {
+        // Versioned URL, cached by the browser indefinitely
+        staticContent = await fetchJson(`${API_BASE_URL}/dashboard/static?v=${current.static_version}`);
+        writeCache('static', staticContent);
+    }
+
+    let history = readCache('history');
+    if (!history || history.data_version !== current.data_version) {
+        history = await fetchHistory(history);
+        writeCache('history', history);
+    }
+
+    writeCache('current', current);
+    return composeDashboard(current, staticContent, history);
+}
+
+// Fetch chart history, only the recent part if some is cached, and merge it in
+async function fetchHistory(cached) {
+    const since = cached ? lastCommonDate(cached.series) : null;
+    const url = since ? `${API_BASE_URL}/dashboard/history?since=${since}` : `${API_BASE_URL}/dashboard/history`;
+    const delta = await fetchJson(url, { cache: 'no-cache' });
+    if (!since || !delta.from) {
+        return delta;
+    }
+
+    // Keep cached points inside the chart window and before the resent range
+    const series = {};
+    Object.entries(delta.series).forEach(([name, update]) => {
+        const previous = cached.series[name] || { dates: [], values: [] };
+        const dates = [];
+        const values = [];
+        previous.dates.forEach((date, i) => {
+            if ((!delta.start || date >= delta.start) && date < delta.from) {
+                dates.push(date);
+                values.push(previous.values[i]);
+            }
+        });
+        series[name] = { ...update, dates: dates.concat(update.dates), values: values.concat(update.values) };
+    });
+    return { ...delta, series };
+}
+
+// Earliest of the series' last dates, or null if any series is missing
+function lastCommonDate(series) {
+    const lastDates = Object.values(series || {}).map(data => data.dates[data.dates.length - 1]);
+    if (!lastDates.length || lastDates.some(date => !date)) {
+        return null;
+    }
+    return lastDates.sort()[0];
+}
+
+// Build the dashboard payload from cached parts, or null if any is missing or outdated
+function cachedDashboard() {
+    const current = readCache('current');
+    const staticContent = readCache('static');
+    const history = readCache('history');
+    if (!current || !staticContent || !history || staticContent.static_version !== current.static_version) {
+        return null;
+    }
+    return composeDashboard(current, staticContent, history);
+}
+
+// Combine current analysis with the content for its regime and the chart history
+function composeDashboard(current, staticContent, history) {
+    const content = staticContent.regimes[current.regime];
+    return {
+        ...current,
+        recommendation: {
+            ...content.recommendation,
+            allocation: current.allocation,
+            allocation_method: current.allocation_method
+        },
+        alternative_scenarios: content.scenarios,
+        asset_class_outlook: content.asset_class_outlook,
+        historical_data: history.series
+    };
+}
+
+// Fetch a JSON API response, throwing if the API reports an error
+async function fetchJson(url, options = {}) {
+    const response = await fetch(url, options);
+    const data = await response.json();
+    if (!data.success) {
+        const error = new Error(data.error);
+        error.apiError = true;
+        throw error;
+    }
+    return data;
+}
+
+function readCache(name) {
+    try {
+        return JSON.parse(localStorage.getItem(`${CACHE_PREFIX}.${name}`));
+    } catch (error) {
+        return null;
+    }
+}
+
+function writeCache(name, value) {
+    try {
+        localStorage.setItem(`${CACHE_PREFIX}.${name}`, JSON.stringify(value));
+    } catch (error) {
+        console.warn('Unable to cache dashboard data:', error);  // e.g. storage full or disabled
     }
 }
 